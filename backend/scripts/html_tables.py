@@ -0,0 +1,98 @@
+from html.parser import HTMLParser
+
+# elements without a closing tag, never pushed on the open-element stack
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+
+class _TableCollector(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tables = []
+        self.texts = {}
+        self._open = []         # [(tag, id)]
+        self._tables = []       # tables being filled, innermost last
+        self._row = None
+        self._cell = None
+        self._text_tags = {}    # tag -> list of collected texts
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag not in VOID_TAGS:
+            self._open.append((tag, attrs.get("id")))
+        if tag == "table":
+            table = {"id": attrs.get("id"), "ancestors": {i for _, i in self._open[:-1] if i}, "rows": []}
+            self.tables.append(table)
+            self._tables.append(table)
+        elif tag == "tr" and self._tables:
+            self._row = []
+        elif tag in ("td", "th") and self._row is not None:
+            self._cell = []
+        elif tag in self.texts:
+            self._text_tags.setdefault(tag, []).append([])
+
+    def handle_endtag(self, tag):
+        if tag in ("td", "th") and self._cell is not None:
+            self._row.append(" ".join("".join(self._cell).split()))
+            self._cell = None
+        elif tag == "tr" and self._row is not None:
+            if self._row:
+                self._tables[-1]["rows"].append(self._row)
+            self._row = None
+        elif tag == "table" and self._tables:
+            self._tables.pop()
+        elif tag in self.texts and self._text_tags.get(tag):
+            self.texts[tag].append("".join(self._text_tags[tag].pop()).strip())
+        # pop up to the matching open element, tolerating unclosed ones
+        for i in range(len(self._open) - 1, -1, -1):
+            if self._open[i][0] == tag:
+                del self._open[i:]
+                break
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+        for parts in self._text_tags.values():
+            for part in parts:
+                part.append(data)
+
+
+def parse_page(html, text_tags=()):
+    """
+    Single pass over a page. Returns (tables, texts) where tables is a list of
+    {"id", "ancestors" (ids of enclosing elements), "rows" (lists of cell texts)}
+    and texts maps each tag in text_tags to the texts of its elements.
+    """
+    collector = _TableCollector()
+    collector.texts = {tag: [] for tag in text_tags}
+    collector.feed(html)
+    collector.close()
+    return collector.tables, collector.texts
+
+
+def find_table(tables, table_id=None, inside_id=None):
+    for table in tables:
+        if table_id is not None and table["id"] != table_id:
+            continue
+        if inside_id is not None and inside_id not in table["ancestors"]:
+            continue
+        return table
+    return None
+
+
+def parse_number(text):
+    return float(text.replace("\xa0", "").replace(" ", "").replace(",", "."))
+
+
+def leading_numbers(rows, column):
+    """
+    Numbers from one column: header rows before the first number are skipped,
+    the first row without a number after that ends the block.
+    """
+    values = []
+    for row in rows:
+        try:
+            values.append(parse_number(row[column]))
+        except (IndexError, ValueError):
+            if values:
+                break
+    return values
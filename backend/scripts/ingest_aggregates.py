@@ -0,0 +1,145 @@
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from dataset import DATA_DIR, update_series
+
+# How each aggregate export is read and turned into per-day values (zł/kWh).
+FORMATS = {
+    "tge": {
+        "read_csv": {"names": ["date", "fixing_i_price", "fixing_i_volume", "fixing_ii_price", "fixing_ii_volume"], "skiprows": 1},
+        "time_column": "date",
+        "time_format": "%d.%m.%Y %H:%M",
+        "value_column": "fixing_i_price",
+        # hourly prices, one row per 15 min period in day files
+        "repeat": 4,
+    },
+    "rce": {
+        "read_csv": {"sep": ";", "names": ["Doba handlowa", "Doba", "OREB [Jednostka czasu od-do]", "RCE [zł/MWh]", "Data publikacji"], "skiprows": 1, "quotechar": '"'},
+        "time_column": "Doba",
+        "time_format": "%Y-%m-%d",
+        "value_column": "RCE [zł/MWh]",
+        "repeat": 1,
+    },
+}
+
+MANIFEST = "manifest.json"
+CHUNK_ROWS = 20_000
+
+
+def _digest(values):
+    return hashlib.sha1(np.round(np.asarray(values, dtype=np.float64), 8).tobytes()).hexdigest()
+
+
+def load_manifest(output_dir):
+    path = os.path.join(output_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, MANIFEST)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=0, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def stream_days(input_file, source, chunksize=CHUNK_ROWS):
+    """
+    Yields (day, values) from an aggregate export, reading it in chunks.
+    Exports are ordered by time, so a day is complete once a later day
+    shows up; only the day spanning a chunk boundary is carried over.
+    """
+    fmt = FORMATS[source]
+    pending_day, pending = None, []
+    for chunk in pd.read_csv(input_file, chunksize=chunksize, **fmt["read_csv"]):
+        days = pd.to_datetime(chunk[fmt["time_column"]], format=fmt["time_format"], errors="coerce").dt.date
+        chunk = chunk.assign(day=days).dropna(subset=["day"])
+        for day, group in chunk.groupby("day", sort=False):
+            values = (group[fmt["value_column"]].to_numpy(dtype=np.float64) / 1000.0).repeat(fmt["repeat"])
+            if day != pending_day:
+                if pending_day is not None:
+                    yield pending_day, np.concatenate(pending)
+                pending_day, pending = day, []
+            pending.append(values)
+    if pending_day is not None:
+        yield pending_day, np.concatenate(pending)
+
+
+def fit_day(values):
+    """
+    DST days come with 92 or 100 periods; like the existing day files they
+    are cut to 96 or padded by repeating the last period.
+    """
+    if len(values) >= 96:
+        return values[:96]
+    return np.pad(values, (0, 96 - len(values)), mode="edge")
+
+
+def _write_day(path, values):
+    tmp = path + ".tmp"
+    pd.DataFrame({"Data": values}).to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def ingest(input_files, source, output_dir=None, to_store=False, chunksize=CHUNK_ROWS):
+    """
+    Splits aggregate exports into day files, writing only days that are new
+    or whose values changed since the last run (tracked in manifest.json
+    with source row counts and digests). With to_store the changed days are also
+    written into the consolidated store. Returns the list of changed days.
+    """
+    output_dir = output_dir or os.path.join(DATA_DIR, source)
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = load_manifest(output_dir)
+    changed = {}
+
+    for input_file in input_files:
+        if not os.path.isfile(input_file):
+            print(f"Error: The file {input_file} does not exist.")
+            continue
+        for day, values in stream_days(input_file, source, chunksize):
+            day = str(day)
+            source_rows = len(values)
+            if source_rows != 96:
+                print(f"Warning: {day} has {source_rows} rows, fitted to 96")
+                values = fit_day(values)
+            path = os.path.join(output_dir, f"{day}.csv")
+            digest = _digest(values)
+            entry = manifest.get(day)
+            if entry is None and os.path.exists(path):
+                # day written before the manifest existed, compare once
+                existing = pd.read_csv(path).values.flatten()
+                entry = {"rows": len(existing), "digest": _digest(existing)}
+                manifest[day] = entry
+            if entry is not None and entry["digest"] == digest and os.path.exists(path):
+                continue
+
+            _write_day(path, values)
+            manifest[day] = {"rows": source_rows, "digest": digest}
+            changed[day] = values
+            print(f"Saved: {day}.csv")
+
+    save_manifest(output_dir, manifest)
+    if to_store:
+        update_series(source, changed)
+    print(f"{source}: {len(changed)} new or changed days")
+    return sorted(changed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Split TGE/RCE aggregate exports into day files.")
+    parser.add_argument("source", choices=sorted(FORMATS))
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--output-dir", default=None)
+    parser.add_argument("--store", action="store_true", help="also update the consolidated store")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    ingest(args.files, args.source, args.output_dir, to_store=args.store, chunksize=args.chunksize)
@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from functools import lru_cache
 
 
 def generate_energy_usage(day, total_usage=7.5):
@@ -50,13 +51,84 @@ def generate_energy_usage(day, total_usage=7.5):
     
 
     df.to_csv(f"../data_months/usage/{day}.csv", index=False)
+    return energy_usage
 
 
 
+# returns (days, 96) matrix ordered by ascending date
 def generate_energy_usage_days(total_usage=7.5, days=360):
+    usage = []
     for i in range(days):
         day = (datetime.now() - timedelta(days=i - 1)).strftime("%Y-%m-%d")
-        generate_energy_usage(day, total_usage=total_usage)
+        usage.append(generate_energy_usage(day, total_usage=total_usage))
+    return np.array(usage[::-1])
+
+
+# Vectorized generator with the same distributions as generate_energy_usage.
+# Random numbers come from a counter-based hash of (seed, day, stream), so a
+# day gets the same profile whatever date range it is generated in.
+
+MORNING_PEAK = slice(6 * 4, 9 * 4)
+EVENING_PEAK = slice(19 * 4, 22 * 4)
+NIGHT_LOW = slice(0, 5 * 4)
+
+
+def _splitmix64(x):
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _uniform(seed, day_numbers, streams):
+    """(days, streams) uniforms in [0, 1), deterministic per (seed, day, stream)."""
+    day_keys = _splitmix64(_splitmix64(np.full(len(day_numbers), seed, dtype=np.uint64)) ^ day_numbers.astype(np.uint64))
+    bits = _splitmix64(day_keys[:, None] + np.arange(streams, dtype=np.uint64))
+    return (bits >> np.uint64(11)) * (1.0 / (1 << 53))
+
+
+def _between(u, low, high):
+    return low + (high - low) * u
+
+
+@lru_cache(maxsize=32)
+def generate_usage_matrix(start, end, total_usage=7.5, seed=0):
+    """
+    Usage (kWh per 15 min) for every day from start to end inclusive as a
+    read-only (days, 96) matrix. Cached per (start, end, total_usage, seed).
+    """
+    dates = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+    day_numbers = dates.astype(np.int64)
+    months = dates.astype("datetime64[M]").astype(np.int64) % 12 + 1
+    # 1970-01-01 was a Thursday
+    weekend = (day_numbers + 3) % 7 >= 5
+
+    u = _uniform(seed, day_numbers, 2 + 2 * 96)
+    season, weekend_u, base_u, shape_u = u[:, 0], u[:, 1], u[:, 2:98], u[:, 98:]
+
+    winter = np.isin(months, [12, 1, 2])
+    summer = np.isin(months, [6, 7, 8])
+    totals = total_usage + np.where(winter, _between(season, 0.8, 2.0),
+                                    np.where(summer, -_between(season, 0.5, 1.0), _between(season, -0.3, 0.5)))
+    totals = np.where(weekend, totals * _between(weekend_u, 1.05, 1.15), totals)
+
+    usage = _between(base_u, 0.01, 0.07)
+    usage[:, MORNING_PEAK] += _between(shape_u[:, MORNING_PEAK], 0.1, 0.25)
+    usage[:, EVENING_PEAK] += _between(shape_u[:, EVENING_PEAK], 0.2, 0.5)
+    usage[:, NIGHT_LOW] *= _between(shape_u[:, NIGHT_LOW], 0.2, 0.4)
+
+    usage *= (totals / usage.sum(axis=1))[:, None]
+    usage.setflags(write=False)
+    return usage
+
+
+def usage_for_dates(dates, total_usage=7.5, seed=0):
+    """Rows of generate_usage_matrix for the given (sorted) dates."""
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    if len(dates) == 0:
+        return np.empty((0, 96))
+    matrix = generate_usage_matrix(str(dates[0]), str(dates[-1]), float(total_usage), int(seed))
+    return matrix[(dates - dates[0]).astype(np.int64)]
 
 import matplotlib.pyplot as plt
 import os
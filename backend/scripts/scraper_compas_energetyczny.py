@@ -1,6 +1,12 @@
-import requests
-import datetime
+import argparse
 import csv
+import datetime
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from backend.scripts.http_session import make_session
+from dataset import DATA_DIR, update_series
 
 # Mapping znacznik values to G14_TAURON pricing
 G14_TAURON = {
@@ -10,58 +16,155 @@ G14_TAURON = {
     3: 2.35,
 }
 
-def fetch_data(selected_date=""):
+PSE_API = "https://api.raporty.pse.pl/api"
+OUTPUT_DIR = os.path.join(DATA_DIR, "kompas_energetyczny")
+# dates written with all 96 rows, one per line; empty and partial days are fetched again
+CHECKPOINT = "checkpoint.txt"
+ROWS = 96
+
+
+def build_url(date, base_url=PSE_API):
+    next_date = date + datetime.timedelta(days=1)
+    return f"{base_url}/pdgsz?$filter=udtczas ge '{date:%Y-%m-%d}' and udtczas lt '{next_date:%Y-%m-%d}'"
+
+
+def map_values(data):
+    mapped_values = []
+    for item in data:
+        znacznik = item.get("znacznik", None)
+        if isinstance(znacznik, int) and znacznik in G14_TAURON:
+            mapped_values.extend([G14_TAURON[znacznik]] * 4)  # Repeat 4 times
+    return mapped_values
+
+
+def write_day(date_str, mapped_values, output_dir=OUTPUT_DIR):
+    filename = os.path.join(output_dir, f"{date_str}.csv")
+    with open(filename + ".tmp", mode="w", newline='', encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Cena [zł/kWh]"])
+        writer.writerows([value] for value in mapped_values)
+    os.replace(filename + ".tmp", filename)
+    return filename
+
+
+def fetch_day(date, session, base_url=PSE_API, timeout=30):
+    response = session.get(build_url(date, base_url), timeout=timeout)
+    response.raise_for_status()
+    return map_values(response.json().get("value", []))
+
+
+def fetch_data(selected_date="", base_url=PSE_API, output_dir=OUTPUT_DIR):
     try:
-        # Convert string to date
         date = datetime.datetime.strptime(selected_date, "%Y-%m-%d").date()
-        next_date = date + datetime.timedelta(days=1)
-
-        # Format for API
-        date_str = date.strftime("%Y-%m-%d")
-        next_date_str = next_date.strftime("%Y-%m-%d")
-        
-        # API URL
-        url = f"https://api.raporty.pse.pl/api/pdgsz?$filter=udtczas ge '{date_str}' and udtczas lt '{next_date_str}'"
-        print(url)
-        # Get API response
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json().get("value", [])
-
-        mapped_values = []
-        
-        for item in data:
-            znacznik = item.get("znacznik", None)
-            if isinstance(znacznik, int) and znacznik in G14_TAURON:
-                value = G14_TAURON[znacznik]
-                mapped_values.extend([[value]] * 4)  # Repeat 4 times
-                # print((f"{value}\n") * 4, end="")
+        with make_session(pool_size=1) as session:
+            mapped_values = fetch_day(date, session, base_url)
 
         # Check row count
-        if len(mapped_values) != 96:
+        if len(mapped_values) != ROWS:
             print(f"\nOstrzeżenie: {selected_date} — oczekiwano 96 wierszy, otrzymano {len(mapped_values)}.")
 
         # Save to CSV
         if mapped_values:
-            filename = f"../data_months/kompas_energetyczny/{date_str}.csv"
-            with open(filename, mode="w", newline='', encoding="utf-8") as file:
-                writer = csv.writer(file)
-                writer.writerow(["Cena [zł/kWh]"])
-                writer.writerows(mapped_values)
-            print(f"Zapisano do pliku: {filename}\n")
+            print(f"Zapisano do pliku: {write_day(selected_date, mapped_values, output_dir)}\n")
         else:
             print(f"{selected_date} — Brak danych do zapisania.\n")
 
     except Exception as e:
         print(f"{selected_date} — Błąd: {e}\n")
 
-def fetch_range(start_date="2024-07-01", end_date="2025-04-12"):
+
+def _read_checkpoint(output_dir):
+    path = os.path.join(output_dir, CHECKPOINT)
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def _complete(path):
+    """The day file exists and has all its rows."""
+    if not os.path.exists(path):
+        return False
+    with open(path, encoding="utf-8") as f:
+        return sum(1 for _ in f) - 1 >= ROWS
+
+
+def pending_dates(start_date, end_date, output_dir=OUTPUT_DIR):
+    """Dates in the range that are neither in the checkpoint nor complete on disk."""
+    done = _read_checkpoint(output_dir)
     current = datetime.datetime.strptime(start_date, "%Y-%m-%d").date()
     end = datetime.datetime.strptime(end_date, "%Y-%m-%d").date()
-    
+    dates = []
     while current <= end:
-        fetch_data(current.strftime("%Y-%m-%d"))
+        date_str = current.strftime("%Y-%m-%d")
+        if date_str not in done and not _complete(os.path.join(output_dir, f"{date_str}.csv")):
+            dates.append(current)
         current += datetime.timedelta(days=1)
+    return dates
+
+
+def backfill(start_date="2024-07-01", end_date="2025-04-12", workers=8, base_url=PSE_API, output_dir=OUTPUT_DIR,
+             retries=4, backoff=0.5, to_store=False):
+    """
+    Fetches every missing day of the range with a pool of `workers` threads
+    sharing one connection pool. Days written with all 96 rows are appended
+    to the checkpoint right away, so an interrupted backfill resumes where it
+    stopped; empty and partial days are tried again on the next run.
+    Returns {"written": [...], "empty": [...], "failed": {date: error}}.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    dates = pending_dates(start_date, end_date, output_dir)
+    result = {"written": [], "empty": [], "failed": {}}
+    written = {}
+    lock = threading.Lock()
+    print(f"{len(dates)} days to fetch")
+
+    with make_session(workers, retries, backoff) as session, \
+            open(os.path.join(output_dir, CHECKPOINT), "a", encoding="utf-8") as checkpoint, \
+            ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fetch_day, date, session, base_url): date for date in dates}
+        for future in as_completed(futures):
+            date_str = futures[future].strftime("%Y-%m-%d")
+            try:
+                mapped_values = future.result()
+            except Exception as e:
+                print(f"{date_str} — Błąd: {e}")
+                result["failed"][date_str] = str(e)
+                continue
+
+            if len(mapped_values) != ROWS:
+                print(f"Ostrzeżenie: {date_str} — oczekiwano 96 wierszy, otrzymano {len(mapped_values)}.")
+            if not mapped_values:
+                result["empty"].append(date_str)
+                continue
+            write_day(date_str, mapped_values, output_dir)
+            result["written"].append(date_str)
+            written[date_str] = mapped_values
+            if len(mapped_values) == ROWS:
+                with lock:
+                    checkpoint.write(date_str + "\n")
+                    checkpoint.flush()
+
+    if to_store:
+        update_series("kompas_energetyczny", written)
+    for key in ("written", "empty"):
+        result[key].sort()
+    print(f"written {len(result['written'])}, empty {len(result['empty'])}, failed {len(result['failed'])}")
+    return result
+
+
+def fetch_range(start_date="2024-07-01", end_date="2025-04-12"):
+    return backfill(start_date, end_date, workers=1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill PSE kompas energetyczny (G14) day files.")
+    parser.add_argument("--start", default="2024-07-01")
+    parser.add_argument("--end", default="2025-04-12")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--base-url", default=PSE_API, help="e.g. a stand_in_servers.py pse instance")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--store", action="store_true", help="also update the consolidated store")
+    args = parser.parse_args()
 
-# Run for the full date range
-fetch_range()
+    backfill(args.start, args.end, args.workers, args.base_url, args.output_dir, to_store=args.store)
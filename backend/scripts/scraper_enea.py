@@ -1,72 +1,137 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.keys import Keys
-from webdriver_manager.chrome import ChromeDriverManager
-from datetime import datetime, timedelta
-import time
+import argparse
 import csv
+import glob
 import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
 
+from backend.scripts.html_tables import find_table, leading_numbers, parse_page
 
-options = Options()
-# options.add_argument("--headless")  # Run in headless mode
-options.add_argument("--disable-gpu")
-options.add_argument("--no-sandbox")
+url = "https://www.enea.pl/ceny-dynamiczne"
+OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../data_months")
 
-driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+# Page retrieval (browser, the date is picked with a JS input) is separate
+# from parsing: every page is saved and parsed afterwards in one pass per
+# page, in parallel processes.
+
+
+def parse_enea_page(html):
+    """Hourly prices from the price table inside #questions."""
+    tables, _ = parse_page(html)
+    table = find_table(tables, inside_id="questions")
+    return leading_numbers(table["rows"], 1) if table else []
+
+
+def parse_enea_file(path):
+    date_match = re.search(r'\d{4}-\d{2}-\d{2}', os.path.basename(path))
+    with open(path, encoding="utf-8") as f:
+        return (date_match.group(0) if date_match else None), parse_enea_page(f.read())
 
-url = "https://www.enea.pl/ceny-dynamiczne"
 
-try:
-    driver.get(url)
-    time.sleep(3)  
+def parse_saved_pages(paths, workers=None):
+    """Parses saved pages in parallel processes, returns [(date, prices)]."""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(parse_enea_file, paths, chunksize=8))
+
+
+def write_day(date_str, scraped_data, output_folder=OUTPUT_DIR):
+    os.makedirs(output_folder, exist_ok=True)
+    csv_file_path = os.path.join(output_folder, f"enea_{date_str}.csv")
+    with open(csv_file_path + ".tmp", mode="w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Data"])
+        for data in scraped_data:
+            for i in range(4):
+                writer.writerow([data])
+    os.replace(csv_file_path + ".tmp", csv_file_path)
+    return csv_file_path
+
+
+def save_pages_with_driver(start_date, end_date, pages_dir="enea_pages", base_url=url, timeout=30):
+    """
+    Walks from start_date back to end_date, waiting for the price table to
+    change after every date change instead of sleeping, and saves each page
+    as enea_<date>.html. Returns the saved paths.
+    """
+    from selenium import webdriver
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.common.keys import Keys
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    options = Options()
+    # options.add_argument("--headless")  # Run in headless mode
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
 
     cokkies_xpath = '/html/body/div[1]/div/div[4]/div/div[2]/button[4]'
-    base_xpath = '//*[@id="questions"]/section/div/div/div/div/div[1]/div[1]/div[2]/div[2]/table/tbody/tr[{}]/td[2]'
-    input_xpath = '/html/body/div[1]/div[4]/section/div/div/div/div/div[1]/span/input'
-
-    cookies = driver.find_element(By.XPATH, cokkies_xpath)
-    cookies.click()
-    time.sleep(5)
-    start_date = datetime(2025, 3, 1)
-    end_date = datetime(2024, 8, 23)
-    current_date = start_date
-
-    while current_date >= end_date:
-        date_str = current_date.strftime("%Y-%m-%d")  # Format as YYYY-MM-DD
-        date_input = driver.find_element(By.ID, "raportDate")
-        date_input.clear()
-        date_input.send_keys(date_str)
-        date_input.send_keys(Keys.RETURN)  
-        current_date -= timedelta(days=1)
-        i = 1
-        scraped_data = []
-        while True:
+    table_css = "#questions table"
+
+    os.makedirs(pages_dir, exist_ok=True)
+    paths = []
+    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+    try:
+        driver.get(base_url)
+        wait = WebDriverWait(driver, timeout)
+        try:
+            wait.until(EC.element_to_be_clickable((By.XPATH, cokkies_xpath))).click()
+        except TimeoutException:
+            pass  # no cookie banner, e.g. on a saved page
+
+        table_text = lambda d: d.find_element(By.CSS_SELECTOR, table_css).text
+        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, table_css)))
+        current_date = start_date
+        while current_date >= end_date:
+            date_str = current_date.strftime("%Y-%m-%d")  # Format as YYYY-MM-DD
+            previous = table_text(driver)
+            date_input = wait.until(EC.presence_of_element_located((By.ID, "raportDate")))
+            date_input.clear()
+            date_input.send_keys(date_str)
+            date_input.send_keys(Keys.RETURN)
             try:
-                current_xpath = base_xpath.format(i)
+                wait.until(lambda d: table_text(d) != previous)
+            except TimeoutException:
+                # same prices as the previous day or nothing changed, keep the page
+                print(f"{date_str}: table did not change within {timeout}s")
 
-                element = driver.find_element(By.XPATH, current_xpath)
+            path = os.path.join(pages_dir, f"enea_{date_str}.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(driver.page_source)
+            paths.append(path)
+            current_date -= timedelta(days=1)
+    finally:
+        driver.quit()
+    return paths
 
-                scraped_data.append(element.text.replace(",","."))
-            except:
-                break
 
-            i += 1
+def write_results(results, output_folder=OUTPUT_DIR):
+    for date_str, scraped_data in results:
+        if not date_str or not scraped_data:
+            print(f"no prices for {date_str}")
+            continue
+        write_day(date_str, scraped_data, output_folder)
+        print(f"Saved: enea_{date_str}.csv")
 
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        output_folder = os.path.join(script_dir, "../data_months")
-        os.makedirs(output_folder, exist_ok=True)
-        csv_file_path = os.path.join(output_folder, f"enea_{date_str}.csv")
 
-        with open(csv_file_path, mode="w", newline="", encoding="utf-8") as file:
-            writer = csv.writer(file)
-            writer.writerow(["Data"])
-            for data in scraped_data:
-                for i  in range(4):
-                    writer.writerow([data])        
-        time.sleep(5) 
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape ENEA dynamic prices into day files.")
+    parser.add_argument("--mode", choices=("browser", "saved"), default="browser")
+    parser.add_argument("--start", default="2025-03-01")
+    parser.add_argument("--end", default="2024-08-23")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--base-url", default=url, help="e.g. a stand_in_servers.py pages instance")
+    parser.add_argument("--pages-dir", default="enea_pages")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    args = parser.parse_args()
 
-finally:
-    driver.quit()
+    if args.mode == "browser":
+        paths = save_pages_with_driver(datetime.strptime(args.start, "%Y-%m-%d"), datetime.strptime(args.end, "%Y-%m-%d"),
+                                       args.pages_dir, args.base_url)
+    else:
+        paths = sorted(glob.glob(os.path.join(args.pages_dir, "enea_*.html")))
+    write_results(parse_saved_pages(paths, args.workers), args.output_dir)
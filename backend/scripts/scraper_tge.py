@@ -1,64 +1,182 @@
-import os
-import time
+import argparse
 import csv
+import glob
+import os
 import re
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
 
-options = Options()
-options.add_argument("--disable-gpu")
-options.add_argument("--no-sandbox")
-
-driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+from backend.scripts.html_tables import find_table, leading_numbers, parse_page
+from backend.scripts.http_session import make_session
+from dataset import DATA_DIR, update_series
 
 url = "https://www.tge.pl/energia-elektryczna-rdn"
+TABLE_ID = "footable_kontrakty_godzinowe"
+OUTPUT_DIR = os.path.join(DATA_DIR, "tge")
 
-try:
-    driver.get(url)
-    time.sleep(3)  
+# Page retrieval (HTTP or browser) is separate from parsing: pages are parsed
+# in one pass with html_tables, so saved pages or a stand-in server
+# (stand_in_servers.py tge) can be processed without the network.
 
-    base_xpath = '//*[@id="footable_kontrakty_godzinowe"]/tbody/tr[{}]/td[2]'
-    button_xpath = '/html/body/section[3]/div/div/div[1]/a[1]'
-    date_xpath = "/html/body/section[4]/div/h4/small"
 
-    days = 90
-    for day in range(days):
-        i = 1
-        scraped_data = []
-        curr_date = driver.find_element(By.XPATH, date_xpath).text
-        date_match = re.search(r'\d{2}-\d{2}-\d{4}', curr_date)
+def parse_tge_page(html):
+    """Returns (delivery date "YYYY-MM-DD" or None, hourly prices in zł/kWh)."""
+    tables, texts = parse_page(html, text_tags=("small",))
+    formatted_date = None
+    for text in texts["small"]:
+        date_match = re.search(r'\d{2}-\d{2}-\d{4}', text)
         if date_match:
             day, month, year = date_match.group(0).split("-")
             formatted_date = f"{year}-{month}-{day}"  # Reverse format for proper sorting
+            break
+
+    table = find_table(tables, table_id=TABLE_ID)
+    prices = [price / 1000 for price in leading_numbers(table["rows"], 1)] if table else []
+    return formatted_date, prices
+
+
+def parse_tge_file(path):
+    with open(path, encoding="utf-8") as f:
+        return parse_tge_page(f.read())
+
+
+def page_url(date, base_url=url):
+    return f"{base_url}?dateShow={date:%d-%m-%Y}"
+
+
+def write_day(formatted_date, prices, output_dir=OUTPUT_DIR):
+    os.makedirs(output_dir, exist_ok=True)
+    csv_file_path = os.path.join(output_dir, f"{formatted_date}.csv")
+    with open(csv_file_path + ".tmp", mode="w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Data"])
+        for data in prices:
+            for _ in range(4):  # Repeat writing 4 times, one row per 15 min period
+                writer.writerow([data])
+    os.replace(csv_file_path + ".tmp", csv_file_path)
+    return csv_file_path
+
+
+def _fetch_and_parse(session, date, base_url, pages_dir, timeout):
+    response = session.get(page_url(date, base_url), timeout=timeout)
+    response.raise_for_status()
+    if pages_dir:
+        with open(os.path.join(pages_dir, f"tge_{date:%Y-%m-%d}.html"), "w", encoding="utf-8") as f:
+            f.write(response.text)
+    page_date, prices = parse_tge_page(response.text)
+    return page_date or f"{date:%Y-%m-%d}", prices
+
+
+def backfill(end_date, days=90, workers=8, base_url=url, output_dir=OUTPUT_DIR, pages_dir=None, timeout=30, to_store=False,
+             retries=4, backoff=0.5):
+    """
+    Fetches `days` pages up to end_date concurrently over one keep-alive
+    session, retrying with exponential backoff, and writes a day file for
+    every page that has a price table. A day that still fails is reported
+    and skipped, the others are written.
+    Returns {"written": {date: prices}, "failed": {date: error}}.
+    """
+    end = datetime.strptime(end_date, "%Y-%m-%d")
+    dates = [end - timedelta(days=i) for i in range(days)]
+    if pages_dir:
+        os.makedirs(pages_dir, exist_ok=True)
 
-        while True:
+    results, failed = [], {}
+    with make_session(workers, retries, backoff) as session, ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_fetch_and_parse, session, date, base_url, pages_dir, timeout): date for date in dates}
+        for future in as_completed(futures):
+            date_str = f"{futures[future]:%Y-%m-%d}"
             try:
-                current_xpath = base_xpath.format(i)
-                element = driver.find_element(By.XPATH, current_xpath)
-                scraped_data.append(float(element.text.replace(",", ".")) / 1000)
-            except:
-                break
-            i += 1
-
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        output_folder = os.path.join(script_dir, "../data_months/tge")
-        os.makedirs(output_folder, exist_ok=True)
-
-        csv_file_path = os.path.join(output_folder, f"tge_{formatted_date}.csv")  # Correct filename format
-
-        with open(csv_file_path, mode="w", newline="", encoding="utf-8") as file:
-            writer = csv.writer(file)
-            writer.writerow(["Data"])
-            for data in scraped_data:
-                for _ in range(4):  # Repeat writing 4 times as in the original code
-                    writer.writerow([data])
-
-        button = driver.find_element(By.XPATH, button_xpath)
-        button.click()
-        time.sleep(12)
-
-finally:
-    driver.quit()
+                results.append(future.result())
+            except Exception as e:
+                print(f"{date_str} — error: {e}")
+                failed[date_str] = str(e)
+    results.sort(key=lambda result: result[0], reverse=True)
+    written = _write_results(results, output_dir, to_store)
+    print(f"written {len(written)}, failed {len(failed)}")
+    return {"written": written, "failed": failed}
+
+
+def parse_saved_pages(paths, workers=None):
+    """Parses saved pages in parallel processes, returns [(date, prices)]."""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(parse_tge_file, paths, chunksize=8))
+
+
+def _write_results(results, output_dir, to_store=False):
+    written = {}
+    for formatted_date, prices in results:
+        if not formatted_date or not prices:
+            print(f"no prices for {formatted_date}")
+            continue
+        write_day(formatted_date, prices, output_dir)
+        written[formatted_date] = [p for p in prices for _ in range(4)]
+        print(f"Saved: {formatted_date}.csv")
+    if to_store:
+        update_series("tge", written)
+    return written
+
+
+def save_pages_with_driver(days=90, pages_dir="tge_pages", base_url=url, timeout=30):
+    """
+    Browser retrieval: walks back day by day with the "previous day" button,
+    waiting for the shown date to change instead of sleeping, and saves every
+    page for parse_saved_pages. Returns the saved paths.
+    """
+    from selenium import webdriver
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    options = Options()
+    # options.add_argument("--headless")  # Run in headless mode
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+
+    button_xpath = '/html/body/section[3]/div/div/div[1]/a[1]'
+    date_xpath = "/html/body/section[4]/div/h4/small"
+
+    os.makedirs(pages_dir, exist_ok=True)
+    paths = []
+    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+    try:
+        driver.get(base_url)
+        wait = WebDriverWait(driver, timeout)
+        for day in range(days):
+            wait.until(EC.presence_of_element_located((By.ID, TABLE_ID)))
+            curr_date = driver.find_element(By.XPATH, date_xpath).text
+            path = os.path.join(pages_dir, f"tge_{day:03d}.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(driver.page_source)
+            paths.append(path)
+
+            driver.find_element(By.XPATH, button_xpath).click()
+            wait.until(lambda d: d.find_element(By.XPATH, date_xpath).text != curr_date)
+    finally:
+        driver.quit()
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape TGE RDN hourly prices into day files.")
+    parser.add_argument("--mode", choices=("http", "browser", "saved"), default="http")
+    parser.add_argument("--end", default=datetime.now().strftime("%Y-%m-%d"))
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--base-url", default=url, help="e.g. a stand_in_servers.py tge instance")
+    parser.add_argument("--pages-dir", default=None, help="where pages are saved to / read from")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--store", action="store_true", help="also update the consolidated store")
+    args = parser.parse_args()
+
+    if args.mode == "http":
+        backfill(args.end, args.days, args.workers, args.base_url, args.output_dir, args.pages_dir, to_store=args.store)
+    else:
+        if args.mode == "browser":
+            paths = save_pages_with_driver(args.days, args.pages_dir or "tge_pages", args.base_url)
+        else:
+            paths = sorted(glob.glob(os.path.join(args.pages_dir, "*.html")))
+        _write_results(parse_saved_pages(paths, args.workers), args.output_dir, args.store)
@@ -0,0 +1,236 @@
+import functools
+import json
+import math
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+# Local stand-ins for the external services the scrapers talk to, so that
+# backfills can be run and checked offline:
+#   python stand_in_servers.py pse   -> http://127.0.0.1:8765/api
+#   python stand_in_servers.py tge   -> http://127.0.0.1:8765/energia-elektryczna-rdn
+#   python stand_in_servers.py pvgis -> http://127.0.0.1:8765/api/
+
+
+def _start(handler, port=0):
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def pse_flags(date_str):
+    """Deterministic "znacznik" (0-3) for every hour of a day."""
+    seed = int(date_str.replace("-", ""))
+    return [(seed + 7 * hour + hour * hour) % 4 for hour in range(24)]
+
+
+def serve_pse(port=0, fail_first=0, missing_dates=()):
+    """
+    Serves /api/pdgsz like api.raporty.pse.pl for the kompas energetyczny
+    scraper. The first `fail_first` requests get a 503 (to exercise retries),
+    `missing_dates` answer with an empty "value" list.
+    Returns (server, base_url); stop it with server.shutdown().
+    """
+    state = {"failures_left": fail_first, "requests": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with lock:
+                state["requests"] += 1
+                fail = state["failures_left"] > 0
+                if fail:
+                    state["failures_left"] -= 1
+            if fail:
+                self.send_response(503)
+                self.end_headers()
+                return
+
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            match = re.search(r"udtczas ge '(\d{4}-\d{2}-\d{2})'", unquote(query.get("$filter", [""])[0]))
+            if url.path != "/api/pdgsz" or not match:
+                self.send_response(404)
+                self.end_headers()
+                return
+
+            date_str = match.group(1)
+            values = []
+            if date_str not in missing_dates:
+                day = datetime.strptime(date_str, "%Y-%m-%d")
+                values = [
+                    {"udtczas": (day + timedelta(hours=hour)).strftime("%Y-%m-%d %H:%M:%S"), "znacznik": flag}
+                    for hour, flag in enumerate(pse_flags(date_str))
+                ]
+            body = json.dumps({"value": values}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server, base_url = _start(Handler, port)
+    server.stats = state
+    return server, base_url + "/api"
+
+
+def tge_prices(date_str):
+    """Deterministic hourly prices (zł/MWh) with a morning and evening peak."""
+    seed = int(date_str.replace("-", "")) % 97
+    return [round(300 + 4 * seed + 150 * ((8 <= h <= 10) + 2 * (18 <= h <= 21)) - 80 * (11 <= h <= 15), 2) for h in range(24)]
+
+
+def render_tge_page(date_str, prices=None):
+    """Minimal page with the same structure the TGE parser reads."""
+    prices = tge_prices(date_str) if prices is None else prices
+    day = datetime.strptime(date_str, "%Y-%m-%d")
+    rows = "".join(
+        f"<tr><td>{h:02d}-{h + 1:02d}</td><td>{str(p).replace('.', ',')}</td><td>1 234,5</td></tr>"
+        for h, p in enumerate(prices)
+    )
+    return (
+        "<html><body><section></section><section></section><section><div><div><div>"
+        "<a href='#'>poprzedni</a></div></div></div></section>"
+        f"<section><div><h4>Kontrakty godzinowe <small>dla dostawy w dniu {day:%d-%m-%Y}</small></h4></div></section>"
+        f"<table id='footable_kontrakty_godzinowe'><thead><tr><th>Godzina</th><th>Kurs</th><th>Wolumen</th></tr></thead>"
+        f"<tbody>{rows}<tr><td>Suma</td><td>-</td><td>-</td></tr></tbody></table></body></html>"
+    )
+
+
+def serve_tge(port=0, pages_dir=None):
+    """
+    Serves /energia-elektryczna-rdn?dateShow=DD-MM-YYYY. Saved pages
+    (pages_dir/tge_YYYY-MM-DD.html) are replayed, other dates are rendered.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            shown = parse_qs(url.query).get("dateShow", [datetime.now().strftime("%d-%m-%Y")])[0]
+            if url.path != "/energia-elektryczna-rdn":
+                self.send_response(404)
+                self.end_headers()
+                return
+            date_str = datetime.strptime(shown, "%d-%m-%Y").strftime("%Y-%m-%d")
+            saved = os.path.join(pages_dir, f"tge_{date_str}.html") if pages_dir else None
+            if saved and os.path.exists(saved):
+                with open(saved, encoding="utf-8") as f:
+                    html = f.read()
+            else:
+                html = render_tge_page(date_str)
+            body = html.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server, base_url = _start(Handler, port)
+    return server, base_url + "/energia-elektryczna-rdn"
+
+
+def serve_pages(directory, port=0):
+    """Static server for saved pages, e.g. ENEA pages for the browser scraper."""
+    class Handler(SimpleHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    return _start(functools.partial(Handler, directory=directory), port)
+
+
+def pvgis_hourly(latitude, longitude, year):
+    """Hourly components in the PVGIS seriescalc format from a rough sun position model."""
+    records = []
+    current = datetime(year, 1, 1)
+    while current.year == year:
+        doy = current.timetuple().tm_yday
+        declination = math.radians(23.44) * math.sin(2 * math.pi * (284 + doy) / 365)
+        hour_angle = math.radians(15 * (current.hour + 0.5 + longitude / 15 - 12))
+        lat = math.radians(latitude)
+        sin_el = math.sin(lat) * math.sin(declination) + math.cos(lat) * math.cos(declination) * math.cos(hour_angle)
+        sun = max(0.0, sin_el)
+        records.append({
+            "time": current.strftime("%Y%m%d:%H10"),
+            "Gb(i)": round(750 * sun ** 1.2, 2),
+            "Gd(i)": round(120 * sun, 2),
+            "Gr(i)": round(8 * sun, 2),
+            "H_sun": round(math.degrees(math.asin(max(-1.0, min(1.0, sin_el)))), 2),
+            "T2m": round(8 + 10 * math.sin(2 * math.pi * (doy - 110) / 365) + 4 * sun, 2),
+            "WS10m": 3.0,
+            "Int": 0,
+        })
+        current += timedelta(hours=1)
+    return records
+
+
+def serve_pvgis(port=0):
+    """
+    Serves /api/seriescalc (outputformat=json) like the PVGIS API, so the
+    irradiance cache in solar/get_weather_data.py can be filled offline.
+    server.stats counts the requests.
+    """
+    state = {"requests": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            if url.path != "/api/seriescalc":
+                self.send_response(404)
+                self.end_headers()
+                return
+            state["requests"] += 1
+            latitude, longitude = float(query["lat"]), float(query["lon"])
+            hourly = []
+            for year in range(int(query["startyear"]), int(query["endyear"]) + 1):
+                hourly.extend(pvgis_hourly(latitude, longitude, year))
+            body = json.dumps({
+                "inputs": {
+                    "location": {"latitude": latitude, "longitude": longitude, "elevation": 100.0},
+                    "meteo_data": {"radiation_db": query.get("raddatabase", "PVGIS-SARAH3")},
+                    "mounting_system": {"fixed": {"slope": {"value": float(query.get("angle", 0))},
+                                                  "azimuth": {"value": float(query.get("aspect", 0))}}},
+                },
+                "outputs": {"hourly": hourly},
+                "meta": {"inputs": {}, "outputs": {}},
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server, base_url = _start(Handler, port)
+    server.stats = state
+    return server, base_url + "/api/"
+
+
+SERVERS = {
+    "pse": serve_pse,
+    "tge": serve_tge,
+    "pvgis": serve_pvgis,
+}
+
+
+if __name__ == "__main__":
+    import sys
+
+    name = sys.argv[1] if len(sys.argv) > 1 else "pse"
+    server, url = SERVERS[name](port=8765)
+    print(f"{name} stand-in at {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
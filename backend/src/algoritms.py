@@ -1,13 +1,22 @@
 import heapq
 from battery_handler.battery_handler import Battery
 from backend.const import SIZE
-from linear import optimise_battery
+from linear import optimise_battery_arrays, optimise_battery_batch, CHAIN, DP, HIGHS
 import numpy as np
 
 def load_only_to_sell(battery_load: np.ndarray,
                       buy_prices: np.ndarray,
                       sell_prices: np.ndarray,
                       battery: Battery):
+    """
+    Greedy arbitrage on the capacity the schedule leaves free: buy at the
+    cheapest slot since the last trade, sell at a slot close to the future
+    peak, as much as the free capacity between the two allows.
+
+    A trade always ends the window, so trade windows never overlap and the
+    windows' left edge only moves right: the free capacity minimum of the
+    window comes from a heap with lazy deletion, O(n log n) overall.
+    """
     SIZE = len(buy_prices)
     free_capacity = np.full(SIZE, battery.capacity) - battery_load
     battery_usage_cost = battery.one_kwh_cost()
@@ -16,14 +25,13 @@ def load_only_to_sell(battery_load: np.ndarray,
     sell_time = np.zeros(SIZE, dtype=float)
 
     # 1) Build array of future peaks in one pass
-    future_max = np.empty(SIZE, dtype=float)
-    max_so_far = -np.inf
-    for i in range(SIZE - 1, -1, -1):
-        max_so_far = max(max_so_far, sell_prices[i])
-        future_max[i] = max_so_far
+    future_max = np.maximum.accumulate(sell_prices[::-1])[::-1]
 
+    # (free capacity, slot) of the slots seen so far, entries left of buy_idx are stale
+    window = []
     buy_idx = None
     for i in range(SIZE - 1):
+        heapq.heappush(window, (free_capacity[i], i))
         eff_buy = buy_prices[i] + battery_usage_cost
 
         # pick lowest effective buy index so far
@@ -34,8 +42,10 @@ def load_only_to_sell(battery_load: np.ndarray,
         if (sell_prices[i] >= 0.95 * future_max[i] and
             sell_prices[i] > buy_prices[buy_idx] + battery_usage_cost):
 
-            # clamp by true current free capacity
-            avail = free_capacity[buy_idx:i+1].min()
+            # clamp by true current free capacity of buy_idx..i
+            while window[0][1] < buy_idx:
+                heapq.heappop(window)
+            avail = window[0][0]
             if avail <= 0:
                 # nothing left to sell from that buy slot
                 buy_idx += 1
@@ -45,28 +55,67 @@ def load_only_to_sell(battery_load: np.ndarray,
             buy_time[buy_idx]  += avail
             sell_time[i]       += avail
 
-            # immediately reduce free capacity so we can't oversell later
-            free_capacity[buy_idx:i+1] -= avail
-
-            # advance buy_idx so we don’t reuse an exhausted slot
+            # the next window starts after i, so the used capacity never has to be subtracted
+            window.clear()
             buy_idx = None
 
     return buy_time, sell_time
 
 
+def load_only_to_sell_batch(battery_load: np.ndarray,
+                            buy_prices: np.ndarray,
+                            sell_prices: np.ndarray,
+                            battery: Battery):
+    """load_only_to_sell for (days, 96) arrays, the scan is vectorised over days."""
+    days_count, size = buy_prices.shape
+    free_capacity = battery.capacity - battery_load
+    battery_usage_cost = battery.one_kwh_cost()
+
+    buy_time  = np.zeros((days_count, size), dtype=float)
+    sell_time = np.zeros((days_count, size), dtype=float)
+    future_max = np.maximum.accumulate(sell_prices[:, ::-1], axis=1)[:, ::-1]
+
+    days = np.arange(days_count)
+    slots = np.arange(size)
+    buy_idx = np.full(days_count, -1)       # -1 = no buy slot yet
+    for i in range(size - 1):
+        eff_buy = buy_prices[:, i] + battery_usage_cost
+        current = np.where(buy_idx >= 0, buy_prices[days, buy_idx] + battery_usage_cost, np.inf)
+        buy_idx = np.where((buy_idx < 0) | (eff_buy < current), i, buy_idx)
+
+        selling = (sell_prices[:, i] >= 0.95 * future_max[:, i]) & \
+                  (sell_prices[:, i] > buy_prices[days, buy_idx] + battery_usage_cost)
+        if not selling.any():
+            continue
+
+        in_window = (slots >= buy_idx[:, None]) & (slots <= i)
+        avail = np.where(in_window, free_capacity, np.inf).min(axis=1)
+        trade = selling & (avail > 0)
+
+        buy_time[days[trade], buy_idx[trade]] += avail[trade]
+        sell_time[trade, i] += avail[trade]
+        buy_idx = np.where(selling & ~trade, buy_idx + 1, np.where(trade, -1, buy_idx))
+
+    return buy_time, sell_time
+
+
 def best_algos_ever(buy_prices: np.ndarray,
                     sell_prices: np.ndarray,
                     usages: np.ndarray,
                     battery: Battery,
                     solar_free: np.ndarray,
-                    load_to_sell: bool = False):
+                    load_to_sell: bool = False,
+                    solver: str = CHAIN,
+                    time_limit: float = None,
+                    mip_gap: float = None):
     assert SIZE == usages.shape[0], "prices and usages must have 96 elements"
     
     battery_cost_per_kwh = battery.one_kwh_cost()
     loading_per_segment = battery.charging_per_segment()
     battery_cap = battery.capacity
     
-    sched, cost = optimise_battery(buy_prices, usages, C = battery_cap, c_batt=battery_cost_per_kwh, P_ch = loading_per_segment, P_dis=loading_per_segment)
+    sched, cost = optimise_battery_arrays(buy_prices, usages, C = battery_cap, c_batt=battery_cost_per_kwh, P_ch = loading_per_segment, P_dis=loading_per_segment, solver=solver,
+                                          time_limit=time_limit, mip_gap=mip_gap)
     # print(sched)
     battery_load_time, battery_use_time, grid_time  = sched["charge"], sched["discharge"], sched["grid_buy"]
     final_cum_use = np.cumsum(battery_load_time) - np.cumsum(battery_use_time)
@@ -81,3 +130,123 @@ def best_algos_ever(buy_prices: np.ndarray,
 
     return battery_load_time, grid_time, buy_time, sell_time
 
+
+
+def best_algos_ever_batch(buy_prices: np.ndarray,
+                          sell_prices: np.ndarray,
+                          usages: np.ndarray,
+                          battery: Battery,
+                          solar_free: np.ndarray = None,
+                          load_to_sell: bool = False,
+                          solver: str = CHAIN,
+                          time_limit: float = None,
+                          mip_gap: float = None):
+    """
+    best_algos_ever for (days, 96) price and usage matrices, all returned
+    schedules are (days, 96). solver="dp" is vectorised over the days but
+    approximate, see dp_dispatch.
+    """
+    assert usages.ndim == 2 and SIZE == usages.shape[1], "prices and usages must be (days, 96)"
+
+    battery_cost_per_kwh = battery.one_kwh_cost()
+    loading_per_segment = battery.charging_per_segment()
+    battery_cap = battery.capacity
+
+    sched, cost = optimise_battery_batch(buy_prices, usages, C = battery_cap, c_batt=battery_cost_per_kwh, P_ch = loading_per_segment, P_dis=loading_per_segment, solver=solver,
+                                         time_limit=time_limit, mip_gap=mip_gap)
+    battery_load_time, battery_use_time, grid_time = sched["charge"], sched["discharge"], sched["grid_buy"]
+
+    if load_to_sell:
+        final_cum_use = np.cumsum(battery_load_time, axis=1) - np.cumsum(battery_use_time, axis=1)
+        buy_time, sell_time = load_only_to_sell_batch(final_cum_use, buy_prices, sell_prices, battery)
+    else:
+        buy_time = np.zeros_like(usages, dtype=float)
+        sell_time = np.zeros_like(usages, dtype=float)
+
+    return battery_load_time, grid_time, buy_time, sell_time
+
+
+def schedule_cost(buy_prices: np.ndarray, charge: np.ndarray, grid: np.ndarray, battery_cost_per_kwh: float) -> float:
+    """Objective of the optimisers for a schedule: every imported kWh plus the battery wear."""
+    return float((buy_prices * (grid + charge) + battery_cost_per_kwh * charge).sum())
+
+
+def best_algos_rolling(buy_prices: np.ndarray,
+                       sell_prices: np.ndarray,
+                       usages: np.ndarray,
+                       battery: Battery,
+                       load_to_sell: bool = False,
+                       solver: str = HIGHS,
+                       horizon_days: int = 2,
+                       time_limit: float = None,
+                       mip_gap: float = None):
+    """
+    Rolling-horizon backtest over (days, 96) matrices: every day is planned
+    in a window of horizon_days days (48 h by default) that starts at the
+    SOC carried over from the previous day and ends empty, only the first
+    day of the plan is committed.
+
+    A window solved to optimality costs at most the previous plan's
+    remaining days followed by the standalone per-day plans of the new days
+    (that plan is feasible for it), up to the MIP gap. Only when the window
+    is answered otherwise (a chain fallback) is that plan built, from
+    per-day solves of the new days, and taken when it is cheaper. The
+    committed costs then telescope to at most the per-day loop's total
+    (same engine, optimiser objective). This is an incumbent comparison
+    after the solve, the carried-over plan is never handed to the solver
+    as an initial solution: every window is solved from scratch.
+
+    Returns the four (days, 96) schedules of best_algos_ever_batch and the
+    (days,) SOC at the start of every day.
+    """
+    assert usages.ndim == 2 and SIZE == usages.shape[1], "prices and usages must be (days, 96)"
+    days_count = usages.shape[0]
+    battery_cost_per_kwh = battery.one_kwh_cost()
+    loading_per_segment = battery.charging_per_segment()
+    params = dict(C=battery.capacity, c_batt=battery_cost_per_kwh, P_ch=loading_per_segment, P_dis=loading_per_segment,
+                  time_limit=time_limit, mip_gap=mip_gap)
+
+    # standalone plans, empty to empty, only needed for windows not solved exactly:
+    # dp (never exact) plans all days in one vectorised call, other engines per day on demand
+    daily = {}
+    if solver == DP:
+        plans, _ = optimise_battery_batch(buy_prices, usages, solver=DP, **params)
+        daily = {d: {name: arr[d] for name, arr in plans.items()} for d in range(days_count)}
+
+    battery_load_time = np.zeros((days_count, SIZE))
+    battery_use_time = np.zeros((days_count, SIZE))
+    grid_time = np.zeros((days_count, SIZE))
+    soc_start = np.zeros(days_count)
+
+    soc = 0.0
+    tail = {"charge": np.empty(0), "discharge": np.empty(0), "grid_buy": np.empty(0), "soc": np.empty(0)}
+    for day in range(days_count):
+        end = min(days_count, day + horizon_days)
+        prices = buy_prices[day:end].ravel()
+        demand = usages[day:end].ravel()
+        window, cost, info = optimise_battery_arrays(prices, demand, SOC0=soc, SOC_end=0.0, solver=solver, with_info=True, **params)
+
+        if info["status"] != "optimal":
+            new_days = range(day + len(tail["charge"]) // SIZE, end)
+            for d in new_days:
+                if d not in daily:
+                    daily[d] = optimise_battery_arrays(buy_prices[d], usages[d], solver=solver, **params)[0]
+            fallback = {name: np.concatenate([tail[name], *(daily[d][name] for d in new_days)]) for name in tail}
+            if schedule_cost(prices, fallback["charge"], fallback["grid_buy"], battery_cost_per_kwh) < cost:
+                window = fallback
+
+        soc_start[day] = soc
+        battery_load_time[day] = window["charge"][:SIZE]
+        battery_use_time[day] = window["discharge"][:SIZE]
+        grid_time[day] = window["grid_buy"][:SIZE]
+        soc = float(window["soc"][SIZE - 1])
+        tail = {name: arr[SIZE:] for name, arr in window.items()}
+
+    if load_to_sell:
+        final_cum_use = soc_start[:, None] + np.cumsum(battery_load_time, axis=1) - np.cumsum(battery_use_time, axis=1)
+        buy_time, sell_time = load_only_to_sell_batch(final_cum_use, buy_prices, sell_prices, battery)
+    else:
+        buy_time = np.zeros_like(usages, dtype=float)
+        sell_time = np.zeros_like(usages, dtype=float)
+
+    return battery_load_time, grid_time, buy_time, sell_time, soc_start
@@ -1,11 +1,17 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
+import threading
 import pandas as pd
 # from solar.solar_cell import SolarPanel
-from calculator import simulate, run_best_algos_one_day, calculate_one_day, total_profit
+from calculator import simulate, run_best_algos_one_day, calculate_one_day
 from backend.const import BATTERIES
-import numpy as np
+from dataset import load_store, read_day
+from day_cache import DAY_CACHE
+from schedule_cache import SCHEDULE_CACHE
+from linear import SOLVE_LOG, telemetry_summary
+from results_store import RESULTS, SERVED_SCENARIOS
+from backend.scripts.making_data_script import usage_for_dates
 from battery_handler.generate_bat_params import make_battery
 
 app = FastAPI()
@@ -33,11 +39,13 @@ class LoadingRequest(BaseModel):
     load_to_sell: bool = True
     start_date: str
     end_date: str
+    daily_usage: float = 7.5
 
 class DateRequest(BaseModel):
     provider: str = "enea"
     load_to_sell: bool = True
     date: str
+    daily_usage: float = 7.5
 
 class CSVFileNameRequest(BaseModel):
     date: str
@@ -58,27 +66,14 @@ def api_call(request: EnergyRequest):
     
 @app.post("/api/process-csv")
 def process_csv(request: CSVFileNameRequest):
-    dynamic_prices_path =  "../data_months/tge/" + request.date + ".csv"
-    static_prices_path = "../data_months/rce/" + request.date + ".csv"
-
     try:
-        dynamic_prices = pd.read_csv(dynamic_prices_path)
-        static_prices = pd.read_csv(static_prices_path)
-
-        # Ensure the CSV contains the required 'Data' column
-        if 'Data' not in dynamic_prices.columns:
-            raise HTTPException(status_code=400, detail="'Data' column missing in dynamic prices CSV")
-        if 'Data' not in static_prices.columns:
-            raise HTTPException(status_code=400, detail="'Data' column missing in static prices CSV")
-
-        # Convert the 'Data' column to a list for processing
-        dynamic_list = dynamic_prices['Data'].tolist()
-        static_list = static_prices['Data'].tolist()
+        dynamic_prices = read_day("tge", request.date)
+        static_prices = read_day("rce", request.date)
 
         # Process the data as needed (for demonstration, just return it)
         return {
-            "dynamic": dynamic_list,
-            "static": static_list,
+            "dynamic": dynamic_prices.tolist(),
+            "static": static_prices.tolist(),
         }
     
     except FileNotFoundError:
@@ -88,22 +83,15 @@ def process_csv(request: CSVFileNameRequest):
 
 @app.post("/api/grid_time-battery_time")
 def process_csv(request: DateRequest):
-    f_price =  "../data_months/tge/" + request.date + ".csv"
-    f_usage =  "../data_months/usage/" + request.date + ".csv"
-    f_rce =  "../data_months/rce/" + request.date + ".csv"
-    f_solar =  "../data_months/solar_output/" + request.date + ".csv"
-
-
-    prices = np.array((pd.read_csv(f_price).values).flatten())
-
-    # usage already in kWh
-    usage = np.array((pd.read_csv(f_usage).values).flatten())
-    sell_prices = np.array((pd.read_csv(f_rce).values).flatten())
-    solar_free = np.array((pd.read_csv(f_solar).values).flatten())
+    # Read the day from the dataset
+    try:
+        prices = read_day("tge", request.date)
 
+        # usage already in kWh
+        usage = usage_for_dates([request.date], request.daily_usage)[0]
+        sell_prices = read_day("rce", request.date)
+        solar_free = read_day("solar_output", request.date)
 
-    # Read the CSV file
-    try:
         # for b in BATTERIES:
         # load_to_use - (96 array) when and how much loading only to use later
         # grid_time - (96 array) when and how much we use energy directly from grid - only usage
@@ -147,20 +135,17 @@ def process_csv(request: DateRequest):
 def benchmark_algos_cost(request: LoadingRequest):
     res_algos_list = []
     res_benchmark_list = []
-    for single_date in pd.date_range(request.start_date, request.end_date, freq='D'):
+    store = load_store()
+    dates = pd.date_range(request.start_date, request.end_date, freq='D')
+    # one generate_usage_matrix call for the whole range instead of one per day
+    usages = usage_for_dates(dates, request.daily_usage)
+    for single_date, usage in zip(dates, usages):
         
-        f_price =  "../data_months/tge/" + str(single_date.date()) + ".csv"
-        f_usage =  "../data_months/usage/" + str(single_date.date()) + ".csv"
-        f_rce =  "../data_months/rce/" + str(single_date.date()) + ".csv"
-        f_solar =  "../data_months/solar_output/" + str(single_date.date()) + ".csv"
-        print(f_solar)
-
-        print(f_usage)
-        # Read the CSV file
+        date = str(single_date.date())
         try:
             # for b in BATTERIES:
-            res_algos, res_benchmark, _, _ = calculate_one_day(f_price, f_usage, f_rce, f_solar, battery=BATTERIES[2], load_to_sell=request.load_to_sell,
-                                                               provider=request.provider,tariff="G13",starting_tariff="G11")
+            res_algos, res_benchmark, _, _ = calculate_one_day(date, usage, battery=BATTERIES[2], load_to_sell=request.load_to_sell,
+                                                               provider=request.provider,tariff="G13",starting_tariff="G11", store=store)
             
             # TODO
             # if res_algos is negative it means that we acutally could earn money, not only save money,
@@ -180,31 +165,41 @@ def benchmark_algos_cost(request: LoadingRequest):
     }
 
 
+@app.get("/api/cache_stats")
+def cache_stats():
+    return {"days": DAY_CACHE.stats(), "schedules": SCHEDULE_CACHE.stats()}
+
+
+@app.get("/api/solver_stats")
+def solver_stats(last: int = 20):
+    return {"engines": telemetry_summary(), "last": list(SOLVE_LOG)[-last:] if last > 0 else []}
+
+
 class CapacityRequest(BaseModel):
     daily_usage: float
 
+@app.on_event("startup")
+def refresh_results():
+    # fill the results store in the background (about a minute when empty),
+    # until then a request computes and stores its own scenario
+    threading.Thread(target=RESULTS.refresh, daemon=True).start()
+
+
 @app.post("/api/estimate_savings")
 def estimate_savings(req: CapacityRequest):
 
-    profit, months_of_history = total_profit(
-        battery=BATTERIES[2],
-        load_to_sell=True,
-        provider="pge",
-        switching_from_static=False,
-        solar_avaialable=False,
-        daily_usage=req.daily_usage,
-        tariff="G13",
-        staying_static=False,
-        starting_tariff="G11",
-    )
+    # stored totals of the exact scenario; a daily_usage not asked for before is optimised once and stored
+    battery_index, scenario = SERVED_SCENARIOS["estimate_savings"]
+    battery = BATTERIES[battery_index]
+    summary = RESULTS.summary(battery, update=False, touch=True, daily_usage=req.daily_usage, **scenario)
+    if summary is None:
+        summary = RESULTS.summary(battery, touch=True, daily_usage=req.daily_usage, **scenario)
 
-    if months_of_history == 0:
+    if summary is None:
         raise HTTPException(500, "No historical data")
 
-    avg_profit_month = profit / months_of_history
-
     return {
-        "annual_savings": round(avg_profit_month * 12, 0),   # PLN / year
+        "annual_savings": round(summary["monthly_profit"] * 12, 0),   # PLN / year
     }
 
 # Run with: uvicorn api:app --reload
@@ -1,5 +1,6 @@
 from math import ceil
 from battery_handler.battery_handler import Battery
+from battery_handler.consts import DEFAULT_AMPERAGE, DEFAULT_VOLTAGE
 
 # --- PLN-based coefficients ---
 FIXED_COST_PLN         = 1_260          # zł  (inverter, BMS, install)
@@ -8,7 +9,7 @@ DOD_BASE               = 0.93
 EFF_BASE               = 0.96
 CYCLES_BASE            = 6_000
 
-def make_battery(capacity_kwh: float) -> Battery:
+def make_battery(capacity_kwh: float, socket_amperage: float = DEFAULT_AMPERAGE, socket_voltage: float = DEFAULT_VOLTAGE) -> Battery:
     price = FIXED_COST_PLN + VARIABLE_COST_PLN_PKWH * capacity_kwh
     dod   = DOD_BASE + (0.02 if capacity_kwh < 3 else 0)
     eff   = EFF_BASE - 0.005 * max(0, capacity_kwh - 8) / 8
@@ -21,4 +22,6 @@ def make_battery(capacity_kwh: float) -> Battery:
         efficiency=round(eff, 3),
         life_cycles=cycles,
         is_grant_reduction=True,
+        socket_amperage=socket_amperage,
+        socket_voltage=socket_voltage,
     )
\ No newline at end of file
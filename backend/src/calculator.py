@@ -1,19 +1,22 @@
-import pandas as pd
+import functools
+import logging
+from concurrent.futures import ProcessPoolExecutor
 from battery_handler.battery_handler import Battery
-from algoritms import best_algos_ever
-import glob
+from algoritms import best_algos_ever, best_algos_ever_batch, best_algos_rolling
+from linear import CHAIN, solve_label
 import numpy as np
 import matplotlib.pyplot as plt
 from numpy.typing import NDArray  # Available in NumPy 1.20 and later
-from backend.scripts.making_data_script import generate_energy_usage_days
+from backend.scripts.making_data_script import usage_for_dates
 from backend.const import TOL, SIZE, BATTERIES, WITHDRAWABLE_RATE
-from providers import calculate_enea_prices, calculate_energa_prices, calculate_pge_prices, calculate_tauron_prices
-import os
-import datetime
+from providers import price_providers
+from dataset import load_range, load_store, to_day
 
 
 ARR = NDArray[np.float64]
 
+logger = logging.getLogger(__name__)
+
 
 def is_overloaded(
     battery_loading: ARR,
@@ -22,14 +25,15 @@ def is_overloaded(
     buy: ARR,
     sell: ARR,
     total_capacity: float,
-    tol: float = 1e-5  # Default tolerance
+    tol: float = 1e-5,  # Default tolerance
+    soc_start: float = 0.0
 ) -> bool:
     arrays = [battery_loading, usage, grid_loading, buy, sell]
     if not all(arr.shape == battery_loading.shape for arr in arrays):
         raise ValueError("All input arrays must have the same shape")
 
     net_change = battery_loading - usage + grid_loading + buy - sell
-    battery_levels = np.cumsum(net_change)
+    battery_levels = soc_start + np.cumsum(net_change)
     return bool(np.any(battery_levels > total_capacity + tol))
 
 # benchmark accepts two lists, each list contains pairs - (index of 15min period in 24h - starting from 00:00, ending 23:45 -> 96 indices posibles):
@@ -42,6 +46,81 @@ def is_loadable(battery_loading:ARR, buy:ARR, total_capacity:float, tol = TOL):
     return np.all(sum_load <= total_capacity + tol)
     
 
+VALIDATION_LEVELS = ("full", "sampled", "off")
+VIOLATIONS = ("unmet", "overfilled", "overloaded", "not_loadable")
+
+def settle(
+    battery_loading: ARR,
+    grid_loading: ARR,
+    buy: ARR,
+    sell: ARR,
+    buy_prices: ARR,
+    sell_prices: ARR,
+    base_prices: ARR,
+    usage: ARR,
+    battery: Battery,
+    tol: float = TOL,
+    soc_start=0.0,
+    soc_end=0.0,
+    validation: str = "full",
+    sample_days: int = 16,
+    seed: int = 0,
+):
+    """
+    benchmark for (days, 96) schedules in one pass: the cost, the energy
+    bought and sold at base_prices/sell_prices and benchmark's checks for
+    every day. soc_start/soc_end are scalars or (days,).
+
+    validation "full" checks every day, "sampled" sample_days random days,
+    "off" none. Nothing is raised; violations maps each of VIOLATIONS to a
+    (days,) mask, plus "checked", the days that were validated.
+    Returns (cost, bought, sold, violations), the first three (days,).
+    """
+    battery_loading, grid_loading, buy, sell, buy_prices, sell_prices, base_prices, usage = (
+        np.atleast_2d(np.asarray(arr, dtype=np.float64))
+        for arr in (battery_loading, grid_loading, buy, sell, buy_prices, sell_prices, base_prices, usage))
+    days = len(grid_loading)
+
+    cost = (grid_loading * buy_prices).sum(axis=1)
+    cost += (battery_loading * buy_prices).sum(axis=1)
+    cost += (buy * buy_prices).sum(axis=1)
+    bought = (grid_loading * base_prices).sum(axis=1) + (buy * base_prices).sum(axis=1) + (battery_loading * base_prices).sum(axis=1)
+    sold = (sell * sell_prices).sum(axis=1)
+
+    if validation not in VALIDATION_LEVELS:
+        raise ValueError(f"Unknown validation level {validation}")
+    checked = np.zeros(days, dtype=bool)
+    if validation == "full":
+        checked[:] = True
+    elif validation == "sampled":
+        checked[np.random.default_rng(seed).choice(days, min(sample_days, days), replace=False)] = True
+    violations = {name: np.zeros(days, dtype=bool) for name in VIOLATIONS}
+    violations["checked"] = checked
+
+    rows = np.flatnonzero(checked)
+    if len(rows):
+        start = np.broadcast_to(np.asarray(soc_start, dtype=np.float64), (days,))[rows]
+        end = np.broadcast_to(np.asarray(soc_end, dtype=np.float64), (days,))[rows]
+        loading, grid, bought_extra, sold_extra, need = battery_loading[rows], grid_loading[rows], buy[rows], sell[rows], usage[rows]
+        energy_provided = loading.sum(axis=1) + grid.sum(axis=1) + start - end
+        total = need.sum(axis=1)
+        violations["unmet"][rows] = total - energy_provided > tol
+        violations["overfilled"][rows] = energy_provided - total > tol
+        # is_overloaded and is_loadable for all rows, same tolerances
+        levels = start[:, None] + np.cumsum(loading - need + grid + bought_extra - sold_extra, axis=1)
+        violations["overloaded"][rows] = (levels > battery.capacity + 1e-5).any(axis=1)
+        violations["not_loadable"][rows] = ~(loading + bought_extra <= battery.capacity + tol).all(axis=1)
+    return cost, bought, sold, violations
+
+def violated_days(violations, dates=None) -> dict:
+    """{violation: [days]} of the non-empty masks, days as dates when given."""
+    report = {}
+    for name in VIOLATIONS:
+        days = np.flatnonzero(violations[name])
+        if len(days):
+            report[name] = [dates[i] for i in days] if dates is not None else days.tolist()
+    return report
+
 def benchmark(
     battery_loading: ARR, 
     grid_loading: ARR, 
@@ -53,154 +132,383 @@ def benchmark(
     selling_buying,
     usage: ARR, 
     battery: Battery, 
-    tol: float = TOL
+    tol: float = TOL,
+    soc_start: float = 0.0,
+    soc_end: float = 0.0
 ):
-
-    energy_provided = battery_loading.sum() + grid_loading.sum()
-    max_load_15min = battery.charging_per_segment()
-    total_cap = battery.capacity
-    total = sum(usage)
+    # soc_start/soc_end: energy carried into and out of the day (rolling horizon)
+    cost, bought, sold, violations = settle(battery_loading, grid_loading, buy, sell, buy_prices, sell_prices, base_prices, usage, battery,
+                                            tol, soc_start, soc_end)
     # ensuring correct input
-    assert not (total - energy_provided  > tol), "Not fulfilled entire need"
-    assert not (energy_provided - total > tol), f"loading too much energy: energy needed {total}, energy loaded = {energy_provided}"   
-    assert not is_overloaded(battery_loading, usage, grid_loading, buy, sell, total_cap), "Battery overloaded"
-    
+    assert not violations["unmet"][0], "Not fulfilled entire need"
+    assert not violations["overfilled"][0], f"loading too much energy: energy needed {sum(usage)}, energy loaded = {battery_loading.sum() + grid_loading.sum() + soc_start - soc_end}"
+    assert not violations["overloaded"][0], "Battery overloaded"
+    assert not violations["not_loadable"][0], f"Some values exceeded max load of {battery.charging_per_segment() + tol}"
 
+    selling_buying["bought"] += bought[0]
+    selling_buying["sold"] += sold[0]
+    return cost[0]
 
-    assert is_loadable(battery_loading,buy, battery.capacity), f"Some values exceeded max load of {max_load_15min + tol}"
-        
-    cost_per_kwh = battery.one_kwh_cost()
-    total_cost = 0
-    total_cost += (grid_loading * buy_prices).sum()
-    total_cost += (battery_loading * (buy_prices)).sum()
-    total_cost += (buy * (buy_prices)).sum()
-    selling_buying["bought"] += (grid_loading * base_prices).sum() + (buy * (base_prices)).sum() + (battery_loading * base_prices).sum()
-    selling_buying["sold"] += (sell * sell_prices).sum() 
+def provider_prices(provider, prices, sell_prices, tariff="G11", static_prices=False, date="2025-03-03", g14=None):
+    """One provider's (buy, sell, monthly cost) for one day or a (days, 96) matrix (date is then a list), see providers.PROVIDERS."""
+    buy, sell, month_const_cost = price_providers(prices, sell_prices, (provider,), tariff, static_prices, g14, date)
+    return buy[0], sell[0], month_const_cost[0]
 
+def run_best_algos_one_day(prices, usage, sell_prices, solar_free, battery: Battery, load_to_sell=True, provider="enea", tariff="G11", staying_static=False, date="2025-03-03", g14=None, solver=CHAIN, time_limit=None, mip_gap=None):
+    buy_prices, sell_prices, month_const_cost_1 = provider_prices(provider, prices, sell_prices, tariff, staying_static, date, g14)
     
-    
-    return total_cost
-
-def run_best_algos_one_day(prices, usage, sell_prices, solar_free, battery: Battery, load_to_sell=True, provider="enea", tariff="G11", staying_static=False, date="2025-03-03"):
-
-    match provider:
-        case "enea":
-            buy_prices, sell_prices, month_const_cost_1 =  calculate_enea_prices(prices, sell_prices, tariff=tariff, static_prices=staying_static)
-        case "energa":
-            buy_prices, sell_prices, month_const_cost_1 =  calculate_energa_prices(prices, sell_prices, tariff=tariff, static_prices=staying_static)
-        case "pge":
-            buy_prices, sell_prices, month_const_cost_1 =  calculate_pge_prices(prices, sell_prices, tariff=tariff, static_prices=staying_static)
-        case "tauron":
-            buy_prices, sell_prices, month_const_cost_1 =  calculate_tauron_prices(prices, sell_prices, tariff=tariff, static_prices=staying_static, date=date)
-        case _:
-            raise ValueError("Wrong provider")
-    
-    battery_load_time, grid_time, buy, sell = best_algos_ever(buy_prices, sell_prices, usage, battery, solar_free, load_to_sell=load_to_sell)
+    battery_load_time, grid_time, buy, sell = best_algos_ever(buy_prices, sell_prices, usage, battery, solar_free, load_to_sell=load_to_sell, solver=solver,
+                                                              time_limit=time_limit, mip_gap=mip_gap)
     
     return battery_load_time, grid_time, buy, sell, month_const_cost_1, buy_prices, sell_prices
 
-def parse_date_from_path(path):
-    filename = os.path.basename(path)  # -> "2024-07-01.csv"
-    date_str = filename.replace(".csv", "")  # -> "2024-07-01"
-    return datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
-
-def calculate_one_day(f_price, f_usage, f_rce, f_solar, battery: Battery, selling_buying={"sold": 0, "bought": 0}, load_to_sell=True, provider="enea", switching_from_static=False,
-                      tariff="G11", staying_static = False, solar_available=False, starting_tariff="G11"):
+def calculate_one_day(date, usage, battery: Battery, selling_buying={"sold": 0, "bought": 0}, load_to_sell=True, provider="enea", switching_from_static=False,
+                      tariff="G11", staying_static = False, solar_available=False, starting_tariff="G11", store=None, solver=CHAIN):
+    store = store or load_store()
      
     # prices per kWh
-    prices = np.array((pd.read_csv(f_price).values).flatten())
+    prices = store.day("tge", date)
+    sell_prices = store.day("rce", date)
+    solar = store.day("solar_output", date) if solar_available else None
+
+    return calculate_day(prices, sell_prices, usage, solar, None, date, battery, selling_buying, load_to_sell, provider, switching_from_static,
+                         tariff=tariff, staying_static=staying_static, starting_tariff=starting_tariff, solver=solver)
+
+def net_usage(usage, solar):
+    """Usage left after the free solar output, in kWh."""
     # usage already in kWh
-    usage = np.array((pd.read_csv(f_usage).values).flatten())
+    usage = np.array(usage, dtype=np.float64)
     # print(f"ussage = {sum(usage)}")
     
-    if solar_available:
-        solar = np.array((pd.read_csv(f_solar).values).flatten())
+    if solar is not None:
+        solar = np.array(solar, dtype=np.float64)
         diff = np.minimum(usage, solar)
         usage -= diff
         solar -= diff
-        assert all(solar >= 0), "Solar output is negative"
-        assert all(usage >= 0), "Usage is negative"
-    else:
-        solar = None
-        
-    sell_prices = np.array((pd.read_csv(f_rce).values).flatten())
-    date = parse_date_from_path(f_price)
-    
-    battery_load_time, grid_time, buy, sell, month_const_cost_1, buy_prices, sell_prices = run_best_algos_one_day(prices, usage, sell_prices, solar, battery, load_to_sell, provider, tariff=tariff, staying_static=staying_static, date=date)
-    
+        assert np.all(solar >= 0), "Solar output is negative"
+        assert np.all(usage >= 0), "Usage is negative"
+    return usage, solar
 
-    res_algos = round(benchmark(battery_load_time,grid_time,buy, sell,buy_prices, sell_prices,  prices, selling_buying, usage, battery),3)
+def settle_day(battery_load_time, grid_time, buy, sell, buy_prices, sell_prices, base_buy_prices, base_sell_prices, prices, usage, battery: Battery, selling_buying,
+               soc_start=0.0, soc_end=0.0):
+    """Costs of one day's schedule and of the grid-only baseline."""
+    res_algos = round(benchmark(battery_load_time,grid_time,buy, sell,buy_prices, sell_prices,  prices, selling_buying, usage, battery, soc_start=soc_start, soc_end=soc_end),3)
+    selling_buying_fake = {"sold": 0, "bought": 0}
+
+    res_benchmark = round(benchmark(np.zeros(SIZE),usage,np.zeros(SIZE), np.zeros(SIZE), base_buy_prices,base_sell_prices, prices, selling_buying_fake,usage, battery),3)
+    return res_algos, res_benchmark
+
+# one day from already loaded arrays, g14 is read from the dataset when None
+def calculate_day(prices, sell_prices, usage, solar, g14, date, battery: Battery, selling_buying={"sold": 0, "bought": 0}, load_to_sell=True, provider="enea",
+                  switching_from_static=False, tariff="G11", staying_static=False, starting_tariff="G11", solver=CHAIN, time_limit=None, mip_gap=None,
+                  schedule=None):
+    # schedule: optional dict, filled with the day's schedule arrays like selling_buying with the energy traded
+    usage, solar = net_usage(usage, solar)
+        
+    date = str(to_day(date))
     
+    battery_load_time, grid_time, buy, sell, month_const_cost_1, buy_prices, sell_prices = run_best_algos_one_day(prices, usage, sell_prices, solar, battery, load_to_sell, provider, tariff=tariff, staying_static=staying_static, date=date, g14=g14, solver=solver, time_limit=time_limit, mip_gap=mip_gap)
     
-    prices = np.array((pd.read_csv(f_price).values).flatten())
-    match provider:
-        case "enea":
-            buy_prices, sell_prices,  month_const_cost_2 =  calculate_enea_prices(prices, sell_prices, starting_tariff, switching_from_static)
-        case "energa":
-            buy_prices, sell_prices,  month_const_cost_2 =  calculate_energa_prices(prices, sell_prices, starting_tariff, switching_from_static)
-        case "pge":
-            buy_prices, sell_prices,  month_const_cost_2 =  calculate_pge_prices(prices, sell_prices,starting_tariff, switching_from_static)
-        case "tauron":
-            buy_prices, sell_prices,  month_const_cost_2 =  calculate_tauron_prices(prices, sell_prices, starting_tariff, switching_from_static)
-        case _:
-            raise ValueError("Wrong provider")
-    selling_buying_fake = {"sold": 0, "bought": 0}
+    # the baseline is priced from the provider's sell prices, like the schedule
+    base_buy_prices, base_sell_prices, month_const_cost_2 = provider_prices(provider, prices, sell_prices, starting_tariff, switching_from_static, date, g14)
 
-    res_benchmark = round(benchmark(np.zeros(SIZE),usage,np.zeros(SIZE), np.zeros(SIZE), buy_prices,sell_prices, prices, selling_buying_fake,usage, battery),3)
+    res_algos, res_benchmark = settle_day(battery_load_time, grid_time, buy, sell, buy_prices, sell_prices, base_buy_prices, base_sell_prices, prices, usage, battery, selling_buying)
+    if schedule is not None:
+        schedule.update(usage=usage, battery_load=battery_load_time, grid=grid_time, buy=buy, sell=sell, buy_prices=buy_prices, sell_prices=sell_prices)
     return res_algos, res_benchmark, month_const_cost_1, month_const_cost_2
+
+def baseline_costs(usages, base_buy_prices) -> list:
+    """Per-day cost of the grid-only baseline, as settle_day computes it, for all days in one product."""
+    return list(np.round((usages * base_buy_prices).sum(axis=1), 3))
+
+class PricedDays:
+    """
+    Everything about a date range that does not depend on the battery:
+    (days, 96) usage net of solar, the provider's buy/sell prices for the
+    tariff, the baseline's prices for the starting tariff and the monthly
+    fixed costs of both. Shared by every battery evaluated on the range.
+    """
+
+    def __init__(self, dates, prices, usages, buy_prices, sell_prices, base_buy_prices, base_sell_prices,
+                 month_const_cost_1, month_const_cost_2):
+        self.dates = dates
+        self.prices = prices
+        self.usages = usages
+        self.buy_prices = buy_prices
+        self.sell_prices = sell_prices
+        self.base_buy_prices = base_buy_prices
+        self.base_sell_prices = base_sell_prices
+        self.month_const_cost_1 = month_const_cost_1
+        self.month_const_cost_2 = month_const_cost_2
+
+    @property
+    def months(self) -> float:
+        return float(len(self.dates)) / 30.0
+
+    def baseline(self) -> list:
+        return baseline_costs(self.usages, self.base_buy_prices)
+
+    def __len__(self):
+        return len(self.dates)
+
+
+def net_usages(data, usage_days, solar_avaialable=False) -> np.ndarray:
+    """(days, 96) usage left after the free solar output."""
+    usages = np.empty((len(data.dates), SIZE))
+    for i in range(len(data.dates)):
+        usages[i], _ = net_usage(usage_days[i], data.solar[i] if solar_avaialable else None)
+    return usages
+
+def tariff_prices(data, provider="enea", tariff="G11", static_prices=False, sell_prices=None):
+    """
+    provider_prices for all days of an AlignedDays at once: (days, 96) buy
+    and sell prices and the monthly cost. sell_prices replaces the dataset's
+    sell prices as input; the buy prices never depend on it.
+    """
+    sell_prices = data.sell_prices if sell_prices is None else sell_prices
+    return provider_prices(provider, data.prices, sell_prices, tariff, static_prices, [str(to_day(date)) for date in data.dates], data.g14)
+
+def price_days(data, usage_days, provider="enea", switching_from_static=False, solar_avaialable=False, tariff="G11",
+               staying_static=False, starting_tariff="G11") -> PricedDays:
+    buy_prices, sell_prices, month_const_cost_1 = tariff_prices(data, provider, tariff, staying_static)
+    # the baseline is priced from the provider's sell prices, like the schedule
+    base_buy_prices, base_sell_prices, month_const_cost_2 = tariff_prices(data, provider, starting_tariff, switching_from_static, sell_prices)
+    return PricedDays([str(to_day(date)) for date in data.dates], np.asarray(data.prices), net_usages(data, usage_days, solar_avaialable),
+                      buy_prices, sell_prices, base_buy_prices, base_sell_prices, month_const_cost_1, month_const_cost_2)
+
+def schedule_days(priced: PricedDays, battery: Battery, load_to_sell=True, solver=CHAIN, rolling=False, time_limit=None, mip_gap=None):
+    """Schedules of all days in one batched call, or in a rolling 48 h horizon; returns them with the SOC at every day's start."""
+    if rolling:
+        battery_load_time, grid_time, buy, sell, soc_start = best_algos_rolling(priced.buy_prices, priced.sell_prices, priced.usages, battery,
+                                                                                load_to_sell=load_to_sell, solver=solver,
+                                                                                time_limit=time_limit, mip_gap=mip_gap)
+    else:
+        battery_load_time, grid_time, buy, sell = best_algos_ever_batch(priced.buy_prices, priced.sell_prices, priced.usages, battery,
+                                                                        load_to_sell=load_to_sell, solver=solver,
+                                                                        time_limit=time_limit, mip_gap=mip_gap)
+        soc_start = np.zeros(len(priced))
+    return battery_load_time, grid_time, buy, sell, soc_start
+
+def settle_days(priced: PricedDays, battery: Battery, schedules, selling_buying, baseline=True, validation="full"):
+    """
+    settle_day for all days in one settle() call; baseline=False skips the
+    baseline (None in its place), e.g. when it is shared. Raises an
+    AssertionError listing the days whose schedule violates a check.
+    """
+    battery_load_time, grid_time, buy, sell, soc_start = schedules
+    soc_end = np.append(soc_start[1:], 0.0)
+    cost, bought, sold, violations = settle(battery_load_time, grid_time, buy, sell, priced.buy_prices, priced.sell_prices, priced.prices,
+                                            priced.usages, battery, soc_start=soc_start, soc_end=soc_end, validation=validation)
+    report = violated_days(violations, priced.dates)
+    assert not report, f"Invalid schedules: {report}"
+    # day by day, the same additions as settle_day
+    for day_bought, day_sold in zip(bought, sold):
+        selling_buying["bought"] += day_bought
+        selling_buying["sold"] += day_sold
+    results_michal = list(np.round(cost, 3))
+    results_only_grid = priced.baseline() if baseline else [None] * len(priced)
+    return results_michal, results_only_grid
+
+def settle_period(results_michal, results_only_grid, selling_buying, months, month_const_cost_1, month_const_cost_2):
+    """total_profit's profit from per-day costs: sold energy offsets bought energy, the surplus is paid at WITHDRAWABLE_RATE."""
+    cost_algos = sum(results_michal)
+    cost_benchmark = sum(results_only_grid)
+    deductible = min(selling_buying["sold"], selling_buying["bought"])
+    cost_algos -= deductible
+    cost_algos -= WITHDRAWABLE_RATE * max(0, selling_buying["sold"] - deductible)
+    return cost_benchmark - cost_algos - (month_const_cost_1 - month_const_cost_2) * months
+
+def calculate_days(data, usage_days, battery: Battery, selling_buying, load_to_sell=True, provider="enea", switching_from_static=False,
+                   solar_avaialable=False, tariff="G11", staying_static=False, starting_tariff="G11", solver=CHAIN, rolling=False,
+                   time_limit=None, mip_gap=None):
+    """
+    calculate_day for every day of an AlignedDays, with the schedules of all
+    days optimised in one batched call, or with rolling=True in a rolling
+    48 h horizon that carries the battery's SOC from day to day. Returns
+    lists of per-day costs and the monthly costs of the last day.
+    """
+    priced = price_days(data, usage_days, provider, switching_from_static, solar_avaialable, tariff, staying_static, starting_tariff)
+    schedules = schedule_days(priced, battery, load_to_sell, solver, rolling, time_limit, mip_gap)
+    results_michal, results_only_grid = settle_days(priced, battery, schedules, selling_buying)
+    return results_michal, results_only_grid, priced.month_const_cost_1, priced.month_const_cost_2
     
+def calculate_chunk(days, battery: Battery, load_to_sell=True, provider="enea", switching_from_static=False, tariff="G11",
+                    staying_static=False, starting_tariff="G11", solver=CHAIN, time_limit=None, mip_gap=None):
+    """
+    calculate_day for a chunk of (prices, sell_prices, usage, solar, g14, date)
+    days, the unit of work of total_profit's process pool. Every day gets its
+    own selling_buying, the caller adds them up in day order.
+    """
+    results = []
+    for prices, sell_prices, usage, solar, g14, date in days:
+        selling_buying = {"sold": 0, "bought": 0}
+        with solve_label(str(to_day(date))):
+            res_algos, res_benchmark, month_const_cost_1, month_const_cost_2 = calculate_day(
+                prices, sell_prices, usage, solar, g14, date, battery, selling_buying, load_to_sell, provider, switching_from_static,
+                tariff=tariff, staying_static=staying_static, starting_tariff=starting_tariff, solver=solver, time_limit=time_limit, mip_gap=mip_gap)
+        results.append((res_algos, res_benchmark, selling_buying, month_const_cost_1, month_const_cost_2))
+    return results
+
+def needed_series(provider="enea", solar_avaialable=False, tariff="G11", starting_tariff="G11"):
+    series = ["tge", "rce"]
+    if solar_avaialable:
+        series.append("solar_output")
+    if provider == "tauron" and "G14" in (tariff, starting_tariff):
+        series.append("kompas_energetyczny")
+    return series
+
+def load_days(provider="enea", solar_avaialable=False, tariff="G11", starting_tariff="G11", daily_usage=5.0, start_date=None, end_date=None,
+              gap_policy="skip", usage_seed=0):
+    """The AlignedDays total_profit works on (whole store by default) and the generated usage of every day."""
+    store = load_store()
+    data = load_range(start_date or store.common_dates(["tge"])[0], end_date or store.common_dates(["tge"])[-1],
+                      series=needed_series(provider, solar_avaialable, tariff, starting_tariff), policy=gap_policy, store=store)
+    if data.has_gaps():
+        logger.info("skipped days = %s, filled days = %s", data.dropped, data.filled)
+    usage_days = usage_for_dates(data.dates, total_usage=daily_usage, seed=usage_seed)
+    return data, usage_days
+
 def total_profit(battery: Battery, load_to_sell=True, provider="enea", switching_from_static=False, solar_avaialable=False,
-                 daily_usage=5.0, tariff="G11", staying_static=False, starting_tariff="G11"):
-    prices_pattern = "../data_months/tge/*.csv"
-    prices_files = sorted(glob.glob(prices_pattern))
-    
-    generate_energy_usage_days(total_usage=daily_usage, days=len(prices_files))
-    usage_pattern = "../data_months/usage/*.csv"
-    usage_files = sorted(glob.glob(usage_pattern))
-   
-    rce_prices_pattern = "../data_months/rce/*.csv"
-    rce_prices_files = sorted(glob.glob(rce_prices_pattern))
-
-    solar_pattern = "../data_months/solar_output/*.csv"
-    solar_files = sorted(glob.glob(solar_pattern))
+                 daily_usage=5.0, tariff="G11", staying_static=False, starting_tariff="G11", start_date=None, end_date=None, gap_policy="skip", usage_seed=0,
+                 solver=CHAIN, batch=False, rolling=False, time_limit=None, mip_gap=None, workers=1, chunk_days=None):
+    """
+    batch=True schedules all days in one optimiser call; that is only
+    faster with solver="dp", which is vectorised over days but approximate
+    (about 1% higher costs), the MILP solvers (chain, highs) still solve
+    day by day behind it. time_limit and mip_gap apply to every solve
+    either way; workers and chunk_days only to the per-day loop, combining
+    them with batch/rolling raises ValueError.
+
+    workers > 1 maps the per-day loop over chunks of chunk_days days (by
+    default about four chunks per worker) on a process pool. The chunks come
+    back in day order and are reduced with the same additions as the serial
+    loop, so the result is identical for any workers/chunk_days.
+    """
+    if (batch or rolling) and (workers > 1 or chunk_days is not None):
+        raise ValueError("workers and chunk_days only apply to the per-day loop, not to batch or rolling")
+    data, usage_days = load_days(provider, solar_avaialable, tariff, starting_tariff, daily_usage, start_date, end_date, gap_policy, usage_seed)
+    dates = data.dates
     
     # expected amount to be loaded in entire 15 min period
     results_only_grid = []
     results_michal = []
     selling_buying = {"sold": 0, "bought": 0}
 
-    for i, (f_price, f_usage, f_rce, f_solar) in enumerate(zip(prices_files, usage_files, rce_prices_files, solar_files)):
-        res_algos, res_benchmark, month_const_cost_1, month_const_cost_2 = calculate_one_day(f_price,f_usage,f_rce,f_solar, battery, selling_buying, load_to_sell,provider,switching_from_static, tariff=tariff, staying_static=staying_static, solar_available=solar_avaialable, starting_tariff=starting_tariff)
-        results_michal.append(res_algos)
-        results_only_grid.append(res_benchmark)
-    print(selling_buying)
+    if batch or rolling:
+        # all days in one optimiser call (only solver "dp" is vectorised over days) or a rolling 48 h horizon
+        results_michal, results_only_grid, month_const_cost_1, month_const_cost_2 = calculate_days(
+            data, usage_days, battery, selling_buying, load_to_sell, provider, switching_from_static, solar_avaialable,
+            tariff=tariff, staying_static=staying_static, starting_tariff=starting_tariff, solver=solver, rolling=rolling,
+            time_limit=time_limit, mip_gap=mip_gap)
+    else:
+        days = [(data.prices[i], data.sell_prices[i], usage, data.solar[i] if solar_avaialable else None,
+                 data.g14[i] if data.g14 is not None else None, date) for i, (date, usage) in enumerate(zip(dates, usage_days))]
+        chunk_days = chunk_days or max(1, -(-len(days) // (4 * workers)))
+        chunks = [days[i:i + chunk_days] for i in range(0, len(days), chunk_days)]
+        work = functools.partial(calculate_chunk, battery=battery, load_to_sell=load_to_sell, provider=provider, switching_from_static=switching_from_static,
+                                 tariff=tariff, staying_static=staying_static, starting_tariff=starting_tariff, solver=solver, time_limit=time_limit, mip_gap=mip_gap)
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                chunk_results = list(pool.map(work, chunks))
+        else:
+            chunk_results = map(work, chunks)
+        for chunk in chunk_results:
+            for res_algos, res_benchmark, day_selling_buying, month_const_cost_1, month_const_cost_2 in chunk:
+                results_michal.append(res_algos)
+                results_only_grid.append(res_benchmark)
+                selling_buying["sold"] += day_selling_buying["sold"]
+                selling_buying["bought"] += day_selling_buying["bought"]
     assert len(results_michal) == len(results_only_grid), "different lenghts of results"
     # if not switching_from_static:
     #     assert all(a <= b for a, b in zip(results_michal, results_only_grid)), "Not all profits in Michal's algo are smaller than in stupid algo"
-    max_diff = max([p1 - p2 for p1, p2 in zip(results_only_grid, results_michal)])
-    print(f"max profit in one day per entire period = {max_diff} zlotych")
-    print(f"days considerd in a period = {min(len(prices_files), len(usage_files))}")
-    months = float(len(prices_files)) / 30.0
-    print(f"months = {months}")
-    cost_algos = sum(results_michal)
-    cost_benchmark = sum(results_only_grid)
-    print(f"pre deducion cost algos = {cost_algos}, benchmark = {cost_benchmark}")
-    
-    deductible = min(selling_buying["sold"], selling_buying["bought"])
-    # profit += deductible
-    # profit += WITHDRAWABLE_RATE * max(0, selling_buying["sold"] - deductible)
-    
-    cost_algos -= deductible
-    cost_algos -= WITHDRAWABLE_RATE * max(0, selling_buying["sold"] - deductible)
-    print(f"algos total cost per month = {cost_algos / months}, benchmark total cost per month = {cost_benchmark / months}")
-    loosing = max(0, selling_buying["sold"] - deductible) * (1 - WITHDRAWABLE_RATE)
-    print(f"loosing {loosing}")
-    
-    difference = cost_benchmark - cost_algos
-    profit = difference - (month_const_cost_1 - month_const_cost_2) * months
+    months = float(len(dates)) / 30.0
+    if logger.isEnabledFor(logging.DEBUG):
+        max_diff = max([p1 - p2 for p1, p2 in zip(results_only_grid, results_michal)], default=0.0)
+        deductible = min(selling_buying["sold"], selling_buying["bought"])
+        logger.debug("sold/bought = %s, max profit in one day = %s zlotych, days = %d, months = %s", selling_buying, max_diff, len(dates), months)
+        logger.debug("pre deduction cost algos = %s, benchmark = %s, loosing %s", sum(results_michal), sum(results_only_grid),
+                     max(0, selling_buying["sold"] - deductible) * (1 - WITHDRAWABLE_RATE))
+    profit = settle_period(results_michal, results_only_grid, selling_buying, months, month_const_cost_1, month_const_cost_2)
     return profit, months
 
 
+def iter_total_profit(battery: Battery, load_to_sell=True, provider="enea", switching_from_static=False, solar_avaialable=False,
+                      daily_usage=5.0, tariff="G11", staying_static=False, starting_tariff="G11", start_date=None, end_date=None, gap_policy="skip",
+                      usage_seed=0, solver=CHAIN, time_limit=None, mip_gap=None, chunk_days=31, schedules=False, progress=None):
+    """
+    total_profit as a generator: yields one dict per day, in day order, with
+    the day's cost and baseline, the energy sold/bought, a summary of the
+    schedule (the full arrays too with schedules=True) and "cumulative", the
+    settlement of all days so far; its "profit" after the last day is
+    total_profit's profit.
+
+    Days are loaded chunk_days at a time and nothing is kept between days,
+    so memory does not grow with the range (gap_policy="fill" loads the
+    range at once, a gap is filled from neighbouring days). Stop early by
+    closing the generator or with progress(done, total, day), called after
+    every day: a truthy return value ends the run.
+    """
+    store = load_store()
+    series = needed_series(provider, solar_avaialable, tariff, starting_tariff)
+    start = to_day(start_date or store.common_dates(["tge"])[0])
+    end = to_day(end_date or store.common_dates(["tge"])[-1])
+    if gap_policy == "fill":
+        total = int((end - start).astype(int)) + 1
+        chunk_days = total
+    else:
+        available = store.common_dates(series)
+        total = int(((available >= start) & (available <= end)).sum())
+
+    cumulative = {"days": 0, "cost": 0, "baseline": 0, "sold": 0, "bought": 0}
+    done = 0
+    for chunk_start in np.arange(start, end + 1, chunk_days):
+        chunk_end = min(end, chunk_start + chunk_days - 1)
+        data = load_range(chunk_start, chunk_end, series=series, policy=gap_policy, store=store)
+        usage_days = usage_for_dates(data.dates, total_usage=daily_usage, seed=usage_seed)
+        for i, (date, usage) in enumerate(zip(data.dates, usage_days)):
+            solar = data.solar[i] if solar_avaialable else None
+            g14 = data.g14[i] if data.g14 is not None else None
+            selling_buying = {"sold": 0, "bought": 0}
+            schedule = {}
+            with solve_label(str(to_day(date))):
+                res_algos, res_benchmark, month_const_cost_1, month_const_cost_2 = calculate_day(
+                    data.prices[i], data.sell_prices[i], usage, solar, g14, date, battery, selling_buying, load_to_sell, provider, switching_from_static,
+                    tariff=tariff, staying_static=staying_static, starting_tariff=starting_tariff, solver=solver, time_limit=time_limit, mip_gap=mip_gap,
+                    schedule=schedule)
+
+            cumulative["days"] += 1
+            cumulative["cost"] += res_algos
+            cumulative["baseline"] += res_benchmark
+            cumulative["sold"] += selling_buying["sold"]
+            cumulative["bought"] += selling_buying["bought"]
+            months = float(cumulative["days"]) / 30.0
+            profit = settle_period([cumulative["cost"]], [cumulative["baseline"]], cumulative, months, month_const_cost_1, month_const_cost_2)
+
+            charged = float(schedule["battery_load"].sum())
+            day = {
+                "date": str(to_day(date)),
+                "cost": res_algos,
+                "baseline": res_benchmark,
+                "sold": selling_buying["sold"],
+                "bought": selling_buying["bought"],
+                "summary": {
+                    "usage": float(schedule["usage"].sum()),
+                    "grid": float(schedule["grid"].sum()),
+                    "charged": charged,
+                    "bought_to_sell": float(schedule["buy"].sum()),
+                    "sold_back": float(schedule["sell"].sum()),
+                    "cycles": charged / battery.capacity,
+                },
+                "cumulative": {**cumulative, "months": months, "profit": profit},
+            }
+            if schedules:
+                day["schedule"] = schedule
+            done += 1
+            stop = progress is not None and progress(done, total, day)
+            yield day
+            if stop:
+                return
+
 # load_to_sell - if True, we are enabling selling energy to back to grid,
 def simulate(do_print = False, grant=False, daily_usage=7.5, load_to_sell=True, provider="enea",
              switching_from_static=False, solar_avaialable=False, tariff="G11", staying_static=False,
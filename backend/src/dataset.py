@@ -0,0 +1,425 @@
+from __future__ import annotations
+
+import datetime
+import glob
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from numpy.typing import NDArray
+
+from backend.const import SIZE
+from day_cache import DAY_CACHE
+
+# Consolidated store of the per-day CSV directories in data_months.
+# Every series is kept as one dense (days, 96) float64 array on a shared,
+# contiguous daily date index and saved as .npy, so it can be opened with
+# mmap_mode="r" and shared between worker processes through the page cache.
+#
+#   store/meta.json          - version stamp, rewritten last on every write
+#   store/dates.npy          - datetime64[D], contiguous range of days
+#   store/<series>.npy       - (days, 96) values, NaN rows for absent days
+#   store/<series>.rows.npy  - row count of the source file (0 = no file)
+
+ARR = NDArray[np.float64]
+
+DATA_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data_months"))
+STORE_DIR = os.path.join(DATA_DIR, "store")
+
+SERIES = ("tge", "rce", "usage", "solar_output", "kompas_energetyczny")
+
+
+def to_day(date) -> np.datetime64:
+    if isinstance(date, np.datetime64):
+        return date.astype("datetime64[D]")
+    return np.datetime64(str(date)[:10], "D")
+
+
+def _atomic_save(path: str, arr: np.ndarray):
+    tmp = path + ".tmp.npy"
+    np.save(tmp, arr)
+    os.replace(tmp, path)
+
+
+def _write_meta(store_dir: str, series):
+    meta_path = os.path.join(store_dir, "meta.json")
+    version = 0
+    if os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as f:
+            version = json.load(f).get("version", 0)
+    tmp = meta_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": version + 1, "series": sorted(series)}, f)
+    os.replace(tmp, meta_path)
+
+
+def read_day_csv(path: str) -> ARR:
+    return np.array((pd.read_csv(path).values).flatten(), dtype=np.float64)
+
+
+def _day_files(series_dir: str):
+    files = {}
+    for path in glob.glob(os.path.join(series_dir, "*.csv")):
+        name = os.path.basename(path).replace(".csv", "")
+        try:
+            datetime.datetime.strptime(name, "%Y-%m-%d")
+        except ValueError:
+            # legacy files such as tge_2024-07-01.csv are not day files
+            continue
+        files[np.datetime64(name, "D")] = path
+    return files
+
+
+def build_store(data_dir: str = DATA_DIR, store_dir: str = STORE_DIR, series=SERIES):
+    """
+    Converts the per-day CSV directories into the consolidated store.
+    Directories that do not exist are skipped. Days with a wrong number of
+    rows are kept as NaN, their row count is recorded for the gap report.
+    Days of an existing store that have no day file (written with
+    write_days only, e.g. solar_output from save_ac_data) are carried over
+    as they are; a day file replaces its stored day.
+    """
+    files = {s: _day_files(os.path.join(data_dir, s)) for s in series if os.path.isdir(os.path.join(data_dir, s))}
+    kept = {}
+    if os.path.exists(os.path.join(store_dir, "meta.json")):
+        previous = DayStore(store_dir)
+        for name in previous.series:
+            on_disk = np.array(list(files.get(name, {})), dtype="datetime64[D]")
+            present = (np.asarray(previous.rows(name)) > 0) & ~np.isin(previous.dates, on_disk)
+            if present.any():
+                kept[name] = (previous.dates[present], np.array(previous._values[name][present]), np.array(previous.rows(name)[present]))
+    all_days = [d for per_series in files.values() for d in per_series]
+    all_days += [d for kept_dates, _, _ in kept.values() for d in kept_dates]
+    if not all_days:
+        raise FileNotFoundError(f"No day files found in {data_dir}")
+
+    dates = np.arange(min(all_days), max(all_days) + 1, dtype="datetime64[D]")
+    os.makedirs(store_dir, exist_ok=True)
+
+    for name in [*files, *(name for name in kept if name not in files)]:
+        per_series = files.get(name, {})
+        values = np.full((len(dates), SIZE), np.nan)
+        rows = np.zeros(len(dates), dtype=np.int16)
+        if name in kept:
+            kept_dates, kept_values, kept_rows = kept[name]
+            idx = (kept_dates - dates[0]).astype(int)
+            values[idx] = kept_values
+            rows[idx] = kept_rows
+        for day, path in per_series.items():
+            i = int((day - dates[0]).astype(int))
+            day_values = read_day_csv(path)
+            rows[i] = len(day_values)
+            if len(day_values) == SIZE:
+                values[i] = day_values
+        _atomic_save(os.path.join(store_dir, f"{name}.npy"), values)
+        _atomic_save(os.path.join(store_dir, f"{name}.rows.npy"), rows)
+        print(f"{name}: {len(per_series)} days" + (f", {len(kept[name][0])} kept from the store" if name in kept else ""))
+
+    _atomic_save(os.path.join(store_dir, "dates.npy"), dates)
+    _write_meta(store_dir, {*files, *kept})
+
+
+def update_series(series: str, days: dict, store_dir: str = STORE_DIR, data_dir: str = DATA_DIR):
+    """
+    Writes {date: values} into one series of the store, extending the shared
+    date index when the new days fall outside it. Values without exactly 96
+    rows are recorded as malformed (NaN row plus their row count).
+    """
+    if not days:
+        return
+    if not os.path.exists(os.path.join(store_dir, "meta.json")):
+        # nothing to update yet, a fresh build picks up the day files
+        build_store(data_dir, store_dir)
+        return
+
+    dates = [to_day(d) for d in days]
+    rows = np.array([len(v) for v in days.values()], dtype=np.int16)
+    values = np.full((len(days), SIZE), np.nan)
+    for i, day_values in enumerate(days.values()):
+        if len(day_values) == SIZE:
+            values[i] = day_values
+    write_days(series, dates, values, rows, store_dir, data_dir)
+
+
+def write_days(series: str, dates, values: ARR, rows=None, store_dir: str = STORE_DIR, data_dir: str = DATA_DIR):
+    """
+    Block write of a (n, 96) array for the given n dates into one series,
+    with one fancy-indexed assignment instead of a file per day. The store is
+    built from the day files first when it does not exist yet; series
+    written here alone (without day files) survive a later build_store.
+    """
+    dates = np.array([to_day(d) for d in dates], dtype="datetime64[D]")
+    values = np.asarray(values, dtype=np.float64).reshape(len(dates), SIZE)
+    rows = np.full(len(dates), SIZE, dtype=np.int16) if rows is None else np.asarray(rows, dtype=np.int16)
+    if not len(dates):
+        return
+    if not os.path.exists(os.path.join(store_dir, "meta.json")):
+        try:
+            build_store(data_dir, store_dir)
+        except FileNotFoundError:
+            # no day files at all, start an empty store on the new dates
+            os.makedirs(store_dir, exist_ok=True)
+            _atomic_save(os.path.join(store_dir, "dates.npy"), np.arange(dates.min(), dates.max() + 1, dtype="datetime64[D]"))
+            _write_meta(store_dir, ())
+
+    store = DayStore(store_dir)
+    start = min(store.dates[0], dates.min())
+    end = max(store.dates[-1], dates.max())
+    all_dates = np.arange(start, end + 1, dtype="datetime64[D]")
+    offset = int((store.dates[0] - start).astype(int))
+    grown = len(all_dates) != len(store.dates)
+
+    for name in set(store.series) | {series}:
+        if not grown and name != series:
+            continue
+        new_values = np.full((len(all_dates), SIZE), np.nan)
+        new_rows = np.zeros(len(all_dates), dtype=np.int16)
+        if name in store.series:
+            new_values[offset:offset + len(store.dates)] = store._values[name]
+            new_rows[offset:offset + len(store.dates)] = store._rows[name]
+        if name == series:
+            idx = (dates - start).astype(int)
+            new_values[idx] = values
+            new_rows[idx] = rows
+        _atomic_save(os.path.join(store_dir, f"{name}.npy"), new_values)
+        _atomic_save(os.path.join(store_dir, f"{name}.rows.npy"), new_rows)
+
+    if grown:
+        _atomic_save(os.path.join(store_dir, "dates.npy"), all_dates)
+    _write_meta(store_dir, set(store.series) | {series})
+
+
+class DayStore:
+    """Read-only, memory-mapped view of the consolidated store."""
+
+    def __init__(self, store_dir: str = STORE_DIR):
+        self.store_dir = store_dir
+        self.stamp = os.stat(os.path.join(store_dir, "meta.json")).st_mtime_ns
+        with open(os.path.join(store_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.version = meta["version"]
+        self.dates = np.load(os.path.join(store_dir, "dates.npy"))
+        self._values = {}
+        self._rows = {}
+        for name in meta["series"]:
+            self._values[name] = np.load(os.path.join(store_dir, f"{name}.npy"), mmap_mode="r")
+            self._rows[name] = np.load(os.path.join(store_dir, f"{name}.rows.npy"), mmap_mode="r")
+
+    @property
+    def series(self):
+        return tuple(self._values)
+
+    def has(self, series: str, date) -> bool:
+        i = self.index_of(date)
+        return i is not None and series in self._rows and self._rows[series][i] == SIZE
+
+    def index_of(self, date):
+        i = int((to_day(date) - self.dates[0]).astype(int))
+        return i if 0 <= i < len(self.dates) else None
+
+    def day(self, series: str, date) -> ARR:
+        if not self.has(series, date):
+            raise FileNotFoundError(f"No {series} data for {to_day(date)}")
+        return np.asarray(self._values[series][self.index_of(date)])
+
+    def days(self, series: str, start, end) -> ARR:
+        """Rows for start..end inclusive; assumes the range lies in the index."""
+        i, j = self.index_of(start), self.index_of(end)
+        return np.asarray(self._values[series][i:j + 1])
+
+    def rows(self, series: str):
+        return self._rows[series]
+
+    def common_dates(self, series):
+        mask = np.ones(len(self.dates), dtype=bool)
+        for name in series:
+            mask &= np.asarray(self._rows[name]) == SIZE
+        return self.dates[mask]
+
+
+_STORES = {}
+# (store_dir, series_dir) -> mtime of the series directory already synced into the store
+_SYNCED = {}
+
+
+def _sync_day_files(store: DayStore, store_dir: str, data_dir: str) -> bool:
+    """
+    Writes the day files written since the store (e.g. by a scraper without
+    --store) into it. Only directories modified after the store are listed;
+    the writers replace files atomically, which touches the directory.
+    Returns whether anything was written.
+    """
+    written = False
+    for name in SERIES:
+        series_dir = os.path.join(data_dir, name)
+        try:
+            dir_mtime = os.stat(series_dir).st_mtime_ns
+        except FileNotFoundError:
+            continue
+        if dir_mtime <= store.stamp or _SYNCED.get((store_dir, series_dir)) == dir_mtime:
+            continue
+        newer = {day: path for day, path in _day_files(series_dir).items() if os.stat(path).st_mtime_ns > store.stamp}
+        if newer:
+            update_series(name, {day: read_day_csv(path) for day, path in newer.items()}, store_dir, data_dir)
+            written = True
+        _SYNCED[(store_dir, series_dir)] = dir_mtime
+    return written
+
+
+def load_store(store_dir: str = STORE_DIR, data_dir: str = DATA_DIR) -> DayStore:
+    """
+    Returns the process-wide DayStore, building it on first use, bringing in
+    day files newer than it and reopening it whenever meta.json was
+    rewritten by a builder.
+    """
+    meta_path = os.path.join(store_dir, "meta.json")
+    if not os.path.exists(meta_path):
+        build_store(data_dir, store_dir)
+    store = _STORES.get(store_dir)
+    if store is None or store.stamp != os.stat(meta_path).st_mtime_ns:
+        store = DayStore(store_dir)
+        _STORES[store_dir] = store
+    if _sync_day_files(store, store_dir, data_dir):
+        store = DayStore(store_dir)
+        _STORES[store_dir] = store
+    return store
+
+
+class AlignedDays:
+    """
+    Day-aligned (days, 96) matrices of several series over one date range,
+    with the gap report of what was missing or malformed in the source.
+    """
+
+    def __init__(self, dates, values: dict, report: dict, dropped, filled):
+        self.dates = dates
+        self.values = values
+        # {series: {"missing": [dates], "malformed": [dates]}}
+        self.report = report
+        self.dropped = dropped
+        self.filled = filled
+
+    @property
+    def prices(self):
+        return self.values.get("tge")
+
+    @property
+    def sell_prices(self):
+        return self.values.get("rce")
+
+    @property
+    def usage(self):
+        return self.values.get("usage")
+
+    @property
+    def solar(self):
+        return self.values.get("solar_output")
+
+    @property
+    def g14(self):
+        return self.values.get("kompas_energetyczny")
+
+    def has_gaps(self) -> bool:
+        return any(r["missing"] or r["malformed"] for r in self.report.values())
+
+    def __len__(self):
+        return len(self.dates)
+
+
+def load_range(start=None, end=None, series=("tge", "rce", "solar_output", "kompas_energetyczny"),
+               policy: str = "skip", store: DayStore | None = None) -> AlignedDays:
+    """
+    Loads start..end (inclusive, defaults to the whole store) for the given
+    series, aligned on one date index. Days without a file are reported as
+    missing, days with a wrong row count as malformed; a series the store
+    does not have at all is missing on every day. Policy:
+        "skip"  - drop days where any of the series is missing or malformed
+        "fill"  - keep every day, take bad rows from the closest earlier
+                  valid day (or the closest later one at the start);
+                  ValueError when a series has no valid day in the range
+        "raise" - raise ValueError when there is any gap
+    """
+    if policy not in ("skip", "fill", "raise"):
+        raise ValueError(f"Unknown gap policy {policy}")
+    store = store or load_store()
+    start = to_day(start) if start is not None else store.dates[0]
+    end = to_day(end) if end is not None else store.dates[-1]
+    dates = np.arange(start, end + 1, dtype="datetime64[D]")
+
+    # positions in the store, days outside of its index are missing
+    idx = (dates - store.dates[0]).astype(int)
+    inside = (idx >= 0) & (idx < len(store.dates))
+    idx = np.clip(idx, 0, len(store.dates) - 1)
+
+    report = {}
+    valid = {}
+    for name in series:
+        if name in store.series:
+            rows = np.where(inside, np.asarray(store.rows(name))[idx], 0)
+        else:
+            rows = np.zeros(len(dates), dtype=np.int16)
+        valid[name] = rows == SIZE
+        report[name] = {
+            "missing": [str(d) for d in dates[rows == 0]],
+            "malformed": [str(d) for d in dates[(rows != 0) & (rows != SIZE)]],
+        }
+
+    all_valid = np.logical_and.reduce([valid[name] for name in series]) if series else np.ones(len(dates), dtype=bool)
+    if policy == "raise" and not all_valid.all():
+        bad = {name: r for name, r in report.items() if r["missing"] or r["malformed"]}
+        raise ValueError(f"Gaps in data between {start} and {end}: {bad}")
+
+    values = {}
+    filled = []
+    if policy == "fill":
+        positions = np.arange(len(dates))
+        for name in series:
+            ok = valid[name]
+            if not ok.any():
+                raise ValueError(f"No valid {name} days between {start} and {end}")
+            # closest earlier valid day, the first valid day for a leading gap
+            source = np.maximum.accumulate(np.where(ok, positions, -1))
+            source[source < 0] = np.argmax(ok)
+            values[name] = _series_values(store, name, idx[source])
+        filled = [str(d) for d in dates[~all_valid]]
+        dropped = []
+    else:
+        dropped = [str(d) for d in dates[~all_valid]]
+        dates = dates[all_valid]
+        for name in series:
+            values[name] = _series_values(store, name, idx[all_valid])
+
+    return AlignedDays(dates, values, report, dropped, filled)
+
+
+def _series_values(store: DayStore, name: str, positions) -> ARR:
+    # a series absent from the store has no valid day, only an empty selection reaches here
+    if name not in store.series:
+        return np.full((len(positions), SIZE), np.nan)
+    return np.asarray(store._values[name])[positions]
+
+
+def read_day(series: str, date, data_dir: str = DATA_DIR) -> ARR:
+    """
+    One day of a series: from the store when it holds the day and the day
+    CSV was not rewritten since the store was built, otherwise from the
+    day CSV through the LRU DAY_CACHE (e.g. files a scraper just wrote).
+    """
+    store = load_store(data_dir=data_dir)
+    day = str(to_day(date))
+    path = os.path.join(data_dir, series, f"{day}.csv")
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        mtime_ns = None
+
+    if series in store.series and store.has(series, day) and (mtime_ns is None or mtime_ns <= store.stamp):
+        return store.day(series, day)
+    if mtime_ns is None:
+        raise FileNotFoundError(f"No {series} data for {day}")
+    return DAY_CACHE.get(series, day, path, mtime_ns)
+
+
+if __name__ == "__main__":
+    build_store()
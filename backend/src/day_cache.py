@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+class DayCache:
+    """
+    Size-bounded LRU cache of per-day CSV arrays.
+
+    Entries are keyed by (series, date, file mtime): a file rewritten by a
+    scraper gets a new mtime, so the stale entry is dropped on the next read.
+    Returned arrays are read-only and shared between callers.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()   # (series, date) -> (mtime_ns, array)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, series: str, date: str, path: str, mtime_ns: int | None = None) -> np.ndarray:
+        if mtime_ns is None:
+            mtime_ns = os.stat(path).st_mtime_ns
+        key = (series, date)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == mtime_ns:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self.invalidations += 1
+            self.misses += 1
+
+        values = np.array((pd.read_csv(path).values).flatten(), dtype=np.float64)
+        values.setflags(write=False)
+
+        with self._lock:
+            self._entries[key] = (mtime_ns, values)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return values
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hit_rate": round(self.hits / requests, 4) if requests else 0.0,
+            }
+
+
+DAY_CACHE = DayCache()
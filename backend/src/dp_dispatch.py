@@ -0,0 +1,134 @@
+from __future__ import annotations
+from typing import Dict, Tuple
+
+import numpy as np
+
+from linear import optimise_battery_arrays
+
+# Backward dynamic programming over a grid of SOC levels, vectorised over
+# days: the value function is a (days, levels) array and every step is a
+# handful of shifted array minima, one per allowed SOC change k.
+#
+#   k > 0 : charge   k*h / eta_ch  kWh from the grid   (k*h / eta_ch <= P_ch*Δ)
+#   k < 0 : discharge -k*h * eta_dis kWh into demand   (<= P_dis*Δ and <= demand_t)
+#   k = 0 : idle
+#
+# One SOC change per step means charge and discharge never happen together,
+# and the terminal value only allows the final level, so the schedule is
+# feasible for the MILP in linear.py. It is an approximation, not an exact
+# solver: trades are multiples of the grid step, so a discharge cannot follow
+# the demand exactly and the cost comes out above the MILP optimum. With the
+# default step that is about 1% over a year of days (~2 ms/day); halving the
+# step halves the gap and costs about four times the time. dp_gap bounds the
+# difference with the LP relaxation.
+
+
+def soc_levels(C: float, step: float) -> np.ndarray:
+    return np.linspace(0.0, C, int(np.ceil(C / step - 1e-9)) + 1)
+
+
+def optimise_battery_dp(
+    prices: np.ndarray,
+    demand: np.ndarray,
+    Δ: float = 0.25,
+    C: float = 5.0,
+    P_ch: float = 4.0,
+    P_dis: float = 4.0,
+    eta_ch: float = 1.0,
+    eta_dis: float = 1.0,
+    SOC0: float = 0.0,
+    c_batt: float = 0.0,
+    soc_step: float | None = None,
+    SOC_end: float | None = None,
+) -> Tuple[Dict[str, np.ndarray], float | np.ndarray]:
+    """
+    Same model and outputs as optimise_battery_arrays. prices and demand are
+    either (T,) for one day or (days, T), then every schedule array is
+    (days, T) and the cost is a (days,) array.
+
+    An approximation of the MILP's optimum (see above): the cost is never
+    below it and about 1% above with the default soc_step, the SOC grid
+    resolution in kWh, a tenth of the smaller per-step power limit. SOC0 and
+    SOC_end (None: back to SOC0) are snapped to the nearest level.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    demand = np.asarray(demand, dtype=np.float64)
+    if prices.shape != demand.shape:
+        raise ValueError("`prices` and `demand` must have the same length")
+    single = prices.ndim == 1
+    prices, demand = np.atleast_2d(prices), np.atleast_2d(demand)
+    D, T = prices.shape
+
+    if soc_step is None:
+        soc_step = min(P_ch * Δ * eta_ch, P_dis * Δ / eta_dis) / 10
+    levels = soc_levels(C, soc_step)
+    N = len(levels)
+    h = levels[1] - levels[0] if N > 1 else 0.0
+    i0 = int(round(SOC0 / h)) if h else 0
+    i_end = i0 if SOC_end is None else (int(round(SOC_end / h)) if h else 0)
+    k_ch = int(np.floor(P_ch * Δ * eta_ch / h + 1e-9)) if h else 0
+    k_dis = int(np.floor(P_dis * Δ / eta_dis / h + 1e-9)) if h else 0
+    ks = np.arange(-k_dis, k_ch + 1)
+
+    # (days, T) cost of every SOC change, inf where the discharge exceeds the demand
+    step_cost = {}
+    for k in ks:
+        if k > 0:
+            step_cost[k] = (prices + c_batt) * (k * h / eta_ch)
+        elif k < 0:
+            energy = -k * h * eta_dis
+            step_cost[k] = np.where(demand + 1e-9 >= energy, -prices * energy, np.inf)
+        else:
+            step_cost[k] = np.zeros((D, T))
+
+    value = np.full((D, N), np.inf)
+    value[:, i_end] = 0.0
+    policy = np.zeros((T, D, N), dtype=np.int16)
+    for t in range(T - 1, -1, -1):
+        best = np.full((D, N), np.inf)
+        arg = np.zeros((D, N), dtype=np.int16)
+        for k in ks:
+            lo, hi = max(0, -k), min(N, N - k)
+            if lo >= hi:
+                continue
+            cand = value[:, lo + k:hi + k] + step_cost[k][:, t, None]
+            better = cand < best[:, lo:hi]
+            best[:, lo:hi] = np.where(better, cand, best[:, lo:hi])
+            arg[:, lo:hi] = np.where(better, k, arg[:, lo:hi])
+        value = best
+        policy[t] = arg
+
+    days = np.arange(D)
+    level = np.full(D, i0)
+    moves = np.empty((D, T), dtype=np.int64)
+    for t in range(T):
+        moves[:, t] = policy[t, days, level]
+        level = level + moves[:, t]
+
+    delta = moves * h
+    charge = np.where(moves > 0, delta / eta_ch, 0.0)
+    discharge = np.where(moves < 0, -delta * eta_dis, 0.0)
+    schedule = {
+        "charge":    charge,
+        "discharge": discharge,
+        "grid_buy":  demand - discharge,
+        "soc":       levels[i0] + np.cumsum(delta, axis=1),
+    }
+    cost = (prices * (schedule["grid_buy"] + charge) + c_batt * charge).sum(axis=1)
+    if single:
+        return {name: arr[0] for name, arr in schedule.items()}, float(cost[0])
+    return schedule, cost
+
+
+def dp_gap(prices: np.ndarray, demand: np.ndarray, cost, **battery) -> np.ndarray:
+    """
+    Certified error bound of DP costs versus the optimum: cost minus the LP
+    relaxation's cost (solved per day with HiGHS), which is a lower bound of
+    the MILP. battery takes the optimise_battery keyword arguments.
+    """
+    prices, demand = np.atleast_2d(prices), np.atleast_2d(demand)
+    lower = np.array([
+        optimise_battery_arrays(p, d, solver="highs", relax=True, **battery)[1]
+        for p, d in zip(prices, demand)
+    ])
+    return np.atleast_1d(cost) - lower
@@ -1,11 +1,268 @@
 from __future__ import annotations
-from typing import Tuple
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, Tuple
 
 import numpy as np
 import pandas as pd
-import pyomo.environ as pyo
+from scipy import sparse
+from scipy.optimize import Bounds, LinearConstraint, milp
+
+from schedule_cache import memoize
 # pyright: reportAttributeAccessIssue=false
 
+# Engines behind optimise_battery:
+#   solver="highs" - the model below as one sparse matrix, solved in-process
+#                    by HiGHS through scipy.optimize.milp (no external binary)
+#   solver="lp"    - its LP relaxation, simultaneous charge/discharge netted out
+#   solver="dp"    - dynamic programming over a SOC grid (dp_dispatch.py),
+#                    vectorised over days but approximate (~1% above optimum)
+#   solver="grid"  - no arbitrage, the battery only moves to reach SOC_end
+#   solver="chain" - the engines of `chain` in order until one answers
+#   anything else  - the original Pyomo model with that Pyomo solver ("cbc", ...)
+# highs and Pyomo solve the same MILP, dp a discretised version of it. The
+# highs constraint matrix only depends on the horizon, step, power limits
+# and efficiencies, so it is built once per battery; per day only the
+# costs, the demand rhs and the SOC bounds change.
+#
+# Variable layout, T = number of steps:
+#   [ch(T) | dis(T) | grid(T) | soc_1..soc_T (T) | mode(T)]
+#
+# Every solve is validated (status, solution present) and appended to
+# SOLVE_LOG: engine, status, seconds, iterations, gap and the engines that
+# failed before it; solve_label() tags the records, e.g. with the day.
+
+HIGHS = "highs"
+LP = "lp"
+DP = "dp"
+GRID = "grid"
+CHAIN = "chain"
+DEFAULT_CHAIN = (HIGHS, LP, DP, GRID)
+
+SOLVE_LOG = deque(maxlen=100_000)
+_SOLVE_LABEL = ContextVar("solve_label", default=None)
+
+
+class SolverError(RuntimeError):
+    """An engine returned no usable solution (infeasible, limit without incumbent, crash)."""
+
+
+@contextmanager
+def solve_label(label):
+    token = _SOLVE_LABEL.set(label)
+    try:
+        yield
+    finally:
+        _SOLVE_LABEL.reset(token)
+
+
+def _record(engine, info, seconds, failed=(), days=1, cached=False):
+    SOLVE_LOG.append({
+        "label": _SOLVE_LABEL.get(),
+        "engine": engine,
+        "cached": cached,
+        "status": info.get("status"),
+        "seconds": round(seconds, 6),
+        "iterations": info.get("iterations"),
+        "gap": info.get("gap"),
+        "failed": list(failed),
+        "days": days,
+    })
+
+
+def telemetry_summary(records=None) -> dict:
+    """Per engine: number of answers (cache hits included), fallbacks that led to it and solve times."""
+    records = list(SOLVE_LOG if records is None else records)
+    summary = {}
+    for record in records:
+        engine = summary.setdefault(record["engine"], {"solves": 0, "cached": 0, "days": 0, "after_failures": 0, "seconds": 0.0, "max_seconds": 0.0})
+        engine["solves"] += 1
+        engine["cached"] += bool(record.get("cached"))
+        engine["days"] += record["days"]
+        engine["after_failures"] += bool(record["failed"])
+        engine["seconds"] += record["seconds"]
+        engine["max_seconds"] = max(engine["max_seconds"], record["seconds"])
+    for engine in summary.values():
+        engine["mean_seconds"] = engine["seconds"] / engine["solves"]
+    return summary
+
+
+@lru_cache(maxsize=64)
+def _highs_matrix(T: int, Δ: float, P_ch: float, P_dis: float, eta_ch: float, eta_dis: float):
+    eye = sparse.identity(T, format="csr")
+    zero = sparse.csr_matrix((T, T))
+    shift = sparse.eye(T, k=-1, format="csr")                 # soc_{t} -> row t+1
+    A = sparse.vstack([
+        # soc_t - soc_{t-1} - eta_ch * ch_t + dis_t / eta_dis = 0  (soc_0 moves to the rhs)
+        sparse.hstack([-eta_ch * eye, eye / eta_dis, zero, eye - shift, zero]),
+        # grid_t + dis_t = demand_t
+        sparse.hstack([zero, eye, eye, zero, zero]),
+        # ch_t <= P_ch * Δ * mode_t
+        sparse.hstack([eye, zero, zero, zero, -P_ch * Δ * eye]),
+        # dis_t <= P_dis * Δ * (1 - mode_t)
+        sparse.hstack([zero, eye, zero, zero, P_dis * Δ * eye]),
+    ], format="csc")
+    integrality = np.concatenate([np.zeros(4 * T), np.ones(T)])
+    return A, integrality
+
+
+def _solve_highs(prices, demand, Δ, C, P_ch, P_dis, eta_ch, eta_dis, SOC0, c_batt, relax=False, SOC_end=None,
+                 time_limit=None, mip_gap=None):
+    T = len(prices)
+    A, integrality = _highs_matrix(T, Δ, P_ch, P_dis, eta_ch, eta_dis)
+    if relax:
+        integrality = np.zeros_like(integrality)
+
+    cost = np.concatenate([prices + c_batt, np.zeros(T), prices, np.zeros(2 * T)])
+
+    lower = np.concatenate([np.zeros(T), demand, np.full(2 * T, -np.inf)])
+    upper = np.concatenate([np.zeros(T), demand, np.zeros(T), np.full(T, P_dis * Δ)])
+    lower[0] = upper[0] = SOC0
+
+    var_lower = np.zeros(5 * T)
+    var_upper = np.concatenate([np.full(T, P_ch * Δ), np.full(T, P_dis * Δ), np.full(T, np.inf), np.full(T, C), np.ones(T)])
+    # finish with the initial SOC (or SOC_end)
+    var_lower[4 * T - 1] = var_upper[4 * T - 1] = SOC0 if SOC_end is None else SOC_end
+
+    options = {}
+    if time_limit is not None:
+        options["time_limit"] = time_limit
+    if mip_gap is not None:
+        options["mip_rel_gap"] = mip_gap
+    res = milp(cost, constraints=LinearConstraint(A, lower, upper), integrality=integrality,
+               bounds=Bounds(var_lower, var_upper), options=options)
+    # 0 optimal, 1 time/iteration limit (usable only with an incumbent), 2 infeasible, 3 unbounded, 4 other
+    if res.status not in (0, 1) or res.x is None:
+        raise SolverError(f"HiGHS status {res.status}: {res.message}")
+
+    x = res.x
+    schedule = {
+        "charge":    x[:T],
+        "discharge": x[T:2 * T],
+        "grid_buy":  x[2 * T:3 * T],
+        "soc":       x[3 * T:4 * T],
+    }
+    info = {
+        "status": "optimal" if res.status == 0 else "time_limit",
+        "iterations": getattr(res, "mip_node_count", None),
+        "gap": getattr(res, "mip_gap", None),
+    }
+    return schedule, float(res.fun), info
+
+
+def _net_relaxed(schedule, demand, eta_ch, eta_dis):
+    """
+    Nets simultaneous charge and discharge of an LP relaxation: every step
+    keeps its SOC change, so the trajectory (and feasibility) is unchanged
+    and at most one of charge/discharge is non-zero.
+    """
+    change = eta_ch * schedule["charge"] - schedule["discharge"] / eta_dis
+    charge = np.where(change > 0, change / eta_ch, 0.0)
+    discharge = np.where(change < 0, -change * eta_dis, 0.0)
+    return {"charge": charge, "discharge": discharge, "grid_buy": demand - discharge, "soc": schedule["soc"]}
+
+
+def _solve_grid(prices, demand, Δ, C, P_ch, P_dis, eta_ch, eta_dis, SOC0, c_batt, SOC_end=None):
+    """Last resort: no arbitrage, discharge into demand / charge as early as possible to reach SOC_end."""
+    target = SOC0 if SOC_end is None else SOC_end
+    T = len(prices)
+    charge, discharge = np.zeros(T), np.zeros(T)
+    soc = SOC0
+    for t in range(T):
+        if soc > target:
+            discharge[t] = min(P_dis * Δ, demand[t], (soc - target) * eta_dis)
+            soc -= discharge[t] / eta_dis
+        elif soc < target:
+            charge[t] = min(P_ch * Δ, (target - soc) / eta_ch)
+            soc += charge[t] * eta_ch
+    if abs(soc - target) > 1e-9:
+        raise SolverError(f"cannot reach SOC {target} from {SOC0} in {T} steps")
+    schedule = {
+        "charge": charge,
+        "discharge": discharge,
+        "grid_buy": demand - discharge,
+        "soc": SOC0 + np.cumsum(eta_ch * charge - discharge / eta_dis),
+    }
+    cost = float((prices * (schedule["grid_buy"] + charge) + c_batt * charge).sum())
+    return schedule, cost, {"status": "heuristic"}
+
+
+def _run_engine(engine, prices, demand, Δ, C, P_ch, P_dis, eta_ch, eta_dis, SOC0, c_batt, relax, SOC_end, time_limit, mip_gap):
+    if engine == HIGHS:
+        return _solve_highs(prices, demand, Δ, C, P_ch, P_dis, eta_ch, eta_dis, SOC0, c_batt, relax, SOC_end, time_limit, mip_gap)
+    if engine == LP:
+        schedule, cost, info = _solve_highs(prices, demand, Δ, C, P_ch, P_dis, eta_ch, eta_dis, SOC0, c_batt, True, SOC_end, time_limit)
+        schedule = _net_relaxed(schedule, demand, eta_ch, eta_dis)
+        cost = float((prices * (schedule["grid_buy"] + schedule["charge"]) + c_batt * schedule["charge"]).sum())
+        return schedule, cost, {**info, "status": "relaxed" if info["status"] == "optimal" else info["status"]}
+    if engine == DP:
+        from dp_dispatch import optimise_battery_dp
+        schedule, cost = optimise_battery_dp(prices, demand, Δ, C, P_ch, P_dis, eta_ch, eta_dis, SOC0, c_batt, SOC_end=SOC_end)
+        return schedule, cost, {"status": "heuristic"}
+    if engine == GRID:
+        return _solve_grid(prices, demand, Δ, C, P_ch, P_dis, eta_ch, eta_dis, SOC0, c_batt, SOC_end)
+    return _solve_pyomo(prices, demand, Δ, C, P_ch, P_dis, eta_ch, eta_dis, SOC0, engine, c_batt, SOC_end, time_limit, mip_gap)
+
+
+# Only exact answers (HiGHS or Pyomo, solved to optimality) are memoised: a
+# time-limited incumbent or a fallback depends on the machine's load and must
+# be retried next time. Cheap engines (lp, dp, grid) are never cached.
+_HEURISTICS = (LP, DP, GRID)
+_FRESH = ContextVar("fresh_solve", default=False)
+
+
+@memoize(cacheable=lambda result: result[2]["status"] == "optimal")
+def _solve_exact(engine, prices, demand, Δ, C, P_ch, P_dis, eta_ch, eta_dis, SOC0, c_batt, relax, SOC_end, time_limit, mip_gap):
+    _FRESH.set(True)
+    schedule, cost, info = _run_engine(engine, prices, demand, Δ, C, P_ch, P_dis, eta_ch, eta_dis, SOC0, c_batt, relax, SOC_end, time_limit, mip_gap)
+    return schedule, cost, {**info, "engine": engine}
+
+
+def optimise_battery_batch(
+    prices: np.ndarray,
+    demand: np.ndarray,
+    Δ: float = 0.25,
+    C: float = 5.0,
+    P_ch: float = 4.0,
+    P_dis: float = 4.0,
+    eta_ch: float = 1.0,
+    eta_dis: float = 1.0,
+    SOC0: float = 0.0,
+    solver: str = HIGHS,
+    c_batt: float = 0.0,
+    time_limit: float | None = None,
+    mip_gap: float | None = None,
+) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """
+    optimise_battery_arrays for (days, T) prices and demand. Every schedule
+    array is (days, T), the cost a (days,) array. Only "dp" (approximate) is
+    vectorised over days; the other solvers (highs, chain, Pyomo) still solve day by
+    day, so batching saves only the per-day Python overhead around them
+    (highs reuses its cached matrix, one block-diagonal MILP over all days
+    is slower than that). Zero days give empty (0, T) arrays.
+    """
+    prices = np.atleast_2d(np.asarray(prices, dtype=np.float64))
+    demand = np.atleast_2d(np.asarray(demand, dtype=np.float64))
+    if prices.shape != demand.shape:
+        raise ValueError("`prices` and `demand` must have the same shape")
+
+    if len(prices) == 0:
+        empty = np.empty(prices.shape)
+        return {"charge": empty, "discharge": empty.copy(), "grid_buy": empty.copy(), "soc": empty.copy()}, np.empty(0)
+    if solver == DP:
+        from dp_dispatch import optimise_battery_dp
+        start = time.perf_counter()
+        result = optimise_battery_dp(prices, demand, Δ, C, P_ch, P_dis, eta_ch, eta_dis, SOC0, c_batt)
+        _record(DP, {"status": "heuristic"}, time.perf_counter() - start, days=len(prices))
+        return result
+    days = [optimise_battery_arrays(p, d, Δ, C, P_ch, P_dis, eta_ch, eta_dis, SOC0, solver, c_batt, time_limit=time_limit, mip_gap=mip_gap)
+            for p, d in zip(prices, demand)]
+    schedule = {name: np.stack([day[0][name] for day in days]) for name in days[0][0]}
+    return schedule, np.array([day[1] for day in days])
+
 
 def optimise_battery(
     prices: np.ndarray,
@@ -17,34 +274,117 @@ def optimise_battery(
     eta_ch: float = 1.0,             # (–) charge efficiency
     eta_dis: float = 1.0,            # (–) discharge efficiency
     SOC0: float = 0.0,               # kWh – initial state of charge
-    solver: str = "cbc",             # any Pyomo-compatible LP/MILP solver
+    solver: str = HIGHS,             # "highs" (in-process) or any Pyomo-compatible LP/MILP solver
     c_batt: float = 0.0,        # ← NEW: battery-throughput cost (€/kWh charged)
+    SOC_end: float | None = None,    # kWh – final state of charge, None → SOC0
+    time_limit: float | None = None, # s   – per solve, the incumbent is used when it runs out
+    mip_gap: float | None = None,    # (–) relative MIP gap to stop at
 
 ) -> Tuple[pd.DataFrame, float]:
     """
     Optimise battery dispatch; demand must be met by grid import + discharge.
     Returns a schedule DataFrame and the total grid-energy cost (€).
     """
+    schedule, cost = optimise_battery_arrays(prices, demand, Δ, C, P_ch, P_dis, eta_ch, eta_dis, SOC0, solver, c_batt,
+                                             SOC_end=SOC_end, time_limit=time_limit, mip_gap=mip_gap)
+    return pd.DataFrame({"price": prices, "demand": demand, **schedule}), cost
+
+
+def optimise_battery_arrays(
+    prices: np.ndarray,
+    demand: np.ndarray,
+    Δ: float = 0.25,
+    C: float = 5.0,
+    P_ch: float = 4.0,
+    P_dis: float = 4.0,
+    eta_ch: float = 1.0,
+    eta_dis: float = 1.0,
+    SOC0: float = 0.0,
+    solver: str = HIGHS,
+    c_batt: float = 0.0,
+    relax: bool = False,
+    SOC_end: float | None = None,
+    time_limit: float | None = None,
+    mip_gap: float | None = None,
+    chain: Tuple[str, ...] = DEFAULT_CHAIN,
+    with_info: bool = False,
+) -> Tuple[Dict[str, np.ndarray], float]:
+    """
+    Same as optimise_battery, the schedule is a dict of NumPy arrays
+    (charge, discharge, grid_buy, soc) instead of a DataFrame.
+    solver="dp" uses the dynamic programming engine (dp_dispatch.py, an
+    approximation slightly above the optimum),
+    solver="chain" tries the engines of chain in order and takes the first
+    one that returns a validated solution (SolverError if none does).
+    relax=True (highs only) drops the integrality of the charge/discharge
+    mode, the LP relaxation's cost is a lower bound of the MILP's.
+    SOC_end is the final state of charge, None means back to SOC0.
+    time_limit (s) and mip_gap (relative) apply to every MILP/LP solve.
+    with_info=True also returns the answer's info (engine, status, gap).
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    demand = np.asarray(demand, dtype=np.float64)
     if prices.shape != demand.shape:
         raise ValueError("`prices` and `demand` must have the same length")
 
+    failed = []
+    for engine in (chain if solver == CHAIN else (solver,)):
+        start = time.perf_counter()
+        try:
+            if engine in _HEURISTICS:
+                schedule, cost, info = _run_engine(engine, prices, demand, Δ, C, P_ch, P_dis, eta_ch, eta_dis, SOC0, c_batt,
+                                                   relax, SOC_end, time_limit, mip_gap)
+                cached = False
+            else:
+                _FRESH.set(False)
+                schedule, cost, info = _solve_exact(engine, prices, demand, Δ, C, P_ch, P_dis, eta_ch, eta_dis, SOC0, c_batt,
+                                                    relax, SOC_end, time_limit, mip_gap)
+                cached = not _FRESH.get()
+        except SolverError as e:
+            if solver != CHAIN:
+                raise
+            failed.append(f"{engine}: {e}")
+            continue
+        info = {**info, "engine": engine}
+        _record(engine, info, time.perf_counter() - start, failed, cached=cached)
+        return (schedule, cost, info) if with_info else (schedule, cost)
+    raise SolverError("no engine answered: " + "; ".join(failed))
+
+
+# Pyomo templates, one per (T, Δ, C, P_ch, P_dis, eta_ch, eta_dis, solver):
+# prices, demand, SOC0, SOC_end and c_batt are mutable Params updated in place, so a
+# persistent solver (e.g. "appsi_highs", in memory, no LP files) only
+# receives the changed coefficients. File based solvers ("cbc") still skip
+# the model rebuild. Not thread-safe, use one process per worker.
+_PYOMO_TEMPLATES = {}
+
+
+def _pyomo_template(T_len, Δ, C, P_ch, P_dis, eta_ch, eta_dis, solver):
+    key = (T_len, Δ, C, P_ch, P_dis, eta_ch, eta_dis, solver)
+    if key in _PYOMO_TEMPLATES:
+        return _PYOMO_TEMPLATES[key]
+    import pyomo.environ as pyo
+
     # ---- PYOMO BUILD ------------------------------------------------------------
-    T = range(len(prices))
+    T = range(T_len)
     m = pyo.ConcreteModel()
     m.T = pyo.Set(initialize=T)
 
     # parameters
-    m.price  = pyo.Param(m.T, initialize={t: float(prices[t])  for t in T})
-    m.demand = pyo.Param(m.T, initialize={t: float(demand[t])  for t in T})
+    m.price  = pyo.Param(m.T, initialize=0.0, mutable=True)
+    m.demand = pyo.Param(m.T, initialize=0.0, mutable=True)
+    m.soc0   = pyo.Param(initialize=0.0, mutable=True)
+    m.soc_end = pyo.Param(initialize=0.0, mutable=True)
+    m.c_batt = pyo.Param(initialize=0.0, mutable=True)
 
     # decision variables
     m.ch   = pyo.Var(m.T, bounds=(0, P_ch  * Δ))           # energy charged  (kWh)
     m.dis  = pyo.Var(m.T, bounds=(0, P_dis * Δ))           # energy discharged
     m.grid = pyo.Var(m.T, within=pyo.NonNegativeReals)     # grid import
-    m.soc  = pyo.Var(range(len(prices) + 1), bounds=(0, C))
+    m.soc  = pyo.Var(range(T_len + 1), bounds=(0, C))
     m.mode = pyo.Var(m.T, within=pyo.Binary)               # 1 → charging mode
 
-    m.soc[0].fix(SOC0)
+    m.start_soc = pyo.Constraint(expr=m.soc[0] == m.soc0)
 
     # battery dynamics
     def soc_rule(mm, t):
@@ -65,29 +405,91 @@ def optimise_battery(
     m.dis_lim = pyo.Constraint(m.T, rule=dis_limit)
 
     # finish with at least the initial SOC
-    m.final_soc = pyo.Constraint(expr=m.soc[len(prices)] == SOC0)
+    m.final_soc = pyo.Constraint(expr=m.soc[T_len] == m.soc_end)
 
     # objective: pay for every imported kWh (demand-side + battery charging)
     m.obj = pyo.Objective(
         expr=sum(
             m.price[t] * (m.grid[t] + m.ch[t])   # pay normal tariff on all imports
-            + c_batt      *  m.ch[t]             # EXTRA € for each kWh into battery
+            + m.c_batt    *  m.ch[t]             # EXTRA € for each kWh into battery
             for t in m.T
         ),
         sense=pyo.minimize,
     )
 
+    opt = pyo.SolverFactory(solver)
+    if hasattr(opt, "update_config"):
+        # persistent (appsi) solver: the structure never changes, only Params
+        config = opt.update_config
+        config.check_for_new_or_removed_constraints = False
+        config.check_for_new_or_removed_vars = False
+        config.check_for_new_or_removed_params = False
+        config.check_for_new_objective = False
+        config.update_constraints = False
+        config.update_vars = False
+        config.update_named_expressions = False
+        config.update_objective = False
+        config.update_params = True
+    _PYOMO_TEMPLATES[key] = m, opt
+    return _PYOMO_TEMPLATES[key]
+
+
+def _values(var, index) -> np.ndarray:
+    return np.fromiter((var[t].value for t in index), dtype=np.float64, count=len(index))
+
+
+_DEFAULT_MIP_GAP = 1e-4   # HiGHS' own default
+
+# Pyomo option names of the time and gap limits for file based solvers
+_PYOMO_LIMITS = {
+    "cbc": ("sec", "ratioGap"),
+    "glpk": ("tmlim", "mipgap"),
+    "gurobi": ("TimeLimit", "MIPGap"),
+}
+
+
+def _solve_pyomo(prices, demand, Δ, C, P_ch, P_dis, eta_ch, eta_dis, SOC0, solver, c_batt, SOC_end=None, time_limit=None, mip_gap=None):
+    import pyomo.environ as pyo
+
+    T = len(prices)
+    m, opt = _pyomo_template(T, Δ, C, P_ch, P_dis, eta_ch, eta_dis, solver)
+    m.price.store_values(dict(enumerate(prices.tolist())))
+    m.demand.store_values(dict(enumerate(demand.tolist())))
+    m.soc0.set_value(float(SOC0))
+    m.soc_end.set_value(float(SOC0 if SOC_end is None else SOC_end))
+    m.c_batt.set_value(float(c_batt))
 
     # ── Solve ───────────────────────────────────────────────────────────────
-    pyo.SolverFactory(solver).solve(m, tee=False)
+    try:
+        if hasattr(opt, "update_config"):
+            # appsi: the gap is a config entry, the time limit a solve() argument; the
+            # persistent solver keeps options between solves, so always set both
+            opt.config.mip_gap = _DEFAULT_MIP_GAP if mip_gap is None else mip_gap
+            results = opt.solve(m, load_solutions=False, timelimit=float("inf") if time_limit is None else time_limit)
+        else:
+            time_name, gap_name = _PYOMO_LIMITS.get(solver, (None, None))
+            options = {}
+            if time_limit is not None and time_name:
+                options[time_name] = time_limit
+            if mip_gap is not None and gap_name:
+                options[gap_name] = mip_gap
+            results = opt.solve(m, tee=False, load_solutions=False, options=options)
+        status = str(results.solver.termination_condition)
+        if status not in ("optimal", "maxTimeLimit") or len(results.solution) == 0:
+            raise SolverError(f"{solver}: no solution ({status})")
+        m.solutions.load_from(results)
+    except SolverError:
+        raise
+    except Exception as e:
+        # solver missing or crashed
+        raise SolverError(f"{solver}: {e}") from e
 
     # ── Results ─────────────────────────────────────────────────────────────
-    schedule = pd.DataFrame({
-        "price":      prices,
-        "demand":     demand,
-        "charge":     [pyo.value(m.ch[t])    for t in m.T],
-        "discharge":  [pyo.value(m.dis[t])   for t in m.T],
-        "grid_buy":   [pyo.value(m.grid[t])  for t in m.T],
-        "soc":        [pyo.value(m.soc[t+1]) for t in m.T],
-    })
-    return schedule, float(pyo.value(m.obj))
+    schedule = {
+        "charge":     _values(m.ch, range(T)),
+        "discharge":  _values(m.dis, range(T)),
+        "grid_buy":   _values(m.grid, range(T)),
+        "soc":        _values(m.soc, range(1, T + 1)),
+    }
+    info = {"status": "optimal" if status == "optimal" else "time_limit"}
+    return schedule, float(pyo.value(m.obj)), info
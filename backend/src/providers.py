@@ -1,95 +1,101 @@
 from backend.const import CURRENT_A, B_ENEA, VAT, ENEA_MONTHLY_COST, ENERGA_MONTHLY_COST, PGE_MONTHLY_COST, TAURON_MONTHLY_COST, K_PGE, SC_TAUTRON, Wk_ENERGA, ENEA_STATIC_KWH, PGE_STATIC_KWH, TAURON_STATIC_KWH, ENERGA_STATIC_KWH, ENEA_MONTHLY_COST_STATIC, ENERGA_MONTHLY_COST_STATIC, TAURON_MONTHLY_COST_STATIC, PGE_MONTHLY_COST_STATIC, SIZE, PGE_MIN_PRICE_CAP, TAURON_MIN_PRICE_CAP, G13_TAURON, G11_TAURON, G12_TAURON, ADDITIONAL_HELPER_SELLING
 import numpy as np
-import pandas as pd
-
-def calculate_enea_prices(prices, sell_prices, tariff = "G11", static_prices=False):
-    tarifs = 0
-    if tariff == "G11":
-        tarifs = G11_TAURON
-    elif tariff == "G12":
-        tarifs = G12_TAURON
-    elif tariff == "G13":
-        tarifs = G13_TAURON
-    else:
-        print(f"tariff = {tariff} is not possible for enea")
+from dataset import read_day
 
-    if static_prices:
-        prices = np.full(SIZE, ENEA_STATIC_KWH) + tarifs
-        return prices, sell_prices, ENEA_MONTHLY_COST_STATIC
-    
+# Provider pricing as data. Dynamic buy price of a provider, p = wholesale price,
+# t = distribution tariff of the slot:
+#
+#   net   = max(net_floor, p) + (t if tariff_in_net) + fees[0] + fees[1] + ...
+#   buy   = max(gross_floor, net * (1 + vat)) + t
+#   sell  = p_sell * sell_factor
+#
+# and with static prices buy = static_kwh + t, sell = p_sell. A missing
+# floor is -inf, a missing fee or tariff 0, so every provider runs through
+# the same broadcast operations and the results are exactly those of the
+# per-provider formulas. Tariff "G14" is Tauron's dynamic tariff, read from
+# the kompas_energetyczny series.
 
-    netto_prices = prices + CURRENT_A + B_ENEA
-    buy_prices = netto_prices * (1 + VAT) + tarifs
-    sell_prices = sell_prices * ADDITIONAL_HELPER_SELLING
-    
-    return buy_prices, sell_prices, ENEA_MONTHLY_COST
+TARIFFS = {"G11": G11_TAURON, "G12": G12_TAURON, "G13": G13_TAURON}
+DYNAMIC_TARIFF = "G14"
 
+PROVIDER_DEFAULTS = {
+    "fees": (),
+    "vat": VAT,
+    "net_floor": None,
+    "gross_floor": None,
+    "tariff_in_net": False,
+    "sell_factor": ADDITIONAL_HELPER_SELLING,
+    "static_kwh": None,
+    "monthly_cost": 0,
+    "monthly_cost_static": 0,
+    "tariffs": ("G11", "G12", "G13"),
+}
 
-def calculate_energa_prices(prices, sell_prices, tariff = "G11", static_prices=False):
-    tarifs = 0
-    if tariff == "G11":
-        tarifs = G11_TAURON
-    elif tariff == "G12":
-        tarifs = G12_TAURON
-    elif tariff == "G13":
-        tarifs = G13_TAURON
-    else:
-        print(f"tariff = {tariff} is not possible for enea")
+PROVIDERS = {}
 
 
-    if static_prices:
-        prices = np.full(SIZE, ENERGA_STATIC_KWH) + tarifs
-        return prices, sell_prices, ENERGA_MONTHLY_COST_STATIC
-    
-    netto_prices = prices + Wk_ENERGA
-    buy_prices = netto_prices * (1 + VAT) + tarifs
-    sell_prices = sell_prices * ADDITIONAL_HELPER_SELLING
-    
-    return buy_prices, sell_prices, ENEA_MONTHLY_COST
-
-def calculate_pge_prices(prices, sell_prices, tariff = "G11", static_prices=False):
-    tarifs = 0
-    if tariff == "G11":
-        tarifs = G11_TAURON
-    elif tariff == "G12":
-        tarifs = G12_TAURON
-    elif tariff == "G13":
-        tarifs = G13_TAURON
-    else:
-        print(f"tariff = {tariff} is not possible for enea")
+def register_provider(name, **params):
+    unknown = set(params) - set(PROVIDER_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown provider parameters {sorted(unknown)}")
+    PROVIDERS[name] = {**PROVIDER_DEFAULTS, **params}
 
 
-    if static_prices:
-        prices = np.full(SIZE, PGE_STATIC_KWH) + tarifs
-        return prices, sell_prices, PGE_MONTHLY_COST_STATIC
-    
-    prices = np.maximum(PGE_MIN_PRICE_CAP, prices) + tarifs
-    netto_prices = prices + CURRENT_A + K_PGE
-    buy_prices = netto_prices * (1 + VAT) + tarifs
-    sell_prices = sell_prices * ADDITIONAL_HELPER_SELLING
-    
-    return buy_prices, sell_prices, PGE_MONTHLY_COST
-
-def calculate_tauron_prices(prices, sell_prices, tariff = "G11", static_prices=False, date="2025-03-03"):
-    tarifs = 0
-    if tariff == "G11":
-        tarifs = G11_TAURON
-    elif tariff == "G12":
-        tarifs = G12_TAURON
-    elif tariff == "G13":
-        tarifs = G13_TAURON
-    elif tariff == "G14":
-        file_path = f"../data_months/kompas_energetyczny/{date}.csv"
-        tarifs = np.array((pd.read_csv(file_path).values).flatten())
-    else:
-       print("wrong tarrif!!!!")
+register_provider("enea", fees=(CURRENT_A, B_ENEA), static_kwh=ENEA_STATIC_KWH,
+                  monthly_cost=ENEA_MONTHLY_COST, monthly_cost_static=ENEA_MONTHLY_COST_STATIC)
+register_provider("energa", fees=(Wk_ENERGA,), static_kwh=ENERGA_STATIC_KWH,
+                  monthly_cost=ENERGA_MONTHLY_COST, monthly_cost_static=ENERGA_MONTHLY_COST_STATIC)
+# PGE adds the tariff to the wholesale price before its fees as well
+register_provider("pge", fees=(CURRENT_A, K_PGE), net_floor=PGE_MIN_PRICE_CAP, tariff_in_net=True, static_kwh=PGE_STATIC_KWH,
+                  monthly_cost=PGE_MONTHLY_COST, monthly_cost_static=PGE_MONTHLY_COST_STATIC)
+register_provider("tauron", fees=(SC_TAUTRON,), gross_floor=TAURON_MIN_PRICE_CAP, static_kwh=TAURON_STATIC_KWH,
+                  monthly_cost=TAURON_MONTHLY_COST, monthly_cost_static=TAURON_MONTHLY_COST_STATIC,
+                  tariffs=("G11", "G12", "G13", DYNAMIC_TARIFF))
+
+
+def _column(providers, name, missing):
+    return np.array([missing if PROVIDERS[p][name] is None else PROVIDERS[p][name] for p in providers], dtype=np.float64)
+
 
+def _tariff(provider, tariff, g14, dates):
+    if tariff not in PROVIDERS[provider]["tariffs"]:
+        print(f"tariff = {tariff} is not possible for {provider}")
+        return np.zeros(SIZE)
+    if tariff == DYNAMIC_TARIFF:
+        if g14 is not None:
+            return np.asarray(g14, dtype=np.float64)
+        return np.stack([read_day("kompas_energetyczny", date) for date in np.atleast_1d(dates)])
+    return TARIFFS[tariff]
+
+
+def price_providers(prices, sell_prices, providers=None, tariff="G11", static_prices=False, g14=None, dates=None):
+    """
+    Buy and sell prices of every provider for prices/sell_prices of shape
+    (96,) or (days, 96), in one broadcast over (providers, days, 96).
+    g14 holds the G14 tariff with the shape of prices; when None it is read
+    from the store for dates.
+
+    Returns (buy, sell, monthly_cost): buy and sell have a leading provider
+    axis, monthly_cost is (providers,). providers defaults to all of PROVIDERS.
+    """
+    providers = list(PROVIDERS) if providers is None else list(providers)
+    for provider in providers:
+        if provider not in PROVIDERS:
+            raise ValueError("Wrong provider")
+    prices = np.asarray(prices, dtype=np.float64)
+    sell_prices = np.asarray(sell_prices, dtype=np.float64)
+    axes = (slice(None),) + (None,) * prices.ndim    # (providers,) -> (providers, 1, ..., 1)
+
+    tariffs = np.stack([np.broadcast_to(_tariff(p, tariff, g14, dates), prices.shape) for p in providers])
     if static_prices:
-        prices = np.full(SIZE, TAURON_STATIC_KWH) + tarifs
-        return prices, sell_prices, TAURON_MONTHLY_COST_STATIC
-    netto_prices = prices + SC_TAUTRON
-    brutto_prices = netto_prices * (1 + VAT)
-    buy_prices = np.maximum(TAURON_MIN_PRICE_CAP,brutto_prices) + tarifs
-    sell_prices = sell_prices * ADDITIONAL_HELPER_SELLING
-    
-    return buy_prices, sell_prices, TAURON_MONTHLY_COST
\ No newline at end of file
+        buy = _column(providers, "static_kwh", np.nan)[axes] + tariffs
+        sell = np.broadcast_to(sell_prices, buy.shape).copy()
+        return buy, sell, _column(providers, "monthly_cost_static", 0)
+
+    net = np.maximum(_column(providers, "net_floor", -np.inf)[axes], prices) + _column(providers, "tariff_in_net", 0)[axes] * tariffs
+    for i in range(max(len(PROVIDERS[p]["fees"]) for p in providers)):
+        net = net + np.array([PROVIDERS[p]["fees"][i] if i < len(PROVIDERS[p]["fees"]) else 0.0 for p in providers])[axes]
+    gross = net * (1 + _column(providers, "vat", 0))[axes]
+    buy = np.maximum(_column(providers, "gross_floor", -np.inf)[axes], gross) + tariffs
+    sell = sell_prices * _column(providers, "sell_factor", 1)[axes]
+    return buy, sell, _column(providers, "monthly_cost", 0)
@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+import numpy as np
+
+from backend.scripts.making_data_script import usage_for_dates
+from backend.const import BATTERIES
+from battery_handler.battery_handler import Battery
+from calculator import calculate_chunk, needed_series, settle_period
+from dataset import DATA_DIR, load_range, load_store, to_day
+from linear import CHAIN
+from schedule_cache import CACHE_VERSION, source_digest
+
+# Materialized total_profit: the settled costs of every (day, scenario) are
+# stored once, per scenario the running totals total_profit reduces them to
+# are kept next to them. update() only optimises days the store has and the
+# table has not; days arriving in order are added to the totals, an older day
+# (backfill) makes the totals be summed again from the stored days. Either way
+# the sums are taken in day order, so the profit is the one total_profit
+# returns for the same days. Every stored day keeps the digest of its input
+# series and the version of the code that settled it: a re-ingested day or
+# changed code makes the day be optimised again.
+#
+# The API answers from the stored totals: a scenario that is not stored yet
+# is optimised once on its first request. refresh() (run at API startup and
+# after the scrapers) keeps the SERVED_SCENARIOS on every point of
+# DAILY_USAGE_GRID and every other scenario requested within MAX_IDLE_DAYS
+# up to date, and drops the others.
+
+RESULTS_DB = os.path.join(DATA_DIR, "results.sqlite")
+
+# modules whose code decides a day's settled costs
+CODE_MODULES = ("calculator", "linear", "dp_dispatch", "algoritms", "providers", "backend.const",
+                "backend.scripts.making_data_script", "battery_handler.battery_handler")
+
+DAILY_USAGE_GRID = (2.5, 5.0, 7.5, 10.0, 12.5, 15.0, 20.0)
+MAX_IDLE_DAYS = 30
+
+# scenarios the API answers, by name: (index in BATTERIES, scenario without daily_usage)
+SERVED_SCENARIOS = {
+    "estimate_savings": (2, {"load_to_sell": True, "provider": "pge", "switching_from_static": False, "solar_avaialable": False,
+                             "tariff": "G13", "staying_static": False, "starting_tariff": "G11"}),
+}
+
+# bump when the tables change, older files are rebuilt
+_SCHEMA_VERSION = 3
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenarios (scenario TEXT PRIMARY KEY, params TEXT NOT NULL, used REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS days (
+    scenario TEXT NOT NULL, day TEXT NOT NULL,
+    cost REAL NOT NULL, baseline REAL NOT NULL, sold REAL NOT NULL, bought REAL NOT NULL,
+    month_cost REAL NOT NULL, base_month_cost REAL NOT NULL,
+    digest TEXT NOT NULL, version TEXT NOT NULL,
+    PRIMARY KEY (scenario, day)
+);
+CREATE TABLE IF NOT EXISTS aggregates (
+    scenario TEXT PRIMARY KEY, days INTEGER NOT NULL, last_day TEXT,
+    cost REAL NOT NULL, baseline REAL NOT NULL, sold REAL NOT NULL, bought REAL NOT NULL,
+    max_daily_profit REAL, month_cost REAL NOT NULL, base_month_cost REAL NOT NULL
+);
+"""
+
+
+def scenario_params(battery: Battery, load_to_sell=True, provider="enea", switching_from_static=False, solar_avaialable=False,
+                    daily_usage=5.0, tariff="G11", staying_static=False, starting_tariff="G11", usage_seed=0, solver=CHAIN) -> dict:
+    """total_profit's arguments that change the per-day results, battery by its attributes."""
+    return {
+        "battery": {name: value for name, value in sorted(vars(battery).items())},
+        "load_to_sell": load_to_sell, "provider": provider, "switching_from_static": switching_from_static,
+        "solar_avaialable": solar_avaialable, "daily_usage": float(daily_usage), "tariff": tariff,
+        "staying_static": staying_static, "starting_tariff": starting_tariff, "usage_seed": usage_seed, "solver": solver,
+    }
+
+
+def scenario_key(params: dict) -> str:
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+
+def scenario_battery(attributes: dict) -> Battery:
+    """The Battery whose attributes scenario_params stored, through its constructor."""
+    return Battery(price=attributes["price"], capacity=attributes["capacity"], DoD=attributes["DoD"], efficiency=attributes["efficiency"],
+                   life_cycles=attributes["life_cycles"], is_grant_reduction=attributes["grant_reduction"] > 0,
+                   charge_level=attributes["charge_level"], socket_amperage=attributes["socket_amperage"],
+                   socket_voltage=attributes["socket_voltage"])
+
+
+def code_version() -> str:
+    return f"{CACHE_VERSION}:{source_digest(CODE_MODULES)}"
+
+
+def day_digests(store, series, dates) -> dict:
+    """{day: SHA-1 of the day's rows of every series} for dates of the store."""
+    if len(dates) == 0:
+        return {}
+    first = store.index_of(dates[0])
+    blocks = [np.round(store.days(name, dates[0], dates[-1]), 8) for name in series]
+    digests = {}
+    for date in dates:
+        i = store.index_of(date) - first
+        digest = hashlib.sha1()
+        for block in blocks:
+            digest.update(block[i].tobytes())
+        digests[str(date)] = digest.hexdigest()
+    return digests
+
+
+class ResultsStore:
+    """Per-(day, scenario) costs and per-scenario totals in one SQLite file."""
+
+    def __init__(self, path: str = RESULTS_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._created = False
+
+    def _connect(self):
+        if not self._created:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with closing(sqlite3.connect(self.path)) as db, db:
+                if db.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+                    db.executescript("DROP TABLE IF EXISTS scenarios; DROP TABLE IF EXISTS days; DROP TABLE IF EXISTS aggregates;")
+                    db.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+                db.executescript(_SCHEMA)
+            self._created = True
+        return sqlite3.connect(self.path)
+
+    def update(self, battery: Battery, **scenario) -> int:
+        """
+        Optimises and stores the scenario's days missing from the table or
+        stored from other input data or code; returns how many were (re)computed.
+        """
+        params = scenario_params(battery, **scenario)
+        key = scenario_key(params)
+        series = needed_series(params["provider"], params["solar_avaialable"], params["tariff"], params["starting_tariff"])
+        with self._lock:
+            with closing(self._connect()) as db:
+                stored = {day: (digest, version) for day, digest, version in
+                          db.execute("SELECT day, digest, version FROM days WHERE scenario = ?", (key,))}
+            store = load_store()
+            digests = day_digests(store, series, store.common_dates(series))
+            version = code_version()
+            new_days = [day for day, digest in digests.items() if stored.get(day) != (digest, version)]
+            if not new_days:
+                return 0
+
+            data = load_range(new_days[0], new_days[-1], series=series, policy="skip")
+            wanted = set(new_days)
+            rows = [i for i, date in enumerate(data.dates) if str(to_day(date)) in wanted]
+            dates = [data.dates[i] for i in rows]
+            usage_days = usage_for_dates(dates, total_usage=params["daily_usage"], seed=params["usage_seed"])
+            days = [(data.prices[i], data.sell_prices[i], usage, data.solar[i] if params["solar_avaialable"] else None,
+                     data.g14[i] if data.g14 is not None else None, date) for i, date, usage in zip(rows, dates, usage_days)]
+            results = calculate_chunk(days, battery, params["load_to_sell"], params["provider"], params["switching_from_static"],
+                                      params["tariff"], params["staying_static"], params["starting_tariff"], params["solver"])
+            records = [(key, str(to_day(date)), float(res_algos), float(res_benchmark), float(selling_buying["sold"]),
+                        float(selling_buying["bought"]), float(month_cost), float(base_month_cost), digests[str(to_day(date))], version)
+                       for date, (res_algos, res_benchmark, selling_buying, month_cost, base_month_cost) in zip(dates, results)]
+
+            with closing(self._connect()) as db, db:
+                db.execute("INSERT OR IGNORE INTO scenarios VALUES (?, ?, ?)", (key, json.dumps(params, sort_keys=True), time.time()))
+                db.executemany("INSERT OR REPLACE INTO days VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", records)
+                aggregate = db.execute("SELECT * FROM aggregates WHERE scenario = ?", (key,)).fetchone()
+                if aggregate is not None and aggregate[2] is not None and records[0][1] > aggregate[2]:
+                    aggregate = self._add(aggregate, records)
+                else:
+                    # first days, a backfill or recomputed days: sum all stored days again, in order
+                    ordered = db.execute("SELECT * FROM days WHERE scenario = ? ORDER BY day", (key,)).fetchall()
+                    aggregate = self._add((key, 0, None, 0.0, 0.0, 0.0, 0.0, None, 0.0, 0.0), ordered)
+                db.execute("INSERT OR REPLACE INTO aggregates VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", aggregate)
+            return len(records)
+
+    @staticmethod
+    def _add(aggregate, records):
+        key, days, last_day, cost, baseline, sold, bought, max_daily_profit, month_cost, base_month_cost = aggregate
+        for _, day, day_cost, day_baseline, day_sold, day_bought, month_cost, base_month_cost, *_ in records:
+            days += 1
+            last_day = day
+            cost += day_cost
+            baseline += day_baseline
+            sold += day_sold
+            bought += day_bought
+            daily_profit = day_baseline - day_cost
+            max_daily_profit = daily_profit if max_daily_profit is None else max(max_daily_profit, daily_profit)
+        return key, days, last_day, cost, baseline, sold, bought, max_daily_profit, month_cost, base_month_cost
+
+    def summary(self, battery: Battery, update: bool = True, touch: bool = False, **scenario) -> dict | None:
+        """
+        total_profit of the scenario from the stored totals (None when nothing
+        is stored): profit, months, monthly_profit, payback_months and
+        max_daily_profit. update=True first adds the days that arrived since.
+        touch=True marks the scenario as used, refresh() keeps it.
+        """
+        if update:
+            self.update(battery, **scenario)
+        key = scenario_key(scenario_params(battery, **scenario))
+        with closing(self._connect()) as db, db:
+            aggregate = db.execute("SELECT * FROM aggregates WHERE scenario = ?", (key,)).fetchone()
+            if touch:
+                db.execute("UPDATE scenarios SET used = ? WHERE scenario = ?", (time.time(), key))
+        if aggregate is None or aggregate[1] == 0:
+            return None
+        _, days, last_day, cost, baseline, sold, bought, max_daily_profit, month_cost, base_month_cost = aggregate
+        months = float(days) / 30.0
+        profit = settle_period([cost], [baseline], {"sold": sold, "bought": bought}, months, month_cost, base_month_cost)
+        monthly_profit = profit / months
+        return {
+            "days": days,
+            "last_day": last_day,
+            "months": months,
+            "profit": profit,
+            "monthly_profit": monthly_profit,
+            "payback_months": battery.get_real_price() / monthly_profit if monthly_profit > 0 else np.inf,
+            "max_daily_profit": max_daily_profit,
+        }
+
+    def interpolate(self, battery: Battery, daily_usage: float, **scenario) -> dict | None:
+        """
+        Approximation of summary() for a daily_usage inside DAILY_USAGE_GRID,
+        linear between its two neighbouring grid points (the profit is not
+        linear in the usage, expect a few tenths of a percent off; summary()
+        of the exact scenario is what the API serves). ValueError outside the
+        grid. Reads the stored totals only; None when refresh() has not
+        stored them yet.
+        """
+        grid = np.asarray(DAILY_USAGE_GRID)
+        usage = float(daily_usage)
+        if not grid[0] <= usage <= grid[-1]:
+            raise ValueError(f"daily_usage {usage} outside of DAILY_USAGE_GRID {grid[0]}..{grid[-1]}")
+        upper = int(np.searchsorted(grid, usage))
+        lower = upper if grid[upper] == usage else upper - 1
+        low = self.summary(battery, update=False, daily_usage=grid[lower], **scenario)
+        high = self.summary(battery, update=False, daily_usage=grid[upper], **scenario)
+        if low is None or high is None:
+            return None
+        weight = 0.0 if upper == lower else (usage - grid[lower]) / (grid[upper] - grid[lower])
+        result = dict(low)
+        for name in ("profit", "monthly_profit", "max_daily_profit"):
+            result[name] = (1 - weight) * low[name] + weight * high[name]
+        monthly_profit = result["monthly_profit"]
+        result["payback_months"] = battery.get_real_price() / monthly_profit if monthly_profit > 0 else np.inf
+        return result
+
+    def refresh(self, max_idle_days: float = MAX_IDLE_DAYS) -> int:
+        """
+        update() for the SERVED_SCENARIOS on every DAILY_USAGE_GRID point and
+        for every other stored scenario used within max_idle_days, e.g. after
+        new day files were written; the other stored scenarios are dropped.
+        Returns the days added.
+        """
+        jobs = {}
+        for battery_index, scenario in SERVED_SCENARIOS.values():
+            for daily_usage in DAILY_USAGE_GRID:
+                params = {**scenario, "daily_usage": daily_usage}
+                jobs[scenario_key(scenario_params(BATTERIES[battery_index], **params))] = (BATTERIES[battery_index], params)
+
+        with closing(self._connect()) as db:
+            stored = [(key, json.loads(params), used) for key, params, used in db.execute("SELECT scenario, params, used FROM scenarios")]
+        idle = [(key,) for key, _, used in stored if key not in jobs and used < time.time() - max_idle_days * 86400]
+        if idle:
+            with closing(self._connect()) as db, db:
+                for table in ("days", "aggregates", "scenarios"):
+                    db.executemany(f"DELETE FROM {table} WHERE scenario = ?", idle)
+        idle = {key for (key,) in idle}
+
+        for key, params, _ in stored:
+            if key not in jobs and key not in idle:
+                battery = scenario_battery(params.pop("battery"))
+                if scenario_key(scenario_params(battery, **params)) != key:
+                    # e.g. set_grant after construction, the constructor cannot give the stored battery back
+                    print(f"scenario {key}: battery cannot be rebuilt, not refreshed")
+                    continue
+                jobs[key] = (battery, params)
+        return sum(self.update(battery, **params) for battery, params in jobs.values())
+
+
+RESULTS = ResultsStore()
+
+
+if __name__ == "__main__":
+    # run after the scrapers: brings every stored scenario up to date
+    print(f"{RESULTS.refresh()} new scenario days")
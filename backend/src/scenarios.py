@@ -0,0 +1,132 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from backend.const import BATTERIES
+from calculator import PricedDays, baseline_costs, load_days, needed_series, net_usages, tariff_prices, schedule_days, settle_days, settle_period
+from dataset import to_day
+from linear import CHAIN
+
+# Scenario grid over provider x tariff x starting_tariff x load_to_sell x
+# staying_static x switching_from_static x battery. Every stage is computed
+# once per the scenario fields it depends on:
+#   dataset + usage  - series set (needed_series: provider, tariffs, solar)
+#   tariff prices    - dataset, provider, tariff, staying_static
+#   baseline         - dataset, provider, starting_tariff, switching_from_static
+#   schedules        - tariff prices, battery, load_to_sell
+# Only the schedules run on the process pool; a scenario is then the
+# settle_period of its schedules' costs against its baseline.
+
+SCENARIO_FIELDS = ("provider", "tariff", "starting_tariff", "load_to_sell", "staying_static", "switching_from_static", "battery")
+
+_STAGES = None
+
+
+def _init(stages):
+    global _STAGES
+    _STAGES = stages
+
+
+def _schedule(job, solver, rolling):
+    pricing_key, battery_index, load_to_sell = job
+    dataset_key = pricing_key[0]
+    dates, prices, usages = _STAGES["datasets"][dataset_key]
+    buy_prices, sell_prices, month_const_cost_1 = _STAGES["pricing"][pricing_key]
+    battery = _STAGES["batteries"][battery_index]
+    priced = PricedDays(dates, prices, usages, buy_prices, sell_prices, None, None, month_const_cost_1, None)
+    selling_buying = {"sold": 0, "bought": 0}
+    results_michal, _ = settle_days(priced, battery, schedule_days(priced, battery, load_to_sell, solver, rolling), selling_buying, baseline=False)
+    return results_michal, selling_buying
+
+
+def scenario_grid(batteries=BATTERIES,
+                  providers=("enea",),
+                  tariffs=("G11",),
+                  starting_tariffs=("G11",),
+                  load_to_sell=(True,),
+                  staying_static=(False,),
+                  switching_from_static=(False,),
+                  solar_avaialable=False,
+                  daily_usage=5.0,
+                  start_date=None,
+                  end_date=None,
+                  gap_policy="skip",
+                  usage_seed=0,
+                  solver=CHAIN,
+                  rolling=False,
+                  workers=None) -> pd.DataFrame:
+    """
+    Every combination of the given values, settled like total_profit with
+    batched schedules (calculate_days). Each scenario sees the same days as
+    total_profit would for it. The solver defaults to total_profit's (chain,
+    exact); solver="dp" is much faster for large grids but approximate, its
+    costs come out slightly higher. workers=1 runs in-process.
+
+    Returns one row per scenario: the SCENARIO_FIELDS (battery is its index
+    in batteries), capacity, days, months, profit, monthly_profit and
+    payback_months (price after grant over the monthly profit), and the
+    solver the schedules came from.
+    """
+    batteries = list(batteries)
+    scenarios = list(itertools.product(providers, tariffs, starting_tariffs, load_to_sell, staying_static, switching_from_static, range(len(batteries))))
+
+    # dataset, usage and prices, in the parent
+    datasets, pricing, baselines, loaded = {}, {}, {}, {}
+    jobs = []
+    for provider, tariff, starting_tariff, to_sell, static, switching, battery_index in scenarios:
+        dataset_key = tuple(needed_series(provider, solar_avaialable, tariff, starting_tariff))
+        if dataset_key not in datasets:
+            data, usage_days = load_days(provider, solar_avaialable, tariff, starting_tariff, daily_usage, start_date, end_date, gap_policy, usage_seed)
+            loaded[dataset_key] = data
+            datasets[dataset_key] = ([str(to_day(date)) for date in data.dates], np.asarray(data.prices), net_usages(data, usage_days, solar_avaialable))
+        data = loaded[dataset_key]
+        pricing_key = (dataset_key, provider, tariff, static)
+        if pricing_key not in pricing:
+            pricing[pricing_key] = tariff_prices(data, provider, tariff, static)
+        baseline_key = (dataset_key, provider, starting_tariff, switching)
+        if baseline_key not in baselines:
+            base_buy_prices, _, month_const_cost_2 = tariff_prices(data, provider, starting_tariff, switching)
+            baselines[baseline_key] = (baseline_costs(datasets[dataset_key][2], base_buy_prices), month_const_cost_2)
+        jobs.append((pricing_key, battery_index, to_sell))
+
+    # optimisation, once per distinct schedule
+    unique_jobs = list(dict.fromkeys(jobs))
+    stages = {"datasets": datasets, "pricing": pricing, "batteries": batteries}
+    args = ([solver] * len(unique_jobs), [rolling] * len(unique_jobs))
+    if workers == 1:
+        _init(stages)
+        results = list(map(_schedule, unique_jobs, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init, initargs=(stages,)) as pool:
+            results = list(pool.map(_schedule, unique_jobs, *args))
+    schedules = dict(zip(unique_jobs, results))
+
+    rows = []
+    for scenario, job in zip(scenarios, jobs):
+        provider, tariff, starting_tariff, to_sell, static, switching, battery_index = scenario
+        pricing_key = job[0]
+        dataset_key = pricing_key[0]
+        results_michal, selling_buying = schedules[job]
+        baseline, month_const_cost_2 = baselines[(dataset_key, provider, starting_tariff, switching)]
+        months = float(len(datasets[dataset_key][0])) / 30.0
+        profit = settle_period(results_michal, baseline, selling_buying, months, pricing[pricing_key][2], month_const_cost_2)
+        battery = batteries[battery_index]
+        monthly_profit = profit / months
+        rows.append({
+            **dict(zip(SCENARIO_FIELDS, scenario)),
+            "capacity": battery.capacity,
+            "days": len(datasets[dataset_key][0]),
+            "months": months,
+            "profit": profit,
+            "monthly_profit": monthly_profit,
+            "payback_months": battery.get_real_price() / monthly_profit if monthly_profit > 0 else np.inf,
+            "solver": solver,
+        })
+    return pd.DataFrame(rows, columns=[*SCENARIO_FIELDS, "capacity", "days", "months", "profit", "monthly_profit", "payback_months", "solver"])
+
+
+if __name__ == "__main__":
+    table = scenario_grid(providers=("enea", "pge", "tauron"), tariffs=("G11", "G12", "G13"), load_to_sell=(True, False))
+    print(table.sort_values("monthly_profit", ascending=False).head(20).to_string(index=False))
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import functools
+import hashlib
+import importlib.util
+import inspect
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# bump to invalidate every cached result, e.g. after a change in code the
+# source digest of memoize does not cover (constants, third-party solvers)
+CACHE_VERSION = 1
+
+CACHE_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data_months", "schedule_cache"))
+
+
+def _freeze(value):
+    """Marks the arrays of a result read-only, they are shared between callers."""
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+    elif isinstance(value, (tuple, list)):
+        for item in value:
+            _freeze(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _freeze(item)
+    return value
+
+
+def _feed(digest, value):
+    if isinstance(value, np.ndarray) or (hasattr(value, "to_numpy") and hasattr(value, "dtype")):
+        arr = np.ascontiguousarray(np.asarray(value, dtype=np.float64))
+        digest.update(repr(arr.shape).encode())
+        digest.update(arr.tobytes())
+    elif hasattr(value, "__dict__"):
+        # e.g. a Battery: every attribute is part of the key
+        digest.update(type(value).__name__.encode())
+        for name, attr in sorted(vars(value).items()):
+            digest.update(name.encode())
+            _feed(digest, attr)
+    else:
+        digest.update(repr(value).encode())
+
+
+class ScheduleCache:
+    """
+    Two-tier memo cache of optimiser results.
+
+    Keys are a SHA-1 of the function name and all (default-filled) arguments,
+    arrays by their bytes and objects such as Battery by their attributes.
+    The memory tier is an LRU of maxsize entries; the disk tier keeps one
+    pickle per key in cache_dir, capped at max_disk_bytes with the least
+    recently used files (by mtime) removed first. cache_dir=None disables the
+    disk tier. Returned arrays are read-only and shared between callers.
+    """
+
+    def __init__(self, maxsize: int = 2048, cache_dir: str | None = CACHE_DIR, max_disk_bytes: int = 256 * 2**20):
+        self.maxsize = maxsize
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.enabled = True
+        self._entries = OrderedDict()   # key -> result
+        self._lock = threading.Lock()
+        self._disk_bytes = None         # scanned lazily
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+    @staticmethod
+    def key(name: str, *values) -> str:
+        digest = hashlib.sha1(name.encode())
+        for value in values:
+            _feed(digest, value)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def _remember(self, key: str, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: str, compute, cacheable=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return self._entries[key]
+
+        if self.cache_dir:
+            path = self._path(key)
+            try:
+                with open(path, "rb") as f:
+                    value = _freeze(pickle.load(f))
+                os.utime(path)
+                with self._lock:
+                    self.disk_hits += 1
+                    self._remember(key, value)
+                return value
+            except (OSError, EOFError, pickle.UnpicklingError):
+                pass
+
+        value = _freeze(compute())
+        with self._lock:
+            self.misses += 1
+            if cacheable is not None and not cacheable(value):
+                return value
+            self._remember(key, value)
+        if self.cache_dir:
+            self._write(key, value)
+        return value
+
+    def _write(self, key: str, value):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        size = os.path.getsize(tmp)
+        os.replace(tmp, path)
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+            else:
+                self._disk_bytes += size
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def _disk_files(self):
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".pkl"):
+                stat = entry.stat()
+                files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return files
+
+    def _evict_disk(self):
+        # least recently used first, down to 90% of the cap
+        files = sorted(self._disk_files())
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= 0.9 * self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.disk_evictions += 1
+        self._disk_bytes = total
+
+    def clear(self, disk: bool = False):
+        with self._lock:
+            self._entries.clear()
+            if disk and self.cache_dir and os.path.isdir(self.cache_dir):
+                for _, _, path in self._disk_files():
+                    os.remove(path)
+                self._disk_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            requests = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_evictions": self.disk_evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "disk_bytes": self._disk_bytes,
+                "max_disk_bytes": self.max_disk_bytes,
+                "hit_rate": round(hits / requests, 4) if requests else 0.0,
+            }
+
+
+SCHEDULE_CACHE = ScheduleCache()
+
+
+def source_digest(modules) -> str:
+    """SHA-1 of the source files of the given modules (by import name)."""
+    digest = hashlib.sha1()
+    for name in modules:
+        spec = importlib.util.find_spec(name)
+        if spec is None or not spec.origin or not os.path.isfile(spec.origin):
+            digest.update(name.encode())
+            continue
+        with open(spec.origin, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def memoize(cache: ScheduleCache = SCHEDULE_CACHE, depends=(), cacheable=None):
+    """
+    Caches a function's results in cache, keyed on all its arguments, on
+    CACHE_VERSION and on the source of the function's module and of the
+    modules in depends, so results of older code are never served.
+    cacheable(result) -> bool, when given, decides whether a result is kept.
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+        name = f"{fn.__module__}.{fn.__qualname__}"
+        version = None
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            nonlocal version
+            if not cache.enabled:
+                return fn(*args, **kwargs)
+            if version is None:
+                version = f"{CACHE_VERSION}:{source_digest((fn.__module__, *depends))}"
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = cache.key(name, version, *(part for item in bound.arguments.items() for part in item))
+            return cache.get(key, lambda: fn(*args, **kwargs), cacheable)
+        return wrapper
+    return decorator
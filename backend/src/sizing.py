@@ -0,0 +1,68 @@
+import pandas as pd
+
+from battery_handler.consts import DEFAULT_VOLTAGE
+from battery_handler.generate_bat_params import make_battery
+from linear import CHAIN
+from scenarios import scenario_grid
+
+# Battery sizing sweep over capacity x socket power: a scenario_grid over
+# the batteries of the grid points with every other scenario field fixed,
+# so the dataset, the provider prices and the baseline are computed once and
+# only the schedules of every grid point run on the pool.
+
+
+def socket_amperage(power_kw: float, voltage: float = DEFAULT_VOLTAGE) -> float:
+    return power_kw * 1000 / voltage
+
+
+def sizing_sweep(capacities,
+                 socket_powers=(DEFAULT_VOLTAGE * 10 / 1000,),
+                 load_to_sell=True,
+                 provider="enea",
+                 switching_from_static=False,
+                 solar_avaialable=False,
+                 daily_usage=5.0,
+                 tariff="G11",
+                 staying_static=False,
+                 starting_tariff="G11",
+                 start_date=None,
+                 end_date=None,
+                 gap_policy="skip",
+                 usage_seed=0,
+                 solver=CHAIN,
+                 rolling=False,
+                 grant=True,
+                 workers=None):
+    """
+    Evaluates make_battery(capacity) charged from a socket of every power
+    (kW, at DEFAULT_VOLTAGE) over the date range, with total_profit's
+    settlement and solver (see scenario_grid). workers=1 runs in-process.
+
+    Returns (monthly_profit, payback_months): DataFrames indexed by capacity
+    with one column per socket power. Payback is the battery's price after
+    grant over the monthly profit, inf when it does not pay back.
+    """
+    batteries = []
+    for capacity in capacities:
+        for power_kw in socket_powers:
+            battery = make_battery(capacity, socket_amperage=socket_amperage(power_kw))
+            battery.set_grant(grant)
+            batteries.append(battery)
+
+    table = scenario_grid(batteries, providers=(provider,), tariffs=(tariff,), starting_tariffs=(starting_tariff,),
+                          load_to_sell=(load_to_sell,), staying_static=(staying_static,), switching_from_static=(switching_from_static,),
+                          solar_avaialable=solar_avaialable, daily_usage=daily_usage, start_date=start_date, end_date=end_date,
+                          gap_policy=gap_policy, usage_seed=usage_seed, solver=solver, rolling=rolling, workers=workers)
+    table = table.sort_values("battery")
+
+    shape = (len(capacities), len(socket_powers))
+    index = pd.Index(capacities, name="capacity_kwh")
+    columns = pd.Index(socket_powers, name="socket_power_kw")
+    return tuple(pd.DataFrame(table[name].to_numpy().reshape(shape), index=index, columns=columns)
+                 for name in ("monthly_profit", "payback_months"))
+
+
+if __name__ == "__main__":
+    monthly_profit, payback = sizing_sweep(capacities=(2.5, 5, 7.5, 10, 15), socket_powers=(2.3, 3.7, 7.4, 11))
+    print("monthly profit [zł]", monthly_profit.round(2), sep="\n")
+    print("payback [months]", payback.round(1), sep="\n")
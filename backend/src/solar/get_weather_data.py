@@ -8,11 +8,64 @@
 
 # Data used for solar radiation is "Satellite data", which is used due to its availibility. The more accurate "Ground station measurements" are not used due to their limited availability, but in future we should consider using them when available and use satellite data if not. For comparison go to https://pvlib-python.readthedocs.io/en/v0.11.2/user_guide/weather_data.html
 
+import hashlib
+import os
+
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 import pvlib.iotools
 
-def get_irradiation_data(latitude, longitude, start, end, surface_tilt=45, surface_azimuth=0):
+PVGIS_URL = 'https://re.jrc.ec.europa.eu/api/'
+RADDATABASE = "PVGIS-SARAH3"
+
+# Every (lat, lon, tilt, azimuth, dataset, year) is downloaded once and kept
+# as a compressed .npz (float32 columns + int64 timestamps), any sub-range
+# is then sliced from the cached years. Years from another API url (e.g. a
+# stand-in server) get a short hash of that url in the file name.
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data_months", "pvgis_cache")
+
+
+def _cache_path(cache_dir, latitude, longitude, surface_tilt, surface_azimuth, raddatabase, year, url=PVGIS_URL):
+  source = "" if url == PVGIS_URL else "_" + hashlib.sha1(url.rstrip("/").encode()).hexdigest()[:8]
+  return os.path.join(cache_dir, f"{raddatabase}_{latitude:.4f}_{longitude:.4f}_{surface_tilt:g}_{surface_azimuth:g}_{year}{source}.npz")
+
+
+def _save_year(path, data):
+  os.makedirs(os.path.dirname(path), exist_ok=True)
+  tmp = path + ".tmp.npz"
+  np.savez_compressed(
+    tmp,
+    index=data.index.as_unit("ns").asi8,
+    columns=np.array(data.columns, dtype=str),
+    values=data.to_numpy(dtype=np.float32),
+  )
+  os.replace(tmp, path)
+
+
+def _load_year(path):
+  with np.load(path) as cached:
+    index = pd.to_datetime(cached["index"], unit="ns", utc=True)
+    return pd.DataFrame(cached["values"].astype(np.float64), index=index, columns=list(cached["columns"]))
+
+
+def _fetch_year(latitude, longitude, year, surface_tilt, surface_azimuth, raddatabase, url):
+  poa_data, meta, inputs = pvlib.iotools.get_pvgis_hourly(
+    latitude=latitude, longitude=longitude, 
+    start=year, end=year,
+    raddatabase=raddatabase,
+    components=True,
+    surface_tilt=surface_tilt,
+    surface_azimuth=surface_azimuth, # 0 is South in PVGIS
+    outputformat='json',
+    usehorizon=True, userhorizon=None,
+    pvcalculation=False, peakpower=None, pvtechchoice='crystSi', mountingplace='free', loss=0, trackingtype=0, optimal_surface_tilt=False, optimalangles=False, url=url, map_variables=True, timeout=30
+  )
+  return poa_data
+
+
+def get_irradiation_data(latitude, longitude, start, end, surface_tilt=45, surface_azimuth=0,
+                         raddatabase=RADDATABASE, url=PVGIS_URL, cache_dir=CACHE_DIR, date_range=None):
   """
   Retrieve hourly solar irradiance data from PVGIS-SARAH3 for a given location 
   and time range.
@@ -24,6 +77,10 @@ def get_irradiation_data(latitude, longitude, start, end, surface_tilt=45, surfa
       end (int): End year for the data range.
       surface_tilt (int): Tilt angle of the surface in degrees. Default is 45.
       surface_azimuth (int): Azimuth angle of the surface in degrees. Default is 0 (south).
+      raddatabase (str): PVGIS radiation dataset. Default is PVGIS-SARAH3.
+      url (str): PVGIS API url, e.g. a local stand-in (stand_in_servers.py pvgis).
+      cache_dir (str | None): Directory of the per-year cache, None disables it.
+      date_range (tuple | None): (start_date, end_date) to slice from the years.
 
   Returns:
       pd.DataFrame: A DataFrame containing calculated POA irradiance values:
@@ -32,6 +89,7 @@ def get_irradiation_data(latitude, longitude, start, end, surface_tilt=45, surfa
   
   Notes:
       - The function uses PVGIS API to fetch solar data, specifically the SARAH3 dataset.
+      - Years already in cache_dir are not downloaded again, cached per url.
       - Typical Meteorological Year (TMY) data is stored in `backend/data/tmy_52.207_20.978_2005_2023.csv`.
       - Outputs can be visualized and saved to CSV for further analysis.
 
@@ -42,18 +100,20 @@ def get_irradiation_data(latitude, longitude, start, end, surface_tilt=45, surfa
       - https://re.jrc.ec.europa.eu/pvg_tools/en/tools.html
       - https://www.nrel.gov/docs/fy20osti/74768.pdf
   """
-  
-  poa_data, meta, inputs = pvlib.iotools.get_pvgis_hourly(
-    latitude=latitude, longitude=longitude, 
-    start=start, end=end,
-    raddatabase="PVGIS-SARAH3",
-    components=True,
-    surface_tilt=surface_tilt,
-    surface_azimuth=surface_azimuth, # 0 is South in PVGIS
-    outputformat='csv',
-    usehorizon=True, userhorizon=None,
-    pvcalculation=False, peakpower=None, pvtechchoice='crystSi', mountingplace='free', loss=0, trackingtype=0, optimal_surface_tilt=False, optimalangles=False, url='https://re.jrc.ec.europa.eu/api/', map_variables=True, timeout=30
-  )
+  years = []
+  for year in range(start, end + 1):
+    path = _cache_path(cache_dir, latitude, longitude, surface_tilt, surface_azimuth, raddatabase, year, url) if cache_dir else None
+    if path and os.path.exists(path):
+      years.append(_load_year(path))
+      continue
+    data = _fetch_year(latitude, longitude, year, surface_tilt, surface_azimuth, raddatabase, url)
+    if path:
+      _save_year(path, data)
+    years.append(data)
+
+  poa_data = pd.concat(years) if len(years) > 1 else years[0]
+  if date_range is not None:
+    poa_data = poa_data.loc[date_range[0]:date_range[1]].copy()
 
   poa_data["poa_diffuse"] = poa_data["poa_sky_diffuse"] + poa_data["poa_ground_diffuse"]
   poa_data["poa_global"] = poa_data["poa_direct"] + poa_data["poa_diffuse"]
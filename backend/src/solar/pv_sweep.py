@@ -0,0 +1,106 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from pvlib.location import Location
+from pvlib.modelchain import ModelChain
+from pvlib.pvsystem import PVSystem
+from pvlib.temperature import TEMPERATURE_MODEL_PARAMETERS
+
+from backend.const import SIZE
+from get_weather_data import get_irradiation_data, PVGIS_URL, CACHE_DIR
+from solar_cell import sam_table, to_day_matrix
+
+# Sweep over PV configurations: the SAM tables are read once in the parent,
+# only the selected module/inverter rows are sent to the workers. Plane of
+# array irradiance depends on (location, tilt, azimuth) only, so it is
+# fetched (and cached) once per orientation and all string layouts of that
+# orientation are evaluated in the same worker.
+
+WARSAW = {"latitude": 52.20672318295605, "longitude": 20.977651716685703, "tz": "Europe/Berlin", "altitude": 112}
+
+
+def config_grid(surface_tilts=(45,), surface_azimuths=(180,), modules_per_string=(8,), strings_per_inverter=(2,)):
+    """Every combination of the given values as a list of config dicts (pvlib azimuth, 180 is south)."""
+    return [
+        {"surface_tilt": tilt, "surface_azimuth": azimuth, "modules_per_string": modules, "strings_per_inverter": strings}
+        for tilt, azimuth, modules, strings in itertools.product(surface_tilts, surface_azimuths, modules_per_string, strings_per_inverter)
+    ]
+
+
+def _run_orientation(location, tilt, azimuth, layouts, module, inverter, temperature_params, poa_data, dates, resample_freq):
+    site = Location(latitude=location["latitude"], longitude=location["longitude"], tz=location["tz"], altitude=location["altitude"])
+    out = np.empty((len(layouts), len(dates), SIZE))
+    for i, (modules, strings) in enumerate(layouts):
+        system = PVSystem(surface_tilt=tilt,
+                          surface_azimuth=azimuth,
+                          module_parameters=module,
+                          inverter_parameters=inverter,
+                          temperature_model_parameters=temperature_params,
+                          modules_per_string=modules,
+                          strings_per_inverter=strings)
+        chain = ModelChain(system=system, location=site)
+        chain.run_model_from_poa(poa_data)
+        out[i] = to_day_matrix(chain.results.ac, dates, location["tz"], resample_freq)
+    return out
+
+
+def sweep(configs,
+          locations=(WARSAW,),
+          data_date_range=("2023-07-01", "2023-07-31"),
+          module_library='SandiaMod',
+          module_name='Canadian_Solar_CS5P_220M___2009_',
+          inverter_library='CECInverter',
+          inverter_name='ABB__PVI_3_0_OUTD_S_US__208V_',
+          temperature_model='open_rack_glass_glass',
+          resample_freq='15min',
+          workers=None,
+          pvgis_url=PVGIS_URL,
+          cache_dir=CACHE_DIR):
+    """
+    Evaluates every config (see config_grid) at every location.
+
+    Returns (ac, points, dates): ac has shape (len(locations) * len(configs),
+    days, 96) in kW, points[i] is the config of ac[i] merged with its location,
+    ordered location-major.
+    """
+    start_date, end_date = data_date_range
+    start_year, end_year = pd.to_datetime(start_date).year, pd.to_datetime(end_date).year
+    assert start_year >= 2018 and end_year <= 2023, "Data is available only till 2023."
+    dates = pd.date_range(start_date, end_date, freq="D")
+
+    module = sam_table(module_library)[module_name]
+    inverter = sam_table(inverter_library)[inverter_name]
+    temperature_params = TEMPERATURE_MODEL_PARAMETERS['sapm'][temperature_model]
+
+    points = [{**location, **config} for location in locations for config in configs]
+    groups = {}
+    for i, point in enumerate(points):
+        key = (point["latitude"], point["longitude"], point["tz"], point["altitude"], point["surface_tilt"], point["surface_azimuth"])
+        groups.setdefault(key, []).append(i)
+
+    ac = np.empty((len(points), len(dates), SIZE))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for (latitude, longitude, tz, altitude, tilt, azimuth), indices in groups.items():
+            # irradiance is fetched here, sequentially, so the PVGIS cache is filled once per orientation
+            poa_data = get_irradiation_data(latitude=latitude, longitude=longitude, start=start_year, end=end_year,
+                                            surface_tilt=tilt, surface_azimuth=azimuth,
+                                            url=pvgis_url, cache_dir=cache_dir, date_range=data_date_range)
+            location = {"latitude": latitude, "longitude": longitude, "tz": tz, "altitude": altitude}
+            layouts = [(points[i]["modules_per_string"], points[i]["strings_per_inverter"]) for i in indices]
+            future = pool.submit(_run_orientation, location, tilt, azimuth, layouts, module, inverter,
+                                 temperature_params, poa_data, dates, resample_freq)
+            futures[future] = indices
+        for future, indices in futures.items():
+            ac[indices] = future.result()
+    return ac, points, dates
+
+
+if __name__ == "__main__":
+    configs = config_grid(surface_tilts=(30, 45), surface_azimuths=(135, 180, 225), modules_per_string=(5, 8), strings_per_inverter=(1, 2))
+    ac, points, dates = sweep(configs, data_date_range=("2023-07-01", "2023-07-31"))
+    daily_kwh = ac.sum(axis=2) / 4
+    best = int(np.argmax(daily_kwh.sum(axis=1)))
+    print(f"{ac.shape=}, best config {points[best]}: {daily_kwh[best].mean():.2f} kWh/day")
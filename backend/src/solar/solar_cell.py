@@ -8,10 +8,34 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 import os
+from functools import lru_cache
 from dateutil.relativedelta import relativedelta
 
 
-from get_weather_data import get_irradiation_data
+from get_weather_data import get_irradiation_data, PVGIS_URL
+from backend.const import SIZE
+from dataset import write_days
+
+
+@lru_cache(maxsize=None)
+def sam_table(library: str) -> pd.DataFrame:
+    """SAM module/inverter database, loaded once per process."""
+    return pvlib.pvsystem.retrieve_sam(library)
+
+
+def to_day_matrix(ac, dates, tz, resample_freq="15min"):
+    """
+    Interpolates an AC series (W, any tz aware index) onto local 15-minute
+    slots and returns (days, 96) in kW. Every day has 96 slots on local wall
+    clock time, the repeated hour of the DST change is dropped like in the
+    day files.
+    """
+    local = ac.tz_convert(tz).tz_localize(None)
+    local = local[~local.index.duplicated()]
+    target = pd.date_range(start=dates[0], periods=len(dates) * SIZE, freq=resample_freq)
+    combined = local.reindex(local.index.union(target)).interpolate(method="time", limit_direction="both")
+    values = combined.reindex(target).to_numpy(dtype=np.float64) / 1000
+    return values.reshape(len(dates), SIZE)
 
 
 class PV:
@@ -37,8 +61,8 @@ class PV:
         """
 
         # Retrieve module and inverter specifications
-        modules = pvlib.pvsystem.retrieve_sam(module_library)
-        inverters = pvlib.pvsystem.retrieve_sam(inverter_library)
+        modules = sam_table(module_library)
+        inverters = sam_table(inverter_library)
         self.module = modules[module_name]
         self.inverter = inverters[inverter_name]
         
@@ -66,7 +90,8 @@ class PVModel:
                  altitude: float,
                  data_date_range: tuple = ("2023-07-01", "2023-07-01"),
                  csv_output_path: str = '../../data/ac_power_15min.csv',
-                 resample_freq: str = '15min'):
+                 resample_freq: str = '15min',
+                 pvgis_url: str = PVGIS_URL):
         """
         Initializes the PV system simulation.
         
@@ -80,6 +105,7 @@ class PVModel:
                                      for which AC power data is processed.
             csv_output_path (str): Path for the CSV output.
             resample_freq (str): Resampling frequency.
+            pvgis_url (str): PVGIS API url, irradiance years are cached on disk.
         """
         
         # Set up location
@@ -101,6 +127,7 @@ class PVModel:
         self.data_end = end_year
         self.csv_output_path = csv_output_path
         self.resample_freq = resample_freq
+        self.pvgis_url = pvgis_url
 
         # Calculate the AC output in specified intervals over the date range
         self.ac_series = self.__process_ac_data()
@@ -113,7 +140,9 @@ class PVModel:
         poa_data = get_irradiation_data(latitude=self.location.latitude,
                                         longitude=self.location.longitude,
                                         start=self.data_start,
-                                        end=self.data_end)
+                                        end=self.data_end,
+                                        date_range=self.data_date_range,
+                                        url=self.pvgis_url)
         # Run the model from the plane-of-array data
         for model in self.model_chains:
             model.run_model_from_poa(poa_data)
@@ -148,33 +177,42 @@ class PVModel:
         return ac_interpolated
 
 
-    def save_ac_data(self):
+    def day_matrix(self):
+        """AC output of the whole date range as (days, 96) kW on local time, with its dates."""
+        start_date, end_date = self.data_date_range
+        dates = pd.date_range(start_date, end_date, freq="D")
+        return to_day_matrix(self.ac_series, dates, self.location.tz, self.resample_freq), dates
+
+    def save_ac_data(self, mode: str = "store"):
         """
-        Saves the processed AC power output data to a CSV file with an appropriate column name.
-        Only the output values are saved, without timestamps.
+        Saves the processed AC power output with the dates shifted by two years.
+
+        mode "store" writes the whole range in one block into the solar_output
+        series of the consolidated store, "csv" writes one CSV per day to
+        csv_output_path (only the output values, without timestamps), "both"
+        does both. Both use the local-time 96-slot days of day_matrix.
         """
+        if mode not in ("store", "csv", "both"):
+            raise ValueError(f"Unknown mode: {mode}")
+        values, dates = self.day_matrix()
+        shifted = [(date + relativedelta(years=2)).strftime("%Y-%m-%d") for date in dates]
+        if mode in ("store", "both"):
+            write_days("solar_output", shifted, values)
+            print(f"saved {len(shifted)} days ({shifted[0]} - {shifted[-1]}) to the store, energy generated = {values.sum() / 4:.1f} kWh")
+        if mode == "store":
+            return
+
         # Create the output directory if it doesn't exist
         print("save ac_data")
         if not os.path.exists(self.csv_output_path):
             print("new dir")
             os.makedirs(self.csv_output_path)
-        
-        # Convert the series into a DataFrame with a proper column name
-        df = pd.DataFrame({'Solar Output (kW)': self.ac_series.values / 1000})
-        
-        
-        # Iterate over unique dates and save separate CSV files
-        for date, group in df.groupby(self.ac_series.index.date):
-            new_date = date + relativedelta(years=2)
-            # Format back to "year:month:day"
-            date = new_date.strftime("%Y-%m-%d")
-            print(f"for date = {date}, energy generated =  {sum(group.values)}")
-            filename = os.path.join(self.csv_output_path, f"{date}.csv")
-            print(f"{filename=}")
-            group.to_csv(filename, index=False, header=True)
 
-        
-        
+        # Same local-time day rows as the store, one CSV per day
+        for date, day in zip(shifted, values):
+            print(f"for date = {date}, energy generated =  {day.sum() / 4:.3f} kWh")
+            filename = os.path.join(self.csv_output_path, f"{date}.csv")
+            pd.DataFrame({'Solar Output (kW)': day}).to_csv(filename, index=False, header=True)
 
     def plot_ac_data(self):
         """
@@ -186,11 +224,11 @@ class PVModel:
                             xlabel='Time')
         plt.show()
     
-    def run_all(self):
+    def run_all(self, mode: str = "store"):
         """
         Convenience method to run the model, process data, and optionally plot the results.
         """
-        self.save_ac_data()
+        self.save_ac_data(mode)
         # self.plot_ac_data()
 
 def function_for_michal_zmyslony(
@@ -212,7 +250,8 @@ def function_for_michal_zmyslony(
     altitude: float = 112,
     data_date_range: tuple = ("2023-07-01", "2023-07-01"),
     csv_output_path: str = '../../data_months/solar_output',
-    resample_freq: str = '15min'
+    resample_freq: str = '15min',
+    mode: str = "store"
 ):
     """
     Convenience function for Michal Zmyslony that creates a PV system and runs the simulation.
@@ -246,7 +285,7 @@ def function_for_michal_zmyslony(
     )
     
     # Run the simulation (this will plot and save the AC power data)
-    pv_model_instance.run_all()
+    pv_model_instance.run_all(mode)
     
     return pv_instance, pv_model_instance
 
@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+# the modules of backend/src import each other by bare name, backend.const from the repository root
+ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+for path in (ROOT, os.path.join(ROOT, "backend", "src")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from schedule_cache import SCHEDULE_CACHE
+
+
+@pytest.fixture(autouse=True)
+def schedule_cache(tmp_path, monkeypatch):
+    """The process-wide schedule cache, empty and on a temporary directory."""
+    monkeypatch.setattr(SCHEDULE_CACHE, "cache_dir", str(tmp_path / "schedule_cache"))
+    monkeypatch.setattr(SCHEDULE_CACHE, "_disk_bytes", None)
+    SCHEDULE_CACHE.clear()
+    yield SCHEDULE_CACHE
+    SCHEDULE_CACHE.clear()
+
+
+@pytest.fixture
+def no_schedule_cache(monkeypatch):
+    """Every schedule solved again, so equal results come from separate solves."""
+    monkeypatch.setattr(SCHEDULE_CACHE, "enabled", False)
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from algoritms import load_only_to_sell, load_only_to_sell_batch
+from backend.const import BATTERIES, SIZE
+
+
+def load_only_to_sell_reference(battery_load, buy_prices, sell_prices, battery):
+    """load_only_to_sell before the heap, with the O(n) window minimum."""
+    size = len(buy_prices)
+    free_capacity = np.full(size, battery.capacity) - battery_load
+    battery_usage_cost = battery.one_kwh_cost()
+
+    buy_time = np.zeros(size, dtype=float)
+    sell_time = np.zeros(size, dtype=float)
+
+    future_max = np.empty(size, dtype=float)
+    max_so_far = -np.inf
+    for i in range(size - 1, -1, -1):
+        max_so_far = max(max_so_far, sell_prices[i])
+        future_max[i] = max_so_far
+
+    buy_idx = None
+    for i in range(size - 1):
+        eff_buy = buy_prices[i] + battery_usage_cost
+        if buy_idx is None or eff_buy < buy_prices[buy_idx] + battery_usage_cost:
+            buy_idx = i
+        if (sell_prices[i] >= 0.95 * future_max[i] and
+            sell_prices[i] > buy_prices[buy_idx] + battery_usage_cost):
+            avail = free_capacity[buy_idx:i + 1].min()
+            if avail <= 0:
+                buy_idx += 1
+                continue
+            buy_time[buy_idx] += avail
+            sell_time[i] += avail
+            free_capacity[buy_idx:i + 1] -= avail
+            buy_idx = None
+
+    return buy_time, sell_time
+
+
+def random_days(seed, days=40):
+    rng = np.random.default_rng(seed)
+    battery = BATTERIES[seed % len(BATTERIES)]
+    buy_prices = rng.uniform(0.1, 1.2, (days, SIZE))
+    sell_prices = buy_prices * rng.uniform(0.5, 1.6, (days, SIZE))
+    # the schedule's own load, a part of the days uses the whole battery
+    battery_load = rng.uniform(0, battery.capacity, (days, SIZE)) * (rng.random((days, 1)) < 0.7)
+    battery_load[rng.random((days, SIZE)) < 0.1] = battery.capacity
+    return battery_load, buy_prices, sell_prices, battery
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_load_only_to_sell_matches_reference(seed):
+    battery_load, buy_prices, sell_prices, battery = random_days(seed)
+    for day in range(len(buy_prices)):
+        expected = load_only_to_sell_reference(battery_load[day], buy_prices[day], sell_prices[day], battery)
+        result = load_only_to_sell(battery_load[day], buy_prices[day], sell_prices[day], battery)
+        np.testing.assert_array_equal(result[0], expected[0])
+        np.testing.assert_array_equal(result[1], expected[1])
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_load_only_to_sell_batch_matches_reference(seed):
+    battery_load, buy_prices, sell_prices, battery = random_days(seed)
+    buy_time, sell_time = load_only_to_sell_batch(battery_load, buy_prices, sell_prices, battery)
+    for day in range(len(buy_prices)):
+        expected = load_only_to_sell_reference(battery_load[day], buy_prices[day], sell_prices[day], battery)
+        np.testing.assert_array_equal(buy_time[day], expected[0])
+        np.testing.assert_array_equal(sell_time[day], expected[1])
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from backend.const import BATTERIES, SIZE, WITHDRAWABLE_RATE
+from calculator import VIOLATIONS, iter_total_profit, settle, settle_period, total_profit, violated_days
+from linear import DP
+
+RANGE = {"start_date": "2024-08-01", "end_date": "2024-08-10"}
+SCENARIOS = [
+    {"provider": "enea", "tariff": "G11", "load_to_sell": True},
+    {"provider": "pge", "tariff": "G13", "load_to_sell": False, "daily_usage": 10.0},
+    {"provider": "tauron", "tariff": "G14", "load_to_sell": True, "solar_avaialable": True},
+]
+
+
+@pytest.mark.parametrize("scenario", SCENARIOS)
+def test_total_profit_same_for_every_loop(no_schedule_cache, scenario):
+    battery = BATTERIES[1]
+    profit, months = total_profit(battery, **RANGE, **scenario)
+    assert months == 10 / 30
+    assert total_profit(battery, **RANGE, **scenario, workers=2) == (profit, months)
+    assert total_profit(battery, **RANGE, **scenario, chunk_days=3) == (profit, months)
+    assert total_profit(battery, **RANGE, **scenario, batch=True) == (profit, months)
+
+    days = list(iter_total_profit(battery, **RANGE, **scenario, chunk_days=4))
+    assert len(days) == 10
+    assert days[-1]["cumulative"]["profit"] == profit
+
+
+def test_total_profit_batch_dp_is_approximate(no_schedule_cache):
+    # dp only approximates the schedules, it never beats the exact solve
+    exact, _ = total_profit(BATTERIES[0], **RANGE, batch=True)
+    approximate, _ = total_profit(BATTERIES[0], **RANGE, batch=True, solver=DP)
+    assert approximate <= exact + 1e-9
+
+
+def test_total_profit_rejects_workers_with_batch():
+    with pytest.raises(ValueError):
+        total_profit(BATTERIES[0], **RANGE, batch=True, workers=2)
+    with pytest.raises(ValueError):
+        total_profit(BATTERIES[0], **RANGE, rolling=True, chunk_days=5)
+
+
+def test_settle_period():
+    # 3 sold, 2 bought: 2 deducted, the other 1 at WITHDRAWABLE_RATE
+    profit = settle_period([10.0, 5.0], [12.0, 9.0], {"sold": 3.0, "bought": 2.0}, 2.0, 1.5, 0.5)
+    assert profit == pytest.approx(21.0 - (15.0 - 2.0 - WITHDRAWABLE_RATE) - 2.0)
+
+
+def flat_days(battery):
+    """Three days of a 2 kWh usage at 08:00: met from the grid, met by nothing, and met by overloading the battery."""
+    usage = np.zeros((3, SIZE))
+    usage[:, 32] = 2.0
+    grid = usage.copy()
+    grid[1] = 0.0
+    grid[2] = 0.0
+    loading = np.zeros((3, SIZE))
+    loading[2, 10] = battery.capacity + 2.0
+    loading[2, 32] = -battery.capacity
+    zeros = np.zeros((3, SIZE))
+    prices = np.full((3, SIZE), 0.5)
+    return loading, grid, zeros, zeros, prices, prices, prices, usage
+
+
+def test_settle_violation_masks():
+    battery = BATTERIES[0]
+    cost, bought, sold, violations = settle(*flat_days(battery), battery)
+    np.testing.assert_allclose(cost, [1.0, 0.0, 0.5 * 2.0])
+    np.testing.assert_array_equal(sold, 0.0)
+    assert violations["checked"].all()
+    np.testing.assert_array_equal(violations["unmet"], [False, True, False])
+    np.testing.assert_array_equal(violations["overfilled"], [False, False, False])
+    np.testing.assert_array_equal(violations["overloaded"], [False, False, True])
+    np.testing.assert_array_equal(violations["not_loadable"], [False, False, True])
+    assert violated_days(violations, ["a", "b", "c"]) == {"unmet": ["b"], "overloaded": ["c"], "not_loadable": ["c"]}
+
+
+def test_settle_validation_levels():
+    battery = BATTERIES[0]
+    days = flat_days(battery)
+    full = settle(*days, battery)
+    _, _, _, off = settle(*days, battery, validation="off")
+    assert not any(off[name].any() for name in (*VIOLATIONS, "checked"))
+
+    _, _, _, sampled = settle(*days, battery, validation="sampled", sample_days=2, seed=1)
+    assert sampled["checked"].sum() == 2
+    for name in VIOLATIONS:
+        # a sampled day is judged like with full validation, the others are not judged
+        np.testing.assert_array_equal(sampled[name], full[3][name] & sampled["checked"])
+    with pytest.raises(ValueError):
+        settle(*days, battery, validation="some")
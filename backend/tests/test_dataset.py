@@ -0,0 +1,95 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.const import SIZE
+from dataset import DayStore, build_store, load_range, load_store, read_day_csv, write_days
+
+
+def write_day(data_dir, series, day, values):
+    os.makedirs(data_dir / series, exist_ok=True)
+    pd.DataFrame({"Data": values}).to_csv(data_dir / series / f"{day}.csv", index=False)
+
+
+@pytest.fixture
+def store(tmp_path):
+    """
+    tge and rce for 2024-08-01..05: rce misses the 3rd, tge has 95 rows on
+    the 4th; the value of every row is the day of the month.
+    """
+    data_dir = tmp_path / "data"
+    for day in range(1, 6):
+        write_day(data_dir, "tge", f"2024-08-0{day}", np.full(95 if day == 4 else SIZE, float(day)))
+        if day != 3:
+            write_day(data_dir, "rce", f"2024-08-0{day}", np.full(SIZE, float(day)))
+    build_store(str(data_dir), str(tmp_path / "store"), series=("tge", "rce"))
+    return DayStore(str(tmp_path / "store"))
+
+
+def test_load_range_skip(store):
+    data = load_range(series=("tge", "rce"), store=store)
+    assert [str(d) for d in data.dates] == ["2024-08-01", "2024-08-02", "2024-08-05"]
+    assert data.dropped == ["2024-08-03", "2024-08-04"]
+    assert data.report["rce"] == {"missing": ["2024-08-03"], "malformed": []}
+    assert data.report["tge"] == {"missing": [], "malformed": ["2024-08-04"]}
+    np.testing.assert_array_equal(data.prices[:, 0], [1.0, 2.0, 5.0])
+    assert data.has_gaps()
+
+
+def test_load_range_fill(store):
+    data = load_range(series=("tge", "rce"), policy="fill", store=store)
+    assert len(data) == 5
+    assert data.filled == ["2024-08-03", "2024-08-04"]
+    # bad rows come from the closest earlier valid day of the same series
+    np.testing.assert_array_equal(data.prices[:, 0], [1.0, 2.0, 3.0, 3.0, 5.0])
+    np.testing.assert_array_equal(data.sell_prices[:, 0], [1.0, 2.0, 2.0, 4.0, 5.0])
+
+
+def test_load_range_fill_leading_gap(store):
+    data = load_range("2024-08-03", "2024-08-05", series=("rce",), policy="fill", store=store)
+    np.testing.assert_array_equal(data.sell_prices[:, 0], [4.0, 4.0, 5.0])
+
+
+def test_load_range_raise(store):
+    with pytest.raises(ValueError):
+        load_range(series=("tge", "rce"), policy="raise", store=store)
+    data = load_range("2024-08-01", "2024-08-02", series=("tge", "rce"), policy="raise", store=store)
+    assert len(data) == 2 and not data.has_gaps()
+    with pytest.raises(ValueError):
+        load_range(series=("tge",), policy="sometimes", store=store)
+
+
+def test_load_range_outside_store_and_absent_series(store):
+    data = load_range("2024-07-30", "2024-08-02", series=("tge", "usage"), store=store)
+    assert len(data) == 0
+    assert data.report["tge"]["missing"] == ["2024-07-30", "2024-07-31"]
+    assert len(data.report["usage"]["missing"]) == 4
+    with pytest.raises(ValueError):
+        load_range("2024-08-01", "2024-08-02", series=("usage",), policy="fill", store=store)
+
+
+def test_write_days_extends_the_index(store):
+    write_days("solar_output", ["2024-08-07"], np.full(SIZE, 7.0), store_dir=store.store_dir, data_dir=store.store_dir)
+    grown = DayStore(store.store_dir)
+    assert str(grown.dates[-1]) == "2024-08-07"
+    assert grown.has("solar_output", "2024-08-07") and not grown.has("tge", "2024-08-07")
+    np.testing.assert_array_equal(grown.day("tge", "2024-08-05"), store.day("tge", "2024-08-05"))
+
+
+def test_load_store_brings_in_newer_day_files(tmp_path):
+    data_dir, store_dir = tmp_path / "data", tmp_path / "store"
+    write_day(data_dir, "tge", "2024-08-01", np.full(SIZE, 1.0))
+    build_store(str(data_dir), str(store_dir))
+    stamp = load_store(str(store_dir), str(data_dir)).stamp
+
+    # a scraper writing a day after the store was built
+    write_day(data_dir, "tge", "2024-08-02", np.full(SIZE, 2.0))
+    newer = (stamp + 10**9) / 1e9
+    os.utime(data_dir / "tge" / "2024-08-02.csv", (newer, newer))
+    os.utime(data_dir / "tge", (newer, newer))
+
+    store = load_store(str(store_dir), str(data_dir))
+    np.testing.assert_array_equal(store.day("tge", "2024-08-02"), read_day_csv(data_dir / "tge" / "2024-08-02.csv"))
+    assert load_store(str(store_dir), str(data_dir)) is store
@@ -0,0 +1,45 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from backend.scripts.ingest_aggregates import MANIFEST, ingest
+
+
+def write_tge_export(path, days):
+    """A TGE aggregate export: hourly fixing I prices (zł/MWh) of {day: price}."""
+    rows = [(f"{day[8:10]}.{day[5:7]}.{day[:4]} {hour:02d}:00", price + hour, 1.0, price, 1.0)
+            for day, price in days.items() for hour in range(24)]
+    pd.DataFrame(rows, columns=["Data", "Fixing I price", "Fixing I volume", "Fixing II price", "Fixing II volume"]).to_csv(path, index=False)
+
+
+def test_ingest_is_idempotent(tmp_path):
+    export, output_dir = tmp_path / "tge.csv", tmp_path / "tge"
+    write_tge_export(export, {"2024-08-01": 400.0, "2024-08-02": 500.0, "2024-08-03": 600.0})
+
+    # small chunks, so days span chunk boundaries
+    assert ingest([str(export)], "tge", str(output_dir), chunksize=10) == ["2024-08-01", "2024-08-02", "2024-08-03"]
+    day = pd.read_csv(output_dir / "2024-08-02.csv").values.flatten()
+    np.testing.assert_allclose(day, np.repeat(np.arange(500.0, 524.0) / 1000, 4))
+    written = {path.name: path.stat().st_mtime_ns for path in output_dir.glob("*.csv")}
+
+    assert ingest([str(export)], "tge", str(output_dir), chunksize=7) == []
+    assert {path.name: path.stat().st_mtime_ns for path in output_dir.glob("*.csv")} == written
+
+    # a corrected price rewrites only its day
+    write_tge_export(export, {"2024-08-01": 400.0, "2024-08-02": 510.0, "2024-08-03": 600.0})
+    assert ingest([str(export)], "tge", str(output_dir)) == ["2024-08-02"]
+    manifest = json.loads((output_dir / MANIFEST).read_text())
+    assert sorted(manifest) == ["2024-08-01", "2024-08-02", "2024-08-03"]
+    assert all(entry["rows"] == 96 for entry in manifest.values())
+
+
+def test_ingest_adopts_day_files_without_manifest(tmp_path):
+    export, output_dir = tmp_path / "tge.csv", tmp_path / "tge"
+    write_tge_export(export, {"2024-08-01": 400.0, "2024-08-02": 500.0})
+    ingest([str(export)], "tge", str(output_dir))
+    (output_dir / MANIFEST).unlink()
+
+    # day files of an older run are compared once, then recorded
+    assert ingest([str(export)], "tge", str(output_dir)) == []
+    assert sorted(json.loads((output_dir / MANIFEST).read_text())) == ["2024-08-01", "2024-08-02"]
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from backend.const import (CURRENT_A, B_ENEA, VAT, ENEA_MONTHLY_COST, ENERGA_MONTHLY_COST, PGE_MONTHLY_COST, TAURON_MONTHLY_COST,
+                           K_PGE, SC_TAUTRON, Wk_ENERGA, ENEA_STATIC_KWH, PGE_STATIC_KWH, TAURON_STATIC_KWH, ENERGA_STATIC_KWH,
+                           ENEA_MONTHLY_COST_STATIC, ENERGA_MONTHLY_COST_STATIC, TAURON_MONTHLY_COST_STATIC, PGE_MONTHLY_COST_STATIC,
+                           SIZE, PGE_MIN_PRICE_CAP, TAURON_MIN_PRICE_CAP, G13_TAURON, G11_TAURON, G12_TAURON, ADDITIONAL_HELPER_SELLING)
+from providers import PROVIDERS, price_providers
+
+TARIFFS = {"G11": G11_TAURON, "G12": G12_TAURON, "G13": G13_TAURON}
+
+
+# the per-provider formulas price_providers replaced, the G14 tariff passed in instead of read from its day file
+def old_enea(prices, sell_prices, tarifs, static_prices):
+    if static_prices:
+        return np.full(SIZE, ENEA_STATIC_KWH) + tarifs, sell_prices, ENEA_MONTHLY_COST_STATIC
+    netto_prices = prices + CURRENT_A + B_ENEA
+    return netto_prices * (1 + VAT) + tarifs, sell_prices * ADDITIONAL_HELPER_SELLING, ENEA_MONTHLY_COST
+
+
+def old_energa(prices, sell_prices, tarifs, static_prices):
+    if static_prices:
+        return np.full(SIZE, ENERGA_STATIC_KWH) + tarifs, sell_prices, ENERGA_MONTHLY_COST_STATIC
+    netto_prices = prices + Wk_ENERGA
+    return netto_prices * (1 + VAT) + tarifs, sell_prices * ADDITIONAL_HELPER_SELLING, ENERGA_MONTHLY_COST
+
+
+def old_pge(prices, sell_prices, tarifs, static_prices):
+    if static_prices:
+        return np.full(SIZE, PGE_STATIC_KWH) + tarifs, sell_prices, PGE_MONTHLY_COST_STATIC
+    prices = np.maximum(PGE_MIN_PRICE_CAP, prices) + tarifs
+    netto_prices = prices + CURRENT_A + K_PGE
+    return netto_prices * (1 + VAT) + tarifs, sell_prices * ADDITIONAL_HELPER_SELLING, PGE_MONTHLY_COST
+
+
+def old_tauron(prices, sell_prices, tarifs, static_prices):
+    if static_prices:
+        return np.full(SIZE, TAURON_STATIC_KWH) + tarifs, sell_prices, TAURON_MONTHLY_COST_STATIC
+    brutto_prices = (prices + SC_TAUTRON) * (1 + VAT)
+    return np.maximum(TAURON_MIN_PRICE_CAP, brutto_prices) + tarifs, sell_prices * ADDITIONAL_HELPER_SELLING, TAURON_MONTHLY_COST
+
+
+OLD = {"enea": old_enea, "energa": old_energa, "pge": old_pge, "tauron": old_tauron}
+
+
+@pytest.fixture
+def day_prices():
+    rng = np.random.default_rng(0)
+    # negative prices too, they hit the PGE and Tauron floors
+    return rng.uniform(-0.2, 1.0, (5, SIZE)), rng.uniform(-0.2, 1.0, (5, SIZE)), rng.uniform(0.0, 0.8, (5, SIZE))
+
+
+def test_registered_providers():
+    assert set(PROVIDERS) == set(OLD)
+
+
+@pytest.mark.parametrize("static_prices", [False, True])
+@pytest.mark.parametrize("tariff", ["G11", "G12", "G13", "G14"])
+def test_price_providers_match_old_formulas(day_prices, tariff, static_prices):
+    prices, sell_prices, g14 = day_prices
+    providers = [p for p in OLD if tariff in PROVIDERS[p]["tariffs"]]
+    buy, sell, monthly_cost = price_providers(prices, sell_prices, providers, tariff, static_prices, g14=g14)
+    for k, provider in enumerate(providers):
+        for day in range(len(prices)):
+            tarifs = g14[day] if tariff == "G14" else TARIFFS[tariff]
+            old_buy, old_sell, old_monthly_cost = OLD[provider](prices[day], sell_prices[day], tarifs, static_prices)
+            np.testing.assert_allclose(buy[k, day], old_buy, rtol=0, atol=1e-12)
+            np.testing.assert_allclose(sell[k, day], old_sell, rtol=0, atol=1e-12)
+            assert monthly_cost[k] == old_monthly_cost
+
+
+def test_price_providers_one_day(day_prices):
+    prices, sell_prices, _ = day_prices
+    buy, sell, _ = price_providers(prices[0], sell_prices[0], ["pge"], "G12")
+    assert buy.shape == sell.shape == (1, SIZE)
+    np.testing.assert_allclose(buy[0], old_pge(prices[0], sell_prices[0], G12_TAURON, False)[0], rtol=0, atol=1e-12)
+
+
+def test_price_providers_unknown_provider(day_prices):
+    with pytest.raises(ValueError):
+        price_providers(day_prices[0], day_prices[1], ["unknown"])
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+import calculator
+import dataset
+import results_store
+from backend.const import BATTERIES
+from calculator import total_profit
+from dataset import DayStore, write_days
+from results_store import ResultsStore
+
+SCENARIO = {"provider": "enea", "tariff": "G11", "daily_usage": 7.5}
+
+
+@pytest.fixture
+def add_days(tmp_path, monkeypatch):
+    """
+    An empty store the results and total_profit read instead of the real one;
+    add(*days) copies the real tge and rce of the days into it.
+    """
+    real = dataset.load_store()
+    path = str(tmp_path / "store")
+    monkeypatch.setattr(dataset, "load_store", lambda *args, **kwargs: DayStore(path))
+    monkeypatch.setattr(results_store, "load_store", lambda *args, **kwargs: DayStore(path))
+    monkeypatch.setattr(calculator, "load_store", lambda *args, **kwargs: DayStore(path))
+
+    def add(*days, shift=0.0):
+        for name in ("tge", "rce"):
+            write_days(name, days, np.stack([real.day(name, day) for day in days]) + shift, store_dir=path, data_dir=str(tmp_path))
+    return add
+
+
+def assert_total_profit(summary, start, end):
+    profit, months = total_profit(BATTERIES[0], start_date=start, end_date=end, **SCENARIO)
+    assert summary["months"] == months
+    assert summary["profit"] == profit
+
+
+def test_incremental_and_backfilled_totals(tmp_path, add_days):
+    results = ResultsStore(str(tmp_path / "results.sqlite"))
+    add_days("2024-08-02", "2024-08-03", "2024-08-04", "2024-08-05")
+    assert results.update(BATTERIES[0], **SCENARIO) == 4
+    assert results.update(BATTERIES[0], **SCENARIO) == 0
+    assert_total_profit(results.summary(BATTERIES[0], update=False, **SCENARIO), "2024-08-02", "2024-08-05")
+
+    # days arriving in order are added to the totals
+    add_days("2024-08-06", "2024-08-07")
+    assert results.update(BATTERIES[0], **SCENARIO) == 2
+    summary = results.summary(BATTERIES[0], update=False, **SCENARIO)
+    assert summary["days"] == 6 and summary["last_day"] == "2024-08-07"
+    assert_total_profit(summary, "2024-08-02", "2024-08-07")
+
+    # an older day makes the totals be summed again
+    add_days("2024-08-01")
+    assert results.update(BATTERIES[0], **SCENARIO) == 1
+    summary = results.summary(BATTERIES[0], update=False, **SCENARIO)
+    assert summary["days"] == 7
+    assert_total_profit(summary, "2024-08-01", "2024-08-07")
+
+    at_once = ResultsStore(str(tmp_path / "at_once.sqlite"))
+    assert at_once.summary(BATTERIES[0], **SCENARIO) == summary
+
+
+def test_changed_input_is_computed_again(tmp_path, add_days):
+    results = ResultsStore(str(tmp_path / "results.sqlite"))
+    add_days("2024-08-01", "2024-08-02", "2024-08-03")
+    results.update(BATTERIES[0], **SCENARIO)
+
+    # a re-ingested day with other prices
+    add_days("2024-08-02", shift=0.1)
+    assert results.update(BATTERIES[0], **SCENARIO) == 1
+    assert_total_profit(results.summary(BATTERIES[0], update=False, **SCENARIO), "2024-08-01", "2024-08-03")
+
+
+def test_scenarios_are_stored_apart(tmp_path, add_days):
+    results = ResultsStore(str(tmp_path / "results.sqlite"))
+    add_days("2024-08-01", "2024-08-02")
+    assert results.summary(BATTERIES[0], update=False, **SCENARIO) is None
+    low = results.summary(BATTERIES[0], **SCENARIO)
+    high = results.summary(BATTERIES[0], **{**SCENARIO, "daily_usage": 12.5})
+    assert low["profit"] != high["profit"]
+    with pytest.raises(ValueError):
+        results.interpolate(BATTERIES[0], 30.0, **{key: value for key, value in SCENARIO.items() if key != "daily_usage"})
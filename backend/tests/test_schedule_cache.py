@@ -0,0 +1,100 @@
+import sys
+
+import numpy as np
+import pytest
+
+import schedule_cache
+from schedule_cache import ScheduleCache, memoize
+
+
+def make_square(cache, calls, depends=(), cacheable=None):
+    """The same function under the same name on every call, like after a restart."""
+    @memoize(cache, depends=depends, cacheable=cacheable)
+    def square(x, scale=1.0):
+        calls.append(x)
+        return np.asarray(x) ** 2 * scale
+    return square
+
+
+@pytest.fixture
+def dependency(tmp_path, monkeypatch):
+    """A module whose source can be changed between runs."""
+    path = tmp_path / "pricing_rules.py"
+    path.write_text("RATE = 1\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield path
+    sys.modules.pop("pricing_rules", None)
+
+
+def test_keys_cover_arrays_and_defaults(tmp_path):
+    calls = []
+    square = make_square(ScheduleCache(cache_dir=str(tmp_path)), calls)
+    square(np.arange(3.0))
+    square(np.arange(3.0), 1.0)
+    square(np.arange(3.0), scale=1.0)
+    assert len(calls) == 1
+    square(np.arange(4.0))
+    square(np.arange(3.0) + 1e-12)
+    square(np.arange(3.0), scale=2.0)
+    assert len(calls) == 4
+
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    calls = []
+    make_square(ScheduleCache(cache_dir=str(tmp_path)), calls)(np.arange(3.0))
+    cache = ScheduleCache(cache_dir=str(tmp_path))
+    result = make_square(cache, calls)(np.arange(3.0))
+    assert len(calls) == 1
+    assert cache.stats()["disk_hits"] == 1
+    np.testing.assert_array_equal(result, [0.0, 1.0, 4.0])
+    assert not result.flags.writeable
+
+
+def test_cache_version_invalidates(tmp_path, monkeypatch):
+    calls = []
+    make_square(ScheduleCache(cache_dir=str(tmp_path)), calls)(np.arange(3.0))
+    monkeypatch.setattr(schedule_cache, "CACHE_VERSION", schedule_cache.CACHE_VERSION + 1)
+    make_square(ScheduleCache(cache_dir=str(tmp_path)), calls)(np.arange(3.0))
+    assert len(calls) == 2
+
+
+def test_dependency_source_invalidates(tmp_path, dependency):
+    calls = []
+    cache_dir = str(tmp_path / "cache")
+    make_square(ScheduleCache(cache_dir=cache_dir), calls, depends=("pricing_rules",))(np.arange(3.0))
+    make_square(ScheduleCache(cache_dir=cache_dir), calls, depends=("pricing_rules",))(np.arange(3.0))
+    assert len(calls) == 1
+    dependency.write_text("RATE = 2\n")
+    make_square(ScheduleCache(cache_dir=cache_dir), calls, depends=("pricing_rules",))(np.arange(3.0))
+    assert len(calls) == 2
+
+
+def test_not_cacheable_results_are_computed_again(tmp_path):
+    calls = []
+    square = make_square(ScheduleCache(cache_dir=str(tmp_path)), calls, cacheable=lambda result: result.sum() < 10)
+    square(np.arange(3.0))
+    square(np.arange(3.0))
+    square(np.arange(5.0))
+    square(np.arange(5.0))
+    # 0 + 1 + 4 is kept, 0 + 1 + 4 + 9 + 16 is not
+    assert len(calls) == 3
+
+
+def test_memory_lru_eviction():
+    calls = []
+    cache = ScheduleCache(maxsize=2, cache_dir=None)
+    square = make_square(cache, calls)
+    for x in (1.0, 2.0, 1.0, 3.0, 2.0):
+        square(x)
+    # 2.0 was the least recently used entry when 3.0 came in
+    assert calls == [1.0, 2.0, 3.0, 2.0]
+    assert cache.stats()["evictions"] == 2
+
+
+def test_disk_cap_evicts(tmp_path):
+    cache = ScheduleCache(cache_dir=str(tmp_path), max_disk_bytes=4096)
+    square = make_square(cache, [])
+    for x in range(20):
+        square(np.full(100, float(x)))
+    assert cache.stats()["disk_evictions"] > 0
+    assert sum(path.stat().st_size for path in tmp_path.glob("*.pkl")) <= 4096